@@ -1,47 +1,63 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-Script for building test DAWGs.
+Script for building test DAWGs. DAWG python package is used
+if it is installed, dawg_python.builder otherwise (files are the same).
 """
 from __future__ import absolute_import, unicode_literals
-import dawg
 import os
 import sys
 import struct
 
 sys.path.insert(0, os.path.dirname(__file__))
 
+try:
+    import dawg
+except ImportError:
+    dawg = None
+    import dawg_python
+    from dawg_python import builder
+
 from bench.utils import words100k
 from tests.test_prediction import TestPrediction
 
+def create(cls_name, data, *args):
+    if dawg is not None:
+        return getattr(dawg, cls_name)(*(args + (data,)))
+    return builder.build(getattr(dawg_python, cls_name)(*args), data)
+
+def save(d, path):
+    with open(path, 'wb') as f:
+        d.write(f)
+
 def create_dawg():
     words = words100k()
-    return dawg.DAWG(words)
+    return create('DAWG', words)
 
 def create_bytes_dawg():
     words = words100k()
     values = [struct.pack(str('<H'), len(word)) for word in words]
-    return dawg.BytesDAWG(zip(words, values))
+    return create('BytesDAWG', zip(words, values))
 
 def create_record_dawg():
     words = words100k()
     values = [ [len(word)] for word in words]
-    return dawg.RecordDAWG(str('<H'), zip(words, values))
+    return create('RecordDAWG', zip(words, values), str('<H'))
 
 def create_int_dawg():
     words = words100k()
     values = [len(word) for word in words]
-    return dawg.IntDAWG(zip(words, values))
+    return create('IntDAWG', zip(words, values))
 
 def create_int_completion_dawg():
     words = words100k()
     values = [len(word) for word in words]
-    return dawg.IntCompletionDAWG(zip(words, values))
+    return create('IntCompletionDAWG', zip(words, values))
 
 def build_test_data():
 
-    dawg.CompletionDAWG(['f', 'bar', 'foo', 'foobar']).save('dev_data/small/completion.dawg')
-    dawg.CompletionDAWG([]).save('dev_data/small/completion-empty.dawg')
+    save(create('CompletionDAWG', ['f', 'bar', 'foo', 'foobar']), 'dev_data/small/completion.dawg')
+    save(create('CompletionDAWG', []), 'dev_data/small/completion-empty.dawg')
 
     bytes_data =  (
         ('foo', b'data1'),
@@ -49,7 +65,7 @@ def build_test_data():
         ('foo', b'data3'),
         ('foobar', b'data4')
     )
-    dawg.BytesDAWG(bytes_data).save('dev_data/small/bytes.dawg')
+    save(create('BytesDAWG', bytes_data), 'dev_data/small/bytes.dawg')
 
     record_data = (
         ('foo',     (3, 2, 256)),
@@ -57,20 +73,20 @@ def build_test_data():
         ('foo',     (3, 2, 1)),
         ('foobar',  (6, 3, 0))
     )
-    dawg.RecordDAWG(str(">3H"), record_data).save('dev_data/small/record.dawg')
+    save(create('RecordDAWG', record_data, str(">3H")), 'dev_data/small/record.dawg')
 
     int_data = {'foo': 1, 'bar': 5, 'foobar': 3}
-    dawg.IntDAWG(int_data).save('dev_data/small/int_dawg.dawg')
-    dawg.IntCompletionDAWG(int_data).save('dev_data/small/int_completion_dawg.dawg')
+    save(create('IntDAWG', int_data), 'dev_data/small/int_dawg.dawg')
+    save(create('IntCompletionDAWG', int_data), 'dev_data/small/int_completion_dawg.dawg')
 
-    dawg.DAWG(TestPrediction.DATA).save('dev_data/small/prediction.dawg')
-    dawg.RecordDAWG(str("=H"), [(k, (len(k),)) for k in TestPrediction.DATA]).save('dev_data/small/prediction-record.dawg')
+    save(create('DAWG', TestPrediction.DATA), 'dev_data/small/prediction.dawg')
+    save(create('RecordDAWG', [(k, (len(k),)) for k in TestPrediction.DATA], str("=H")), 'dev_data/small/prediction-record.dawg')
 
-    create_dawg().save('dev_data/large/dawg.dawg')
-    create_bytes_dawg().save('dev_data/large/bytes_dawg.dawg')
-    create_record_dawg().save('dev_data/large/record_dawg.dawg')
-    create_int_dawg().save('dev_data/large/int_dawg.dawg')
-    #create_int_completion_dawg().save('dev_data/large/int_completion_dawg.dawg')
+    save(create_dawg(), 'dev_data/large/dawg.dawg')
+    save(create_bytes_dawg(), 'dev_data/large/bytes_dawg.dawg')
+    save(create_record_dawg(), 'dev_data/large/record_dawg.dawg')
+    save(create_int_dawg(), 'dev_data/large/int_dawg.dawg')
+    save(create_int_completion_dawg(), 'dev_data/large/int_completion_dawg.dawg')
 
 
 if __name__ == '__main__':
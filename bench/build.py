@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Build throughput and peak memory of dawg_python.builder.
+
+Keys are generated on the fly (words from words100k.txt with random
+numeric suffixes), so they are never held in memory. Each case runs
+in a separate process; peak memory is the maximum resident set size
+of that process.
+
+Usage: build.py [num_keys ...]      (default: 1000000)
+"""
+from __future__ import absolute_import, unicode_literals, division
+import os
+import sys
+import time
+import resource
+import subprocess
+
+import dawg_python
+from dawg_python import builder
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from utils import generate_keys
+
+CASES = [
+    ('DAWG, sorted stream', 'DAWG', True),
+    ('IntDAWG, sorted stream', 'IntDAWG', True),
+    ('RecordDAWG, sorted stream', 'RecordDAWG', True),
+    ('DAWG, unsorted (external sort)', 'DAWG', False),
+]
+
+
+def format_result(key, value):
+    print("%55s:    %s" % (key, value))
+
+
+def run_case(cls_name, input_is_sorted, num_keys):
+    keys = generate_keys(num_keys, input_is_sorted)
+    if cls_name == 'DAWG':
+        dawg, data = dawg_python.DAWG(), keys
+    elif cls_name == 'IntDAWG':
+        dawg, data = dawg_python.IntDAWG(), ((key, len(key)) for key in keys)
+    else:
+        dawg, data = dawg_python.RecordDAWG(str('<H')), ((key, (len(key),)) for key in keys)
+
+    start = time.time()
+    builder.build(dawg, data, input_is_sorted)
+    elapsed = time.time() - start
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print("%f %d %d" % (elapsed, len(dawg.tobytes()), max_rss))
+
+
+def benchmark(num_keys):
+    print('\n====== %d keys =======\n' % num_keys)
+    for name, cls_name, input_is_sorted in CASES:
+        output = subprocess.check_output([
+            sys.executable, __file__, '--case', cls_name, str(int(input_is_sorted)), str(num_keys)
+        ]).decode('ascii')
+        elapsed, size, max_rss = output.split()
+        format_result(
+            name,
+            '%0.1fK keys/sec, %0.0fs, file %0.1fMB, peak RSS %0.0fMB' % (
+                num_keys / float(elapsed) / 1000, float(elapsed),
+                int(size) / 2 ** 20, int(max_rss) / 1024,
+            )
+        )
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--case']:
+        run_case(sys.argv[2], bool(int(sys.argv[3])), int(sys.argv[4]))
+    else:
+        for num_keys in [int(arg) for arg in sys.argv[1:]] or [1000000]:
+            benchmark(num_keys)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Startup time and memory of lookup-only processes, with and without
+``lazy_guide=True``.
+
+Each case runs in a separate process: it loads a large DAWG and
+runs 1000 lookups which don't need the guide (``get`` for
+IntCompletionDAWG, ``in`` for RecordDAWG); the time includes loading,
+memory is the growth of the resident set size (Linux only).
+
+Usage: load.py
+"""
+from __future__ import absolute_import, unicode_literals, division
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+import dawg_python
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from utils import data_path, words100k, current_rss
+
+DAWGS = [
+    ('IntCompletionDAWG', 'int_completion_dawg.dawg'),
+    ('RecordDAWG', 'record_dawg.dawg'),
+]
+LOAD_MODES = [('read', {}), ('mmap', {'mmap': True}), ('decoded', {'decoded': True})]
+
+
+def format_result(key, value):
+    print("%55s:    %s" % (key, value))
+
+
+def run_case(cls_name, load_mode, lazy_guide, words_path):
+    with io.open(words_path, encoding='utf8') as f:
+        words = f.read().split('\n')
+    load_options = dict(LOAD_MODES)[load_mode]
+    rss_before = current_rss()
+
+    start = time.time()
+    if cls_name == 'RecordDAWG':
+        d = dawg_python.RecordDAWG(str('<H'))
+    else:
+        d = dawg_python.IntCompletionDAWG()
+    d.load(data_path('large', dict(DAWGS)[cls_name]), lazy_guide=lazy_guide, **load_options)
+    if cls_name == 'RecordDAWG':
+        for word in words:
+            word in d
+    else:
+        for word in words:
+            d.get(word)
+    elapsed = time.time() - start
+
+    print("%f %d" % (elapsed, current_rss() - rss_before))
+
+
+def benchmark():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        # lookups are read by each case from a small file: loading
+        # the whole word list would leave free memory for the DAWG
+        words_path = os.path.join(tmp_dir, 'words.txt')
+        with io.open(words_path, 'w', encoding='utf8') as f:
+            f.write('\n'.join(words100k()[::100]))
+
+        for cls_name, _ in DAWGS:
+            print('\n====== %s, 1k lookups =======\n' % cls_name)
+            for load_mode, _ in LOAD_MODES:
+                for lazy_guide in [False, True]:
+                    output = subprocess.check_output([
+                        sys.executable, __file__, '--case', cls_name, load_mode, str(int(lazy_guide)), words_path
+                    ]).decode('ascii')
+                    elapsed, rss = output.split()
+                    format_result(
+                        '%s%s' % (load_mode, ', lazy_guide' if lazy_guide else ''),
+                        '%0.1fms, RSS +%0.2fMB' % (float(elapsed) * 1000, int(rss) / 2 ** 20)
+                    )
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--case']:
+        run_case(sys.argv[2], sys.argv[3], bool(int(sys.argv[4])), sys.argv[5])
+    else:
+        benchmark()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Scaling benchmarks for dawg_python.parallel.Executor.
+
+Usage: parallel.py [max_workers]
+"""
+from __future__ import absolute_import, unicode_literals, division
+import os
+import sys
+import time
+import multiprocessing
+
+import dawg_python
+from dawg_python.parallel import Executor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from utils import data_path, words100k
+
+WORDS100k = words100k()
+PREFIXES = [word[:3] for word in WORDS100k[::100]]
+
+
+def format_result(key, value):
+    print("%55s:    %s" % (key, value))
+
+
+def run(executor, method, queries, args, repeats):
+    best = None
+    for x in range(repeats):
+        start = time.time()
+        for res in executor.map(method, queries, *args):
+            pass
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def benchmark(max_workers):
+    dawg = dawg_python.RecordDAWG(str('<H')).load(data_path('large', 'record_dawg.dawg'), mmap=True)
+    replaces = dawg.compile_replaces({'е': 'ё'})
+
+    tests = [
+        ('get', WORDS100k, (), 10000),
+        ('contains', WORDS100k, (), 10000),
+        ('keys', PREFIXES, (), 20),
+        ('similar_items', WORDS100k, (replaces,), 2000),
+    ]
+
+    for kind in ['process', 'thread']:
+        print('\n====== Executor(kind=%r) =======\n' % kind)
+        for method, queries, args, chunk_size in tests:
+            base_time = None
+            for workers in range(1, max_workers + 1):
+                with Executor(dawg, workers, kind, chunk_size) as executor:
+                    # starts the workers
+                    list(executor.map(method, queries[:workers * chunk_size], *args))
+                    elapsed = run(executor, method, queries, args, repeats=2)
+
+                base_time = base_time or elapsed
+                format_result(
+                    '%s, %d worker(s)' % (method, workers),
+                    '%0.3fK ops/sec, %0.2fx' % (len(queries) / elapsed / 1000, base_time / elapsed)
+                )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        max_workers = int(sys.argv[1])
+    else:
+        max_workers = multiprocessing.cpu_count()
+    benchmark(max_workers)
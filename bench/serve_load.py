@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Load test for the lookup server (dawg_python.serve).
+
+Starts a server with the 100k words RecordDAWG on a Unix socket and
+measures request latency (p50/p99) and requests/sec for several
+numbers of concurrent requests.
+
+Usage: serve_load.py [duration_seconds]
+"""
+from __future__ import absolute_import, unicode_literals, division
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import subprocess
+
+from dawg_python.client import Client
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from utils import data_path, words100k
+
+WORDS100k = words100k()
+
+
+def format_result(key, value):
+    print("%55s:    %s" % (key, value))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run_load(client, method, make_args, concurrency, duration):
+    latencies = []
+    deadline = time.time() + duration
+
+    async def worker():
+        while time.time() < deadline:
+            start = time.time()
+            await client.request('words', method, *make_args())
+            latencies.append(time.time() - start)
+
+    start = time.time()
+    await asyncio.gather(*[worker() for x in range(concurrency)])
+    return latencies, time.time() - start
+
+
+async def benchmark(path, duration):
+    tests = [
+        ('get (1 key)', 'get', lambda: ([random.choice(WORDS100k)],)),
+        ('get (100 keys)', 'get', lambda: (random.sample(WORDS100k, 100),)),
+        ('contains (100 keys)', 'contains', lambda: (random.sample(WORDS100k, 100),)),
+        ('keys (1 prefix)', 'keys', lambda: ([random.choice(WORDS100k)[:4]],)),
+        ('similar_items (10 keys)', 'similar_items', lambda: (random.sample(WORDS100k, 10), {'е': 'ё'})),
+    ]
+    for concurrency in [1, 16, 64]:
+        print('\n====== %d concurrent requests, 4 connections =======\n' % concurrency)
+        client = Client(unix_path=path, pool_size=4)
+        for name, method, make_args in tests:
+            latencies, elapsed = await run_load(client, method, make_args, concurrency, duration)
+            format_result(
+                name,
+                '%0.0f req/sec, p50 %0.2fms, p99 %0.2fms' % (
+                    len(latencies) / elapsed,
+                    percentile(latencies, 50) * 1000,
+                    percentile(latencies, 99) * 1000,
+                )
+            )
+        await client.close()
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dawg.sock')
+        server = subprocess.Popen([
+            sys.executable, '-m', 'dawg_python.serve', '--unix', path,
+            '--dawg', 'words', 'RecordDAWG:<H', data_path('large', 'record_dawg.dawg'),
+        ])
+        try:
+            while not os.path.exists(path):
+                time.sleep(0.05)
+            asyncio.run(benchmark(path, duration))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Startup time and memory of ShardedDAWG vs a single DAWG file.
+
+Shards of dev_data/large/record_dawg.dawg (range shards split by
+leading chars and 16 hash shards) are built in a temporary directory. Each case runs
+in a separate process: it loads the DAWG (or the manifest) and runs
+lookups; the time includes loading, memory is the growth of
+the resident set size (Linux only).
+
+Usage: sharded.py
+"""
+from __future__ import absolute_import, unicode_literals, division
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+import dawg_python
+from dawg_python import sharded
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from utils import data_path, words100k, current_rss
+
+NUM_SHARDS = 16
+LOAD_MODES = [('read', {}), ('mmap', {'mmap': True}), ('decoded', {'decoded': True})]
+WORKLOADS = ['1 lookup', '1k lookups, one letter', '1k lookups, all letters']
+
+
+def format_result(key, value):
+    print("%55s:    %s" % (key, value))
+
+
+def write_workloads(tmp_dir):
+    # lookups are read by each case from a small file: loading
+    # the whole word list would leave free memory for the DAWG
+    words = sorted(set(words100k()))
+    workloads = {
+        '1 lookup': words[len(words) // 2:][:1],
+        '1k lookups, one letter': [word for word in words if word.startswith('п')][:1000],
+        '1k lookups, all letters': words[::len(words) // 1000],
+    }
+    paths = {}
+    for n, name in enumerate(WORKLOADS):
+        paths[name] = os.path.join(tmp_dir, 'workload-%d.txt' % n)
+        with io.open(paths[name], 'w', encoding='utf8') as f:
+            f.write('\n'.join(workloads[name]))
+    return paths
+
+
+def build_shards(tmp_dir):
+    dawg = dawg_python.RecordDAWG(str('<H')).load(data_path('large', 'record_dawg.dawg'))
+    keys = dawg.keys()
+    # leading chars of keys at even positions
+    boundaries = sorted(set(keys[len(keys) * n // NUM_SHARDS][:1] for n in range(1, NUM_SHARDS)))
+    paths = {}
+    for name, kwargs in [('range', {'boundaries': boundaries}), ('hash', {'num_shards': NUM_SHARDS})]:
+        paths[name] = os.path.join(tmp_dir, '%s.json' % name)
+        sharded.build(paths[name], 'RecordDAWG:<H', dawg.iteritems(), input_is_sorted=True, **kwargs)
+    return paths
+
+
+def run_case(path, load_mode, workload_path):
+    with io.open(workload_path, encoding='utf8') as f:
+        words = f.read().split('\n')
+    load_options = dict(LOAD_MODES)[load_mode]
+    rss_before = current_rss()
+
+    start = time.time()
+    if path.endswith('.json'):
+        d = sharded.ShardedDAWG().load(path, **load_options)
+    else:
+        d = dawg_python.RecordDAWG(str('<H')).load(path, **load_options)
+    for word in words:
+        d.get(word)
+    elapsed = time.time() - start
+
+    rss_after = current_rss()
+    num_loaded = d.num_loaded() if path.endswith('.json') else 1
+    print("%f %d %d" % (elapsed, rss_after - rss_before, num_loaded))
+
+
+def benchmark():
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        paths = build_shards(tmp_dir)
+        workload_paths = write_workloads(tmp_dir)
+        cases = [('single file', data_path('large', 'record_dawg.dawg'))]
+        for name in ['range', 'hash']:
+            num_shards = sharded.ShardedDAWG().load(paths[name]).num_shards()
+            cases.append(('%d %s shards' % (num_shards, name), paths[name]))
+        for load_mode, _ in LOAD_MODES:
+            print('\n====== load: %s =======\n' % load_mode)
+            for workload in WORKLOADS:
+                for name, path in cases:
+                    output = subprocess.check_output([
+                        sys.executable, __file__, '--case', path, load_mode, workload_paths[workload]
+                    ]).decode('ascii')
+                    elapsed, rss, num_loaded = output.split()
+                    format_result(
+                        '%s, %s' % (name, workload),
+                        '%0.1fms, RSS +%0.1fMB, %s file(s) loaded' % (
+                            float(elapsed) * 1000, int(rss) / 2 ** 20, num_loaded
+                        )
+                    )
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--case']:
+        run_case(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        benchmark()
@@ -13,9 +13,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
 
 from utils import data_path, words100k
 
+ALPHABET = 'абвгдеёжзиклмнопрстуфхцчъыьэюя%s' % string.ascii_letters
+
 def random_words(num):
-    russian = 'абвгдеёжзиклмнопрстуфхцчъыьэюя'
-    alphabet = '%s%s' % (russian, string.ascii_letters)
+    alphabet = ALPHABET
     return [
         "".join([random.choice(alphabet) for x in range(random.randint(1,15))])
         for y in range(num)
@@ -37,6 +38,12 @@ PREFIXES_3_1k = prefixes1k(WORDS100k, 3)
 PREFIXES_5_1k = prefixes1k(WORDS100k, 5)
 PREFIXES_8_1k = prefixes1k(WORDS100k, 8)
 PREFIXES_15_1k = prefixes1k(WORDS100k, 15)
+FUZZY_WORDS = WORDS100k[::10000]
+PREDICTION_WORDS = [
+    'ЁЖИК', 'ЕЖИКЕ', 'ЕЖ', 'ДЕРЕВНЯ', 'ДЕРЁВНЯ', 'ОЗЕРА', 'ОЗЕРО', 'УЖ',
+    'strasse', 'straße', 'masse', 'maß',
+] * 1000
+TEXT = ' '.join(WORDS100k[::50])
 
 
 def format_result(key, value):
@@ -54,7 +61,7 @@ def bench(name, timer, descr='M ops/sec', op_count=0.1, repeats=3, runs=5):
 
         val = "%0.3f%s" % (op_time(min(times)), descr)
         format_result(name, val)
-    except (AttributeError, TypeError) as e:
+    except (AttributeError, TypeError, ImportError) as e:
         format_result(name, "not supported")
         #print(e)
 
@@ -67,9 +74,253 @@ def load_bytes_dawg():
 def load_record_dawg():
     return dawg_python.RecordDAWG(str('<H')).load(data_path('large', 'record_dawg.dawg'))
 
+def load_prediction_dawg():
+    return dawg_python.DAWG().load(data_path('small', 'prediction.dawg'))
+
+def load_prediction_record_dawg():
+    return dawg_python.RecordDAWG(str('=H')).load(data_path('small', 'prediction-record.dawg'))
+
 def load_int_dawg():
     return dawg_python.IntDAWG().load(data_path('large', 'int_dawg.dawg'))
 
+def load_bytes_dawg_decoded():
+    return dawg_python.BytesDAWG().load(data_path('large', 'bytes_dawg.dawg'), decoded=True)
+
+def load_int_dawg_decoded():
+    return dawg_python.IntDAWG().load(data_path('large', 'int_dawg.dawg'), decoded=True)
+
+def load_bytes_dawg_jump_table():
+    return dawg_python.BytesDAWG().load(data_path('large', 'bytes_dawg.dawg'), jump_depth=3)
+
+def jump_tables():
+    print('\n====== Jump tables =======\n')
+    dct = load_bytes_dawg().dct
+    size = dct.nbytes()
+    for depth in [1, 2, 3, 4]:
+        timer = timeit.Timer(lambda: dct.build_jump_table(depth))
+        build_time = min(timer.repeat(3, 1))
+        format_result(
+            'BytesDAWG jump table (depth=%d)' % depth,
+            '%d prefixes, %0.3fs, +%0.2fMB' % (
+                len(dct._jump_table), build_time, (dct.nbytes() - size) / 2**20
+            )
+        )
+
+def payload_modes():
+    print('\n====== BytesDAWG payload modes =======\n')
+    for mode in ['decoded', 'raw', 'lazy']:
+        setup = """
+from __main__ import WORDS100k, dawg_python, data_path
+data = dawg_python.BytesDAWG(payload_mode=%r).load(data_path('large', 'bytes_dawg.dawg'))
+""" % mode
+        bench(
+            'BytesDAWG(payload_mode=%r) get() (hits)' % mode,
+            timeit.Timer("for word in WORDS100k: data.get(word)", setup)
+        )
+        bench(
+            'BytesDAWG(payload_mode=%r) items()' % mode,
+            timeit.Timer("data.items()", setup),
+            ' ops/sec', op_count=1, repeats=1, runs=3
+        )
+
+def record_arrays():
+    print('\n====== RecordDAWG NumPy output =======\n')
+    setup = """
+import numpy
+from __main__ import WORDS100k, load_record_dawg
+data = load_record_dawg()
+"""
+    tests = [
+        ('items_array()', 'data.items_array()'),
+        ('numpy.array(items())', 'numpy.array([value for key, value in data.items()])'),
+        ('get_many_array() (hits)', 'data.get_many_array(WORDS100k)'),
+        ('numpy.array(get_many()) (hits)', 'numpy.array([value[0] for value in data.get_many(WORDS100k)])'),
+    ]
+    for name, test in tests:
+        bench(
+            'RecordDAWG %s' % name,
+            timeit.Timer(test, setup),
+            ' ops/sec', op_count=1, repeats=1, runs=3
+        )
+
+def scan_prefixes(data, text, max_len=32):
+    for start in range(len(text)):
+        data.prefixes(text[start:start+max_len])
+
+def text_scan():
+    size = len(TEXT.encode('utf8')) / 2**20
+    print('\n====== Text scan (%0.2fMB of text) =======\n' % size)
+    setup = """
+from __main__ import TEXT, scan_prefixes, load_dawg, load_int_dawg, load_bytes_dawg
+data = %s()
+"""
+    for name, load in [('DAWG', 'load_dawg'), ('IntDAWG', 'load_int_dawg'), ('BytesDAWG', 'load_bytes_dawg')]:
+        for test_name, test in [
+            ('find_all(text)', 'data.find_all(TEXT)'),
+            ('find_all(text, overlapping=False)', 'data.find_all(TEXT, overlapping=False)'),
+        ]:
+            bench(
+                '%s.%s' % (name, test_name),
+                timeit.Timer(test, setup % load),
+                'MB/sec', op_count=size, repeats=1, runs=3
+            )
+
+    bench(
+        'DAWG.prefixes(text[start:start+32]) for each start',
+        timeit.Timer('scan_prefixes(data, TEXT)', setup % 'load_dawg'),
+        'MB/sec', op_count=size, repeats=1, runs=3
+    )
+
+def subtree_index():
+    print('\n====== Subtree index =======\n')
+    data = load_record_dawg()
+    timer = timeit.Timer(lambda: (data.close(), data.count()))
+    format_result('RecordDAWG count() index build time', '%0.3fs' % min(timer.repeat(3, 1)))
+
+def top_k():
+    print('\n====== IntCompletionDAWG.top_k =======\n')
+    path = data_path('large', 'int_completion_dawg.dawg')
+    if not os.path.exists(path):
+        format_result('IntCompletionDAWG.top_k', 'not available (%s is missing)' % path)
+        return
+
+    setup = """
+import heapq, operator
+from __main__ import PREFIXES_3_1k, dawg_python, data_path
+data = dawg_python.IntCompletionDAWG().load(data_path('large', 'int_completion_dawg.dawg'))
+data.top_k()
+"""
+    for k in [1, 10, 100]:
+        bench(
+            'IntCompletionDAWG.top_k(prefix="xxx", k=%d)' % k,
+            timeit.Timer("for word in PREFIXES_3_1k: data.top_k(word, %d)" % k, setup),
+            'K ops/sec', op_count=1, runs=3
+        )
+        bench(
+            'heapq.nlargest(%d, items(prefix="xxx"))' % k,
+            timeit.Timer(
+                "for word in PREFIXES_3_1k: "
+                "heapq.nlargest(%d, data.items(word), key=operator.itemgetter(1))" % k,
+                setup
+            ),
+            'K ops/sec', op_count=1, runs=3
+        )
+
+def overlay():
+    print('\n====== OverlayDAWG (over RecordDAWG) =======\n')
+    setup = """
+from __main__ import WORDS100k, NON_WORDS100k, PREFIXES_5_1k, load_record_dawg
+from dawg_python.overlay import OverlayDAWG
+data = load_record_dawg()
+if %r:
+    data = OverlayDAWG(data)
+    for word in WORDS100k[:%d]:
+        data[word + 'x'] = [(1,)]
+        del data[word]
+"""
+    for name, wrap, num_words in [
+        ('RecordDAWG', False, 0), ('OverlayDAWG, no changes', True, 0),
+        ('OverlayDAWG, 1000 changes', True, 500), ('OverlayDAWG, 10000 changes', True, 5000)
+    ]:
+        bench(
+            '%s get() (hits)' % name,
+            timeit.Timer("for word in WORDS100k: data.get(word)", setup % (wrap, num_words))
+        )
+        bench(
+            '%s __contains__ (misses)' % name,
+            timeit.Timer("for word in NON_WORDS100k: word in data", setup % (wrap, num_words))
+        )
+        bench(
+            '%s items(prefix="xxxxx")' % name,
+            timeit.Timer("for word in PREFIXES_5_1k: data.items(word)", setup % (wrap, num_words)),
+            'K ops/sec', op_count=1, runs=3
+        )
+
+def edits1(word, alphabet):
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = [a + b[1:] for a, b in splits if b]
+    transposes = [a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1]
+    replaces = [a + c + b[1:] for a, b in splits if b for c in alphabet]
+    inserts = [a + c + b for a, b in splits for c in alphabet]
+    return set(deletes + transposes + replaces + inserts)
+
+def candidate_keys(data, word, max_distance, alphabet):
+    candidates = set([word])
+    for x in range(max_distance):
+        candidates |= set(edit for cand in candidates for edit in edits1(cand, alphabet))
+    return sorted(key for key in candidates if key in data)
+
+def fuzzy():
+    print('\n====== Fuzzy search (%d words) =======\n' % len(FUZZY_WORDS))
+    setup = """
+from __main__ import FUZZY_WORDS, ALPHABET, candidate_keys, load_dawg
+data = load_dawg()
+"""
+    for max_distance in [1, 2]:
+        bench(
+            'DAWG.fuzzy_keys(word, %d)' % max_distance,
+            timeit.Timer(
+                "for word in FUZZY_WORDS: data.fuzzy_keys(word, %d, transpositions=True)" % max_distance,
+                setup
+            ),
+            ' ops/sec', op_count=len(FUZZY_WORDS), repeats=1, runs=1
+        )
+        bench(
+            'candidate generation + __contains__ (%d)' % max_distance,
+            timeit.Timer(
+                "for word in FUZZY_WORDS: candidate_keys(data, word, %d, ALPHABET)" % max_distance,
+                setup
+            ),
+            ' ops/sec', op_count=len(FUZZY_WORDS), repeats=1, runs=1
+        )
+
+def similar():
+    print('\n====== Similar keys (replaces: е -> ё, 100k words) =======\n')
+    setup = """
+from __main__ import WORDS100k, load_record_dawg
+data = load_record_dawg()
+replaces = data.compile_replaces({'е': 'ё'})
+"""
+    for meth in ['similar_item_values', 'similar_items', 'similar_keys']:
+        bench(
+            'RecordDAWG.%s()' % meth,
+            timeit.Timer("for word in WORDS100k: data.%s(word, replaces)" % meth, setup),
+            'M ops/sec', op_count=0.1, repeats=1, runs=3
+        )
+
+def similar_prediction():
+    print('\n====== Similar keys (prediction data, %dk words) =======\n' % (len(PREDICTION_WORDS) // 1000))
+    rule_sets = [
+        ('Е -> Ё', {'Е': 'Ё'}),
+        ('ЕРЕ->ЕРЁ, ЗЕ<->ЗЁ', {'ЕРЕ': 'ЕРЁ', 'ЗЕ': 'ЗЁ', 'ЗЁ': 'ЗЕ', 'Е': 'Ё'}),
+        ('ß <-> ss', {'ß': 'ss', 'ss': 'ß'}),
+    ]
+    for rules_name, rules in rule_sets:
+        setup = """
+from __main__ import PREDICTION_WORDS, load_prediction_dawg, load_prediction_record_dawg
+dawg = load_prediction_dawg()
+record_dawg = load_prediction_record_dawg()
+replaces = dawg.compile_replaces(%r)
+""" % rules
+        for data, meth in [('dawg', 'similar_keys'), ('record_dawg', 'similar_items'),
+                           ('record_dawg', 'similar_item_values')]:
+            bench(
+                '%s.%s() (%s)' % ('DAWG' if data == 'dawg' else 'RecordDAWG', meth, rules_name),
+                timeit.Timer("for word in PREDICTION_WORDS: %s.%s(word, replaces)" % (data, meth), setup),
+                'K ops/sec', op_count=len(PREDICTION_WORDS) / 1000, repeats=1, runs=3
+            )
+
+def memory_usage():
+    print('\n====== Dictionary memory usage =======\n')
+    for name, load in [('BytesDAWG', load_bytes_dawg), ('IntDAWG', load_int_dawg)]:
+        dct = load().dct
+        decoded = dawg_python.wrapper.DecodedDictionary(dct)
+        format_result(name, "%0.2fMB" % (dct.nbytes() / 2**20))
+        format_result(
+            name + " (decoded)",
+            "%0.2fMB (+%0.2fMB)" % (decoded.nbytes() / 2**20, (decoded.nbytes() - dct.nbytes()) / 2**20)
+        )
+
 def benchmark():
     print('\n====== Benchmarks (100k unique unicode words) =======\n')
 
@@ -79,13 +330,22 @@ def benchmark():
         ('get() (misses)', "for word in NON_WORDS_10k: data.get(word)", 'M ops/sec', 0.01, 5),
         ('__contains__ (hits)', "for word in WORDS100k: word in data", 'M ops/sec', 0.1, 3),
         ('__contains__ (misses)', "for word in NON_WORDS100k: word in data", 'M ops/sec', 0.1, 3),
+        ('get_many() (hits)', "data.get_many(WORDS100k)", 'M ops/sec', 0.1, 3),
+        ('get_many() (misses)', "data.get_many(NON_WORDS_10k)", 'M ops/sec', 0.01, 5),
+        ('contains_many() (hits)', "data.contains_many(WORDS100k)", 'M ops/sec', 0.1, 3),
+        ('contains_many() (misses)', "data.contains_many(NON_WORDS100k)", 'M ops/sec', 0.1, 3),
+        ('filter_known() (mixed)', "list(data.filter_known(MIXED_WORDS100k))", 'M ops/sec', 0.1, 3),
+        ('get_many_array() (hits)', "data.get_many_array(WORDS100k)", 'M ops/sec', 0.1, 3),
+        ('get_many_array() (misses)', "data.get_many_array(NON_WORDS100k)", 'M ops/sec', 0.1, 3),
         ('items()', 'list(data.items())', ' ops/sec', 1, 1),
         ('keys()', 'list(data.keys())', ' ops/sec', 1, 1),
-#        ('values()', 'list(data.values())', ' ops/sec', 1, 1),
+        ('values()', 'list(data.values())', ' ops/sec', 1, 1),
     ]
 
     common_setup = """
 from __main__ import load_dawg, load_bytes_dawg, load_record_dawg, load_int_dawg
+from __main__ import load_bytes_dawg_decoded, load_int_dawg_decoded
+from __main__ import load_bytes_dawg_jump_table
 from __main__ import WORDS100k, NON_WORDS100k, MIXED_WORDS100k
 from __main__ import PREFIXES_3_1k, PREFIXES_5_1k, PREFIXES_8_1k, PREFIXES_15_1k
 NON_WORDS_10k = NON_WORDS100k[:10000]
@@ -96,6 +356,9 @@ NON_WORDS_1k = ['ыва', 'xyz', 'соы', 'Axx', 'avы']*200
     bytes_dawg_setup = common_setup + 'data = load_bytes_dawg();'
     record_dawg_setup = common_setup + 'data = load_record_dawg();'
     int_dawg_setup = common_setup + 'data = load_int_dawg();'
+    bytes_dawg_decoded_setup = common_setup + 'data = load_bytes_dawg_decoded();'
+    int_dawg_decoded_setup = common_setup + 'data = load_int_dawg_decoded();'
+    bytes_dawg_jump_table_setup = common_setup + 'data = load_bytes_dawg_jump_table();'
 
     structures = [
         ('dict', dict_setup),
@@ -103,6 +366,9 @@ NON_WORDS_1k = ['ыва', 'xyz', 'соы', 'Axx', 'avы']*200
         ('BytesDAWG', bytes_dawg_setup),
         ('RecordDAWG', record_dawg_setup),
         ('IntDAWG', int_dawg_setup),
+        ('BytesDAWG (decoded)', bytes_dawg_decoded_setup),
+        ('IntDAWG (decoded)', int_dawg_decoded_setup),
+        ('BytesDAWG (jump_depth=3)', bytes_dawg_jump_table_setup),
     ]
     for test_name, test, descr, op_count, repeats in tests:
         for name, setup in structures:
@@ -119,7 +385,7 @@ NON_WORDS_1k = ['ыва', 'xyz', 'соы', 'Axx', 'avы']*200
             ('misses', 'NON_WORDS100k'),
         ]
 
-        for meth in ['prefixes']:
+        for meth in ['prefixes', 'prefix_items', 'longest_prefix']:
             for name, data in _bench_data:
                 bench(
                     '%s.%s (%s)' % (struct_name, meth, name),
@@ -151,6 +417,40 @@ NON_WORDS_1k = ['ыва', 'xyz', 'соы', 'Axx', 'avы']*200
                     runs=3
                 )
 
+            bench(
+                '%s.count(prefix="%s"), %s' % (struct_name, xxx, avg),
+                timeit.Timer(
+                    "for word in %s: data.count(word)" % data,
+                    setup + 'data.count();'
+                ),
+                'K ops/sec',
+                op_count=1,
+                runs=3
+            )
+
+            bench(
+                '%s len(keys(prefix="%s")), %s' % (struct_name, xxx, avg),
+                timeit.Timer(
+                    "for word in %s: len(data.keys(word))" % data,
+                    setup
+                ),
+                'K ops/sec',
+                op_count=1,
+                runs=3
+            )
+
+            for meth in ['keys_page', 'items_page']:
+                bench(
+                    '%s.%s(prefix="%s", limit=10), %s' % (struct_name, meth, xxx, avg),
+                    timeit.Timer(
+                        "for word in %s: data.%s(word, limit=10)" % (data, meth),
+                        setup
+                    ),
+                    'K ops/sec',
+                    op_count=1,
+                    runs=3
+                )
+
             for meth in ['iterkeys', 'iteritems']:
                 bench(
                     '%s.%s(prefix="%s"), %s' % (struct_name, meth, xxx, avg),
@@ -164,6 +464,17 @@ NON_WORDS_1k = ['ыва', 'xyz', 'соы', 'Axx', 'avы']*200
                 )
 
 if __name__ == '__main__':
+    memory_usage()
+    jump_tables()
+    payload_modes()
+    record_arrays()
+    subtree_index()
+    top_k()
+    overlay()
+    fuzzy()
+    similar()
+    similar_prediction()
+    text_scan()
     benchmark()
     #profiling()
     print('\n~~~~~~~~~~~~~~\n')
\ No newline at end of file
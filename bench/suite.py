@@ -0,0 +1,551 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite: throughput of public methods of all DAWG classes,
+load time and memory usage, JSON output and comparison with a baseline.
+
+Run from the repository root::
+
+    python -m bench.suite --json results.json
+    python -m bench.suite --baseline results.json
+    python -m bench.suite --dataset synthetic:1000000 --cls RecordDAWG
+
+Datasets are ``words100k`` (dev_data/words100k.txt.zip) and
+``synthetic:N`` (about N keys: words100k words with numeric suffixes,
+see ``utils.generate_keys``). DAWGs for synthetic datasets are built
+with ``dawg_python.builder`` (it takes a while for millions of keys)
+and cached in ``--cache-dir``.
+
+Throughput is the best of ``--repeats`` measurements (a measurement
+repeats a case for at least ``MIN_TIME`` seconds); ``alloc_peak`` is the
+peak of memory allocated during an extra run (traced with
+``tracemalloc``). Loads run in separate processes: ``rss`` is
+the growth of the resident set size (Linux only).
+
+With ``--baseline`` results are compared with a previous JSON file;
+the exit status is 1 if any result is slower (or uses more memory)
+than the baseline by more than ``--threshold``.
+"""
+from __future__ import absolute_import, unicode_literals, division
+import io
+import os
+import sys
+import json
+import time
+import random
+import string
+import struct
+import argparse
+import platform
+import tempfile
+import itertools
+import subprocess
+import tracemalloc
+from binascii import b2a_base64
+
+import dawg_python
+from dawg_python import builder
+from dawg_python.dawgs import new_dawg
+
+from .utils import data_path, words100k, generate_keys, current_rss
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CLASS_SPECS = [
+    ('DAWG', 'DAWG'),
+    ('CompletionDAWG', 'CompletionDAWG'),
+    ('BytesDAWG', 'BytesDAWG'),
+    ('RecordDAWG', 'RecordDAWG:<H'),
+    ('IntDAWG', 'IntDAWG'),
+    ('IntCompletionDAWG', 'IntCompletionDAWG'),
+]
+
+# dev_data files with the same data as DAWGs built by dawg_path
+DEV_DATA_FILES = {
+    'DAWG': 'dawg.dawg',
+    'BytesDAWG': 'bytes_dawg.dawg',
+    'RecordDAWG': 'record_dawg.dawg',
+    'IntDAWG': 'int_dawg.dawg',
+    'IntCompletionDAWG': 'int_completion_dawg.dawg',
+}
+
+LOAD_MODES = [
+    ('read', {}),
+    ('mmap', {'mmap': True}),
+    ('decoded', {'decoded': True}),
+    ('jump_depth=3', {'jump_depth': 3}),
+    ('lazy_guide', {'lazy_guide': True}),
+    ('frombytes', None),
+]
+
+ALPHABET = 'абвгдеёжзиклмнопрстуфхцчъыьэюя%s' % string.ascii_letters
+REPLACES = dawg_python.DAWG.compile_replaces({'е': 'ё'})
+
+# query list sizes; short prefixes have hundreds of completions
+NUM_LOOKUPS = 10000
+NUM_PREFIXES = 1000
+NUM_SHORT_PREFIXES = 100
+NUM_FUZZY = 20
+NUM_TEXT_WORDS = 500
+
+MIN_TIME = 0.2
+
+
+def format_result(key, value):
+    print("%55s:    %s" % (key, value))
+
+
+class Dataset(object):
+    """
+    Keys of a dataset (which are never held in memory for synthetic
+    datasets) and query sets made of a sample of them.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        if name == 'words100k':
+            self.num_keys = len(set(words100k()))
+        elif name.startswith('synthetic:'):
+            self.num_keys = int(name.partition(':')[2])
+        else:
+            raise ValueError("Unknown dataset: %s" % name)
+        self._queries = None
+
+    def keys(self):
+        "Returns an iterable of keys and whether they are sorted."
+        if self.name == 'words100k':
+            return words100k(), False
+        return generate_keys(self.num_keys, True), True
+
+    def queries(self):
+        "Returns a dict of query lists."
+        if self._queries is None:
+            self._queries = self._make_queries()
+        return self._queries
+
+    def _make_queries(self):
+        rnd = random.Random(0)
+        keys, _ = self.keys()
+        step = max(1, self.num_keys // NUM_LOOKUPS)
+        hits = list(itertools.islice(keys, 0, None, step))[:NUM_LOOKUPS]
+        rnd.shuffle(hits)
+        long_keys = [key for key in hits if len(key) >= 8]
+
+        return {
+            'hits': hits,
+            'b_hits': [key.encode('utf8') for key in hits],
+            'misses': [
+                "".join(rnd.choice(ALPHABET) for x in range(rnd.randint(1, 15)))
+                for y in range(NUM_LOOKUPS)
+            ],
+            'mixed': [key[:3] for key in hits],
+            'short prefix': [key[:3] for key in hits[:NUM_SHORT_PREFIXES]],
+            'long prefix': [key[:8] for key in long_keys[:NUM_PREFIXES]],
+            'missing prefix': ['%sxz' % key[:1] for key in hits[:NUM_PREFIXES]],
+            'fuzzy': hits[:NUM_FUZZY],
+            'text': [' '.join(hits[:NUM_TEXT_WORDS])],
+            'payloads': [b2a_base64(struct.pack(str('<H'), len(key))) for key in hits],
+        }
+
+
+def class_data(cls_name, keys):
+    "Returns data for ``builder.build``; values depend on key lengths."
+    if cls_name in ('DAWG', 'CompletionDAWG'):
+        return keys
+    if cls_name == 'BytesDAWG':
+        return ((key, struct.pack(str('<H'), len(key))) for key in keys)
+    if cls_name == 'RecordDAWG':
+        return ((key, (len(key),)) for key in keys)
+    return ((key, len(key)) for key in keys)
+
+
+def dawg_path(dataset, cls_name, cls_spec, cache_dir):
+    "Returns a path to the DAWG file for a dataset, building it if needed."
+    if dataset.name == 'words100k' and cls_name in DEV_DATA_FILES:
+        return data_path('large', DEV_DATA_FILES[cls_name])
+
+    path = os.path.join(cache_dir, '%s-%s.dawg' % (dataset.name.replace(':', '-'), cls_name))
+    if not os.path.exists(path):
+        keys, is_sorted = dataset.keys()
+        start = time.time()
+        d = builder.build(new_dawg(cls_spec), class_data(cls_name, keys), input_is_sorted=is_sorted)
+        with open(path + '.tmp', 'wb') as f:
+            d.write(f)
+        os.rename(path + '.tmp', path)
+        format_result('built %s' % os.path.basename(path), '%0.1fs' % (time.time() - start))
+    return path
+
+
+class Case(object):
+    """
+    A benchmark of ``method``: ``run(dawg, queries)`` is timed.
+    ``queries`` is a name of a query list of the dataset or a function
+    which returns the query list for a DAWG. ``ops`` is the number of
+    operations in a run: a call for each query (``per_query``) or
+    a single call.
+    """
+
+    def __init__(self, method, variant, queries, run, per_query=True, prepare=None):
+        self.method = method
+        self.variant = variant
+        self.queries = queries
+        self.run = run
+        self.per_query = per_query
+        self.prepare = prepare
+
+
+def each(call):
+    "Returns a case function which calls ``call(dawg, query)`` for each query."
+    def run(d, queries):
+        for query in queries:
+            call(d, query)
+    return run
+
+
+def whole(call):
+    "Returns a case function which calls ``call(dawg)`` once."
+    def run(d, queries):
+        call(d)
+    return run
+
+
+def _cases():
+    cases = []
+    for variant in ['hits', 'misses', 'mixed']:
+        cases += [
+            Case('__contains__', variant, variant, each(lambda d, key: key in d)),
+            Case('get', variant, variant, each(lambda d, key: d.get(key))),
+            Case('prefixes', variant, variant, each(lambda d, key: d.prefixes(key))),
+        ]
+    for variant in ['hits', 'misses']:
+        cases += [
+            Case('get_many', variant, variant, lambda d, keys: d.get_many(keys)),
+            Case('get_many_array', variant, variant, lambda d, keys: d.get_many_array(keys)),
+            Case('contains_many', variant, variant, lambda d, keys: d.contains_many(keys)),
+        ]
+    for variant in ['hits', 'mixed']:
+        cases += [
+            Case(meth, variant, variant, each(lambda d, key, meth=meth: getattr(d, meth)(key)))
+            for meth in ['prefix_items', 'prefix_values', 'longest_prefix']
+        ]
+    cases += [
+        Case('__getitem__', 'hits', 'hits', each(lambda d, key: d[key])),
+        Case('b_get_value', 'hits', 'b_hits', each(lambda d, key: d.b_get_value(key))),
+        Case('filter_known', 'mixed', 'mixed', lambda d, keys: list(d.filter_known(keys))),
+        Case('decode_payload', 'hits', 'payloads', each(lambda d, raw: d.decode_payload(raw))),
+    ]
+
+    for variant in ['short prefix', 'long prefix', 'missing prefix']:
+        cases += [
+            Case(meth, variant, variant, each(lambda d, prefix, meth=meth: getattr(d, meth)(prefix)))
+            for meth in ['keys', 'items', 'values']
+        ]
+        cases += [
+            Case(meth, variant, variant, each(lambda d, prefix, meth=meth: list(getattr(d, meth)(prefix))))
+            for meth in ['iterkeys', 'iteritems', 'itervalues']
+        ]
+        cases += [
+            Case(meth, variant + ', limit=10', variant,
+                 each(lambda d, prefix, meth=meth: getattr(d, meth)(prefix, limit=10)))
+            for meth in ['keys_page', 'items_page']
+        ]
+        cases += [
+            Case('count', variant, variant, each(lambda d, prefix: d.count(prefix)),
+                 prepare=lambda d: d.count()),
+            Case('sum_values', variant, variant, each(lambda d, prefix: d.sum_values(prefix)),
+                 prepare=lambda d: d.sum_values()),
+            Case('top_k', variant + ', k=10', variant, each(lambda d, prefix: d.top_k(prefix, 10)),
+                 prepare=lambda d: d.top_k()),
+        ]
+
+    cases += [
+        Case(meth, 'е -> ё', 'hits', each(lambda d, key, meth=meth: getattr(d, meth)(key, REPLACES)))
+        for meth in ['similar_keys', 'similar_items', 'similar_item_values']
+    ]
+    cases += [
+        Case(meth, 'max_distance=1', 'fuzzy', each(lambda d, key, meth=meth: getattr(d, meth)(key, 1)))
+        for meth in ['fuzzy_keys', 'fuzzy_items']
+    ]
+    cases += [
+        Case('find_all', 'text', 'text', each(lambda d, text: d.find_all(text))),
+        Case('iter_matches', 'text', 'text', each(lambda d, text: list(d.iter_matches(text)))),
+        Case('keys', 'all', 'hits', whole(lambda d: d.keys()), per_query=False),
+        Case('items', 'all', 'hits', whole(lambda d: d.items()), per_query=False),
+        Case('values', 'all', 'hits', whole(lambda d: d.values()), per_query=False),
+        Case('items_array', 'all', 'hits', whole(lambda d: d.items_array()), per_query=False),
+        Case('dtype', 'all', 'hits', whole(lambda d: d.dtype()), per_query=False),
+        Case('compile_replaces', 'е -> ё', 'hits',
+             whole(lambda d: d.compile_replaces({'е': 'ё'})), per_query=False),
+        Case('tobytes', 'all', 'hits', whole(lambda d: d.tobytes()), per_query=False),
+        Case('write', 'BytesIO', 'hits', whole(lambda d: d.write(io.BytesIO())), per_query=False),
+        Case('frombytes', 'all', lambda d: [d.tobytes()],
+             each(lambda d, data: d.__class__(*d._init_args()).frombytes(data))),
+    ]
+    return cases
+
+
+CASES = _cases()
+
+# methods which are benchmarked by loads or which are not worth timing
+LOAD_METHODS = ['load', 'read', 'close']
+
+
+def run_case(case, d, queries, repeats):
+    "Returns a result dict for a case."
+    if case.prepare is not None:
+        case.prepare(d)
+
+    # short cases are repeated, so that timer noise matters less
+    number = 1
+    elapsed = _timed(case, d, queries, number)
+    if elapsed < MIN_TIME:
+        number = int(MIN_TIME / max(elapsed, 1e-6)) + 1
+    times = [_timed(case, d, queries, number) / number for x in range(repeats)]
+
+    tracemalloc.start()
+    try:
+        start_size = tracemalloc.get_traced_memory()[0]
+        case.run(d, queries)
+        alloc_peak = tracemalloc.get_traced_memory()[1] - start_size
+    finally:
+        tracemalloc.stop()
+
+    ops = len(queries) if case.per_query else 1
+    times.sort()
+    return {
+        'ops': ops,
+        'seconds': times[0],
+        'median_seconds': times[len(times) // 2],
+        'ops_per_sec': ops / times[0] if times[0] else None,
+        'alloc_peak': alloc_peak,
+    }
+
+
+def _timed(case, d, queries, number):
+    start = time.perf_counter()
+    for x in range(number):
+        case.run(d, queries)
+    return time.perf_counter() - start
+
+
+def load_case(path, cls_spec, mode):
+    "Loads a DAWG in this process and prints a JSON result."
+    options = dict(LOAD_MODES)[mode]
+
+    def load():
+        d = new_dawg(cls_spec)
+        if options is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            return d.frombytes(data)
+        return d.load(path, **options)
+
+    rss_before = current_rss()
+    start = time.perf_counter()
+    d = load()
+    elapsed = time.perf_counter() - start
+    rss = current_rss() - rss_before
+    d.close()
+    del d
+
+    tracemalloc.start()
+    d = load()
+    alloc_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(json.dumps({
+        'ops': 1, 'seconds': elapsed, 'ops_per_sec': 1 / elapsed,
+        'rss': rss, 'alloc_peak': alloc_peak,
+    }))
+
+
+def run_loads(dataset, cls_name, cls_spec, path):
+    res = []
+    for mode, options in LOAD_MODES:
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'bench.suite', '--load-case', path, cls_spec, mode],
+            cwd=ROOT_DIR
+        ).decode('ascii')
+        result = json.loads(output)
+        result.update(dataset=dataset.name, cls=cls_name, method='load', variant=mode)
+        result['name'] = '%s %s.load (%s)' % (dataset.name, cls_name, mode)
+        format_result(
+            '%s.load (%s)' % (cls_name, mode),
+            '%0.1fms, RSS +%0.2fMB, allocated %0.2fMB' % (
+                result['seconds'] * 1000, result['rss'] / 2 ** 20, result['alloc_peak'] / 2 ** 20
+            )
+        )
+        res.append(result)
+    return res
+
+
+def run_queries(dataset, cls_name, d, repeats, name_filter):
+    res = []
+    for case in CASES:
+        if not hasattr(d, case.method):
+            continue
+        name = '%s %s.%s (%s)' % (dataset.name, cls_name, case.method, case.variant)
+        if name_filter and name_filter not in name:
+            continue
+
+        if callable(case.queries):
+            queries = case.queries(d)
+        else:
+            queries = dataset.queries()[case.queries]
+        try:
+            result = run_case(case, d, queries, repeats)
+        except ImportError:
+            format_result('%s.%s (%s)' % (cls_name, case.method, case.variant), 'not supported (NumPy is missing)')
+            continue
+
+        result.update(name=name, dataset=dataset.name, cls=cls_name,
+                      method=case.method, variant=case.variant)
+        format_result(
+            '%s.%s (%s)' % (cls_name, case.method, case.variant),
+            '%s, allocated %0.1fKB' % (_format_ops(result['ops_per_sec']), result['alloc_peak'] / 1024)
+        )
+        res.append(result)
+    return res
+
+
+def uncovered_methods(cls_names):
+    "Returns a list of public methods of DAWG classes without benchmarks."
+    covered = set(case.method for case in CASES) | set(LOAD_METHODS)
+    res = set()
+    for cls_name in cls_names:
+        cls = getattr(dawg_python, cls_name)
+        res.update(
+            '%s.%s' % (cls_name, name) for name in dir(cls)
+            if not name.startswith('_') and callable(getattr(cls, name)) and name not in covered
+        )
+    return sorted(res)
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results with baseline results (matched by name). Returns
+    a list of ``(name, metric, old, new)`` tuples for regressions and
+    a list of them for improvements; throughput is compared by
+    ``ops_per_sec``, memory usage by ``alloc_peak`` and ``rss``
+    (differences under 64KB are ignored).
+    """
+    old_results = dict((result['name'], result) for result in baseline['results'])
+    regressions, improvements = [], []
+
+    for result in results:
+        old = old_results.get(result['name'])
+        if old is None:
+            continue
+        for metric in ['ops_per_sec', 'alloc_peak', 'rss']:
+            old_value, new_value = old.get(metric), result.get(metric)
+            if not old_value or new_value is None:
+                continue
+            if metric != 'ops_per_sec' and abs(new_value - old_value) < 64 * 1024:
+                continue
+
+            change = (result['name'], metric, old_value, new_value)
+            if metric == 'ops_per_sec':
+                worse = new_value < old_value * (1 - threshold)
+                better = new_value > old_value * (1 + threshold)
+            else:
+                worse = new_value > old_value * (1 + threshold)
+                better = new_value < old_value * (1 - threshold)
+            if worse:
+                regressions.append(change)
+            elif better:
+                improvements.append(change)
+    return regressions, improvements
+
+
+def print_changes(title, changes):
+    print('\n====== %s: %d =======\n' % (title, len(changes)))
+    for name, metric, old, new in changes:
+        format_result(name, '%s: %s -> %s (%+0.0f%%)' % (metric, _format(old), _format(new), (new / old - 1) * 100))
+
+
+def _format_ops(ops_per_sec):
+    if ops_per_sec >= 10 ** 6:
+        return '%0.2fM ops/sec' % (ops_per_sec / 10 ** 6)
+    if ops_per_sec >= 10 ** 3:
+        return '%0.1fK ops/sec' % (ops_per_sec / 10 ** 3)
+    return '%0.2f ops/sec' % ops_per_sec
+
+
+def _format(value):
+    if isinstance(value, float):
+        return '%0.1f' % value
+    return '%d' % value
+
+
+def metadata():
+    try:
+        revision = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.STDOUT
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'python': '%s %s' % (platform.python_implementation(), platform.python_version()),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': revision,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DAWG-Python benchmark suite")
+    parser.add_argument('--dataset', action='append', metavar='NAME',
+                        help="words100k (default) or synthetic:NUM_KEYS; may be repeated")
+    parser.add_argument('--cls', action='append', metavar='CLASS', choices=[name for name, spec in CLASS_SPECS],
+                        help="DAWG class to benchmark (default: all); may be repeated")
+    parser.add_argument('--filter', metavar='SUBSTRING', help="run only benchmarks with names containing it")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--no-loads', action='store_true', help="don't benchmark loading")
+    parser.add_argument('--json', metavar='PATH', help="write results to a JSON file")
+    parser.add_argument('--baseline', metavar='PATH', help="compare results with a JSON file")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative change reported as a regression (default: 0.2)")
+    parser.add_argument('--cache-dir', default=os.path.join(tempfile.gettempdir(), 'dawg_python_bench'),
+                        help="directory for built DAWGs")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.cache_dir):
+        os.makedirs(args.cache_dir)
+    cls_names = args.cls or [name for name, spec in CLASS_SPECS]
+
+    results = []
+    for dataset in [Dataset(name) for name in args.dataset or ['words100k']]:
+        for cls_name, cls_spec in CLASS_SPECS:
+            if cls_name not in cls_names:
+                continue
+            print('\n====== %s, %s (%d keys) =======\n' % (cls_name, dataset.name, dataset.num_keys))
+            path = dawg_path(dataset, cls_name, cls_spec, args.cache_dir)
+            if not args.no_loads and not args.filter:
+                results += run_loads(dataset, cls_name, cls_spec, path)
+            with new_dawg(cls_spec).load(path) as d:
+                results += run_queries(dataset, cls_name, d, args.repeats, args.filter)
+
+    uncovered = uncovered_methods(cls_names)
+    if uncovered:
+        print('\nNot benchmarked: %s' % ', '.join(uncovered))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'metadata': metadata(), 'results': results}, f, indent=1, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions, improvements = compare(results, baseline, args.threshold)
+        print_changes('Improvements', improvements)
+        print_changes('Regressions', regressions)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--load-case']:
+        load_case(*sys.argv[2:5])
+    else:
+        sys.exit(main())
@@ -20,3 +20,34 @@ def words100k():
     zf = zipfile.ZipFile(zip_name)
     txt = zf.open(zf.namelist()[0]).read().decode('utf8')
     return txt.splitlines()
+
+def generate_keys(num_keys, input_is_sorted):
+    """
+    Yields about ``num_keys`` unique keys: words with " <number>" suffixes;
+    keys are sorted if ``input_is_sorted`` is True.
+    """
+    words = sorted(set(words100k()))
+    per_word = -(-num_keys // len(words))
+    # the same keys in both cases
+    words = words[:num_keys // per_word]
+    step = 10 ** 7 // per_word
+
+    def suffix(word_id, pos):
+        # increasing in pos; pseudo-random otherwise
+        return pos * step + (word_id * 2654435761 + pos * 40503) % step
+
+    if input_is_sorted:
+        ids = ((word_id, pos) for word_id in range(len(words)) for pos in range(per_word))
+    else:
+        ids = ((word_id, pos) for pos in range(per_word) for word_id in range(len(words)))
+
+    for word_id, pos in ids:
+        # ' ' sorts before any char of the words
+        yield "%s %07d" % (words[word_id], suffix(word_id, pos))
+
+def current_rss():
+    """
+    Returns the resident set size of this process in bytes (Linux only)
+    """
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf(str('SC_PAGE_SIZE'))
@@ -0,0 +1,610 @@
+# -*- coding: utf-8 -*-
+"""
+Pure-python DAWG builder. Files are byte-for-byte identical to files
+built by `dawgdic`_ C++ library (and `DAWG`_ python package) from
+the same data::
+
+    import dawg_python
+    from dawg_python import builder
+
+    d = builder.build(dawg_python.RecordDAWG('<H'), data)
+    with open('words.dawg', 'wb') as f:
+        d.write(f)
+
+Keys are consumed as a stream and the DAWG is minimized incrementally,
+so only the minimized DAWG is kept in memory. Unsorted input is sorted
+with ``external_sort`` which spills sorted chunks to temporary files.
+
+.. _dawgdic: https://code.google.com/p/dawgdic/
+.. _DAWG: https://github.com/kmike/DAWG
+"""
+from __future__ import absolute_import, unicode_literals
+import array
+import heapq
+import struct
+import tempfile
+
+from . import wrapper, units
+from .dawgs import CompletionDAWG
+
+DEFAULT_CHUNK_SIZE = 1000000
+MAX_VALUE = 0x7FFFFFFF
+
+_INITIAL_HASH_TABLE_SIZE = 1 << 8
+_MASK = 0xFFFFFFFF
+
+# DawgBuilder unit fields
+_CHILD, _SIBLING, _LABEL, _IS_STATE, _HAS_SIBLING = range(5)
+
+_BLOCK_SIZE = 256
+_NUM_OF_UNFIXED_BLOCKS = 16
+_UNFIXED_SIZE = _BLOCK_SIZE * _NUM_OF_UNFIXED_BLOCKS
+_RING_MASK = _UNFIXED_SIZE - 1
+_UPPER_MASK = ~(units.OFFSET_MAX - 1) & _MASK
+_LOWER_MASK = 0xFF
+
+_RECORD = struct.Struct(str("<Iq"))
+
+
+def _hash(key):
+    # 32-bit mix function used by dawgdic
+    key = (~key + (key << 15)) & _MASK
+    key ^= key >> 12
+    key = (key + (key << 2)) & _MASK
+    key ^= key >> 4
+    key = (key * 2057) & _MASK
+    return key ^ (key >> 16)
+
+
+def _unit_base(unit):
+    if unit[_LABEL] == 0:
+        return ((unit[_CHILD] << 1) | unit[_HAS_SIBLING]) & _MASK
+    return ((unit[_CHILD] << 2) | (unit[_IS_STATE] << 1) | unit[_HAS_SIBLING]) & _MASK
+
+
+class Dawg(object):
+    """
+    Minimized DAWG (a result of ``DawgBuilder.finish``). Transitions
+    from a state are stored next to each other, in order of labels.
+    """
+
+    ROOT = 0
+
+    def __init__(self, bases, labels, flags, num_of_states):
+        self._bases = bases
+        self._labels = labels
+        self._flags = flags
+        self.num_of_states = num_of_states
+
+    def size(self):
+        "Returns the number of transitions (including the root)."
+        return len(self._bases)
+
+    def child(self, index):
+        return self._bases[index] >> 2
+
+    def sibling(self, index):
+        return index + 1 if self._bases[index] & 1 else 0
+
+    def value(self, index):
+        return self._bases[index] >> 1
+
+    def label(self, index):
+        return self._labels[index]
+
+    def is_leaf(self, index):
+        return self._labels[index] == 0
+
+    def is_merging(self, index):
+        return self._flags[index] == 1
+
+    def children(self, index):
+        "Yields indices of all transitions from a state of ``index``."
+        index = self.child(index)
+        while index:
+            yield index
+            index = self.sibling(index)
+
+
+class DawgBuilder(object):
+    """
+    Builds a minimized DAWG from keys inserted in sorted order
+    (a port of dawgdic ``DawgBuilder``).
+
+    Keys which are inserted but not yet minimized are kept as linked
+    units (lists); units of a key are minimized when a key with
+    a different prefix is inserted.
+    """
+
+    def __init__(self):
+        self._bases = array.array(str("I"))
+        self._labels = bytearray()
+        self._flags = bytearray()
+        self._hash_table = array.array(str("I"))
+        self._root = None
+        self._unfixed = []
+        self.num_of_states = 1
+        self.num_of_merged_transitions = 0
+        self.num_of_merging_states = 0
+
+    def _init(self):
+        self._hash_table = array.array(str("I"), [0]) * _INITIAL_HASH_TABLE_SIZE
+        self._root = [0, None, 0xFF, False, False]
+        self._bases.append(0)
+        self._labels.append(0)
+        self._flags.append(0)
+        self._unfixed.append(self._root)
+
+    def insert(self, key, value=0):
+        """
+        Inserts a key (bytes) with a value. Keys must be inserted
+        in sorted order; a value of a duplicate key replaces
+        the previous value.
+        """
+        if not key or b'\x00' in key:
+            raise ValueError("Can't insert key %r: keys must be non-empty and must not contain zero bytes" % (key,))
+        if not 0 <= value <= MAX_VALUE:
+            raise ValueError("Can't insert key %r: value %r is out of range [0, %d]" % (key, value, MAX_VALUE))
+        if self._root is None:
+            self._init()
+
+        key = bytearray(key)
+        key.append(0)
+        unit = self._root
+        length = len(key)
+        pos = 0
+
+        # finds a separate unit
+        while pos < length:
+            child = unit[_CHILD]
+            if not child:
+                break
+            key_label = key[pos]
+            unit_label = child[_LABEL]
+            if key_label < unit_label:
+                raise ValueError("Can't insert key %r: keys must be sorted" % (bytes(key[:-1]),))
+            if key_label > unit_label:
+                child[_HAS_SIBLING] = True
+                self._fix_units(child)
+                break
+            unit = child
+            pos += 1
+
+        # adds new units
+        unfixed = self._unfixed
+        for pos in range(pos, length):
+            child = unit[_CHILD]
+            new_unit = [0, child or None, key[pos], not child, False]
+            unit[_CHILD] = new_unit
+            unfixed.append(new_unit)
+            unit = new_unit
+
+        unit[_CHILD] = value
+
+    def finish(self):
+        "Minimizes the remaining units and returns a ``Dawg``."
+        if self._root is None:
+            self._init()
+        self._fix_units(self._root)
+        self._bases[0] = _unit_base(self._root)
+        self._labels[0] = self._root[_LABEL]
+
+        res = Dawg(self._bases, self._labels, self._flags, self.num_of_states)
+        self.__init__()
+        return res
+
+    def _fix_units(self, unit):
+        # replaces units which are above ``unit`` in the stack of
+        # unfixed units with equivalent transitions, reusing
+        # equivalent transitions which are already fixed
+        unfixed = self._unfixed
+        bases, labels, flags = self._bases, self._labels, self._flags
+        table = self._hash_table
+        table_size = len(table)
+
+        while unfixed[-1] is not unit:
+            unfixed_unit = unfixed.pop()
+
+            if self.num_of_states >= table_size - (table_size >> 2):
+                self._expand_hash_table()
+                table = self._hash_table
+                table_size = len(table)
+
+            chain = []
+            hash_value = 0
+            current = unfixed_unit
+            while current is not None:
+                child, current, label, is_state, has_sibling = current
+                if label:
+                    base = ((child << 2) | (is_state << 1) | has_sibling) & _MASK
+                else:
+                    base = ((child << 1) | has_sibling) & _MASK
+                chain.append((base, label))
+
+                # _hash((label << 24) ^ base), inlined
+                key = (label << 24) ^ base
+                key = (~key + (key << 15)) & _MASK
+                key ^= key >> 12
+                key = (key + (key << 2)) & _MASK
+                key ^= key >> 4
+                key = (key * 2057) & _MASK
+                hash_value ^= key ^ (key >> 16)
+            chain.reverse()
+
+            matched_index = 0
+            hash_id = hash_value % table_size
+            while True:
+                transition_index = table[hash_id]
+                if not transition_index:
+                    break
+                for pos, (base, label) in enumerate(chain, transition_index):
+                    if bases[pos] != base or labels[pos] != label:
+                        break
+                else:
+                    matched_index = transition_index
+                    break
+                hash_id = (hash_id + 1) % table_size
+
+            if matched_index:
+                self.num_of_merged_transitions += len(chain)
+                if not flags[matched_index]:
+                    self.num_of_merging_states += 1
+                    flags[matched_index] = 1
+            else:
+                matched_index = len(bases)
+                for base, label in chain:
+                    bases.append(base)
+                    labels.append(label)
+                flags.extend(bytes(len(chain)))
+                table[hash_id] = matched_index
+                self.num_of_states += 1
+
+            unfixed[-1][_CHILD] = matched_index
+
+        unfixed.pop()
+
+    def _expand_hash_table(self):
+        bases, labels = self._bases, self._labels
+        table_size = len(self._hash_table) << 1
+        table = array.array(str("I"), [0]) * table_size
+
+        for index in range(1, len(bases)):
+            if labels[index] != 0 and not bases[index] & 2:
+                continue
+            hash_value = 0
+            pos = index
+            while True:
+                base = bases[pos]
+                hash_value ^= _hash((labels[pos] << 24) ^ base)
+                if not base & 1:
+                    break
+                pos += 1
+            hash_id = hash_value % table_size
+            while table[hash_id]:
+                hash_id = (hash_id + 1) % table_size
+            table[hash_id] = index
+
+        self._hash_table = table
+
+
+class _DictionaryBuilder(object):
+    # A port of dawgdic ``DictionaryBuilder``. Only the last
+    # _NUM_OF_UNFIXED_BLOCKS blocks of units may be changed,
+    # so extra unit data is kept for them only, in ring buffers.
+
+    def __init__(self, dawg):
+        self.dawg = dawg
+        self.units = array.array(str("I"))
+        self.next = array.array(str("I"), [0]) * _UNFIXED_SIZE
+        self.prev = array.array(str("I"), [0]) * _UNFIXED_SIZE
+        self.is_fixed = bytearray(_UNFIXED_SIZE)
+        self.is_used = bytearray(_UNFIXED_SIZE)
+        self.links = {}
+        self.unfixed_index = 0
+        self.labels = []
+
+    def build(self):
+        self.reserve_unit(0)
+        self.is_used[0] = 1
+        self.set_offset(0, 1)
+        self.set_label(0, 0)
+
+        if self.dawg.size() > 1:
+            stack = [(self.dawg.ROOT, 0)]
+            while stack:
+                self.build_node(stack.pop(), stack)
+
+        self.fix_all_blocks()
+        dic = wrapper.Dictionary()
+        dic._units = self.units
+        return dic
+
+    def build_node(self, node, stack):
+        bases, labels = self.dawg._bases, self.dawg._labels
+        dawg_index, dic_index = node
+
+        dawg_child_index = bases[dawg_index] >> 2
+        is_merging = self.dawg._flags[dawg_child_index]
+        if is_merging:
+            offset = self.links.get(dawg_child_index, 0)
+            if offset:
+                offset ^= dic_index
+                if not offset & _UPPER_MASK or not offset & _LOWER_MASK:
+                    if not labels[dawg_child_index]:
+                        self.units[dic_index] |= units.HAS_LEAF_BIT
+                    self.set_offset(dic_index, offset)
+                    return
+
+        # transitions from a state are stored next to each other
+        end = dawg_child_index
+        while bases[end] & 1:
+            end += 1
+        children = range(dawg_child_index, end + 1)
+        self.labels = labels[dawg_child_index:end + 1]
+
+        offset = self.arrange_child_nodes(children, dic_index)
+        if is_merging:
+            self.links[dawg_child_index] = offset
+
+        # leaves have no children
+        for dawg_child_index, label in zip(reversed(children), reversed(self.labels)):
+            if label:
+                stack.append((dawg_child_index, offset ^ label))
+
+    def arrange_child_nodes(self, children, dic_index):
+        bases = self.dawg._bases
+        dic_units = self.units
+        offset = self.find_good_offset(dic_index)
+        self.set_offset(dic_index, dic_index ^ offset)
+
+        for dawg_child_index, label in zip(children, self.labels):
+            dic_child_index = offset ^ label
+            self.reserve_unit(dic_child_index)
+            if not label:
+                dic_units[dic_index] |= units.HAS_LEAF_BIT
+                dic_units[dic_child_index] = (bases[dawg_child_index] >> 1) | units.IS_LEAF_BIT
+            else:
+                dic_units[dic_child_index] = (dic_units[dic_child_index] & ~0xFF & _MASK) | label
+
+        self.is_used[offset & _RING_MASK] = 1
+        return offset
+
+    def find_good_offset(self, index):
+        num_of_units = len(self.units)
+        if self.unfixed_index >= num_of_units:
+            return num_of_units | (index & 0xFF)
+
+        # is_good_offset is inlined
+        first_label = self.labels[0]
+        other_labels = self.labels[1:]
+        next_, is_used, is_fixed = self.next, self.is_used, self.is_fixed
+        unfixed_index = self.unfixed_index
+        while True:
+            offset = unfixed_index ^ first_label
+            relative_offset = index ^ offset
+            if not is_used[offset & _RING_MASK] and not (relative_offset & _LOWER_MASK and relative_offset & _UPPER_MASK):
+                for label in other_labels:
+                    if is_fixed[(offset ^ label) & _RING_MASK]:
+                        break
+                else:
+                    return offset
+            unfixed_index = next_[unfixed_index & _RING_MASK]
+            if unfixed_index == self.unfixed_index:
+                break
+        return num_of_units | (index & 0xFF)
+
+    def reserve_unit(self, index):
+        if index >= len(self.units):
+            self.expand_dictionary()
+
+        pos = index & _RING_MASK
+        next_index, prev_index = self.next[pos], self.prev[pos]
+        if index == self.unfixed_index:
+            self.unfixed_index = next_index
+            if next_index == index:
+                self.unfixed_index = len(self.units)
+        self.next[prev_index & _RING_MASK] = next_index
+        self.prev[next_index & _RING_MASK] = prev_index
+        self.is_fixed[pos] = 1
+
+    def expand_dictionary(self):
+        src_num_of_units = len(self.units)
+        src_num_of_blocks = src_num_of_units // _BLOCK_SIZE
+        dest_num_of_units = src_num_of_units + _BLOCK_SIZE
+
+        if src_num_of_blocks + 1 > _NUM_OF_UNFIXED_BLOCKS:
+            self.fix_block(src_num_of_blocks - _NUM_OF_UNFIXED_BLOCKS)
+
+        self.units.extend([0] * _BLOCK_SIZE)
+
+        # the new block reuses extra units of the fixed block
+        start = src_num_of_units & _RING_MASK
+        end = start + _BLOCK_SIZE
+        next_, prev = self.next, self.prev
+        next_[start:end-1] = array.array(str("I"), range(src_num_of_units + 1, dest_num_of_units))
+        prev[start+1:end] = array.array(str("I"), range(src_num_of_units, dest_num_of_units - 1))
+        self.is_fixed[start:end] = bytearray(_BLOCK_SIZE)
+        self.is_used[start:end] = bytearray(_BLOCK_SIZE)
+
+        first, last = start, end - 1
+        unfixed = self.unfixed_index & _RING_MASK
+        prev[first] = dest_num_of_units - 1
+        next_[last] = src_num_of_units
+        prev[first] = prev[unfixed]
+        next_[last] = self.unfixed_index
+        next_[prev[unfixed] & _RING_MASK] = src_num_of_units
+        prev[unfixed] = dest_num_of_units - 1
+
+    def fix_all_blocks(self):
+        num_of_blocks = len(self.units) // _BLOCK_SIZE
+        begin = max(0, num_of_blocks - _NUM_OF_UNFIXED_BLOCKS)
+        for block_id in range(begin, num_of_blocks):
+            self.fix_block(block_id)
+
+    def fix_block(self, block_id):
+        begin = block_id * _BLOCK_SIZE
+        end = begin + _BLOCK_SIZE
+
+        unused_offset_for_label = 0
+        for offset in range(begin, end):
+            if not self.is_used[offset & _RING_MASK]:
+                unused_offset_for_label = offset
+                break
+
+        for index in range(begin, end):
+            if not self.is_fixed[index & _RING_MASK]:
+                self.reserve_unit(index)
+                self.set_label(index, (index ^ unused_offset_for_label) & 0xFF)
+
+    def set_label(self, index, label):
+        self.units[index] = (self.units[index] & ~0xFF & _MASK) | label
+
+    def set_offset(self, index, offset):
+        if offset >= units.OFFSET_MAX << 8:
+            raise ValueError("Can't build dictionary: DAWG is too large")
+        base = self.units[index] & (units.IS_LEAF_BIT | units.HAS_LEAF_BIT | 0xFF)
+        if offset < units.OFFSET_MAX:
+            base |= offset << 10
+        else:
+            base |= (offset << 2) | units.EXTENSION_BIT
+        self.units[index] = base
+
+
+def build_dictionary(dawg):
+    "Builds a ``wrapper.Dictionary`` for a ``Dawg``."
+    return _DictionaryBuilder(dawg).build()
+
+
+def build_guide(dawg, dic):
+    """
+    Builds a ``wrapper.Guide`` (completion data) for a ``Dawg``
+    and its dictionary.
+    """
+    guide = wrapper.Guide()
+    if dawg.size() <= 1:
+        return guide
+
+    guide_units = bytearray(dic.size() * 2)
+    is_fixed = bytearray(dic.size())
+    stack = [(dawg.ROOT, dic.ROOT)]
+
+    while stack:
+        dawg_index, dic_index = stack.pop()
+        if is_fixed[dic_index]:
+            continue
+        is_fixed[dic_index] = 1
+
+        children = [index for index in dawg.children(dawg_index) if not dawg.is_leaf(index)]
+        if not children:
+            continue
+        guide_units[dic_index*2] = dawg.label(children[0])
+
+        nodes = []
+        for pos, dawg_child_index in enumerate(children):
+            dic_child_index = dic.follow_char(dawg.label(dawg_child_index), dic_index)
+            if pos + 1 < len(children):
+                guide_units[dic_child_index*2 + 1] = dawg.label(children[pos+1])
+            nodes.append((dawg_child_index, dic_child_index))
+        stack.extend(reversed(nodes))
+
+    guide._units = array.array(str("B"), guide_units)
+    return guide
+
+
+def external_sort(items, chunk_size=DEFAULT_CHUNK_SIZE, tmp_dir=None):
+    """
+    Sorts ``(bytes_key, int_value)`` pairs and yields them in order.
+
+    At most ``chunk_size`` pairs are kept in memory: sorted chunks
+    are written to temporary files (in ``tmp_dir``) and merged.
+    """
+    items = iter(items)
+    chunks = []
+    try:
+        while True:
+            chunk = []
+            for item in items:
+                chunk.append(item)
+                if len(chunk) == chunk_size:
+                    break
+            chunk.sort()
+
+            if not chunks and len(chunk) < chunk_size:
+                # everything fits into memory
+                for item in chunk:
+                    yield item
+                return
+
+            if chunk:
+                chunks.append(_write_chunk(chunk, tmp_dir))
+            if len(chunk) < chunk_size:
+                break
+            del chunk
+
+        for item in heapq.merge(*[_read_chunk(fp) for fp in chunks]):
+            yield item
+    finally:
+        for fp in chunks:
+            fp.close()
+
+
+def _write_chunk(chunk, tmp_dir):
+    fp = tempfile.TemporaryFile(dir=tmp_dir)
+    pack = _RECORD.pack
+    for key, value in chunk:
+        fp.write(pack(len(key), value))
+        fp.write(key)
+    fp.seek(0)
+    return fp
+
+
+def _read_chunk(fp):
+    header_size = _RECORD.size
+    unpack = _RECORD.unpack
+    read = fp.read
+    while True:
+        header = read(header_size)
+        if not header:
+            return
+        length, value = unpack(header)
+        yield read(length), value
+
+
+def build(dawg, data, input_is_sorted=False, chunk_size=DEFAULT_CHUNK_SIZE, tmp_dir=None):
+    """
+    Builds ``dawg`` (a new DAWG object, e.g. ``RecordDAWG('<H')``)
+    from ``data`` and returns it. ``data`` is what ``DAWG`` python
+    package accepts for the same class: an iterable of keys for
+    ``DAWG`` and ``CompletionDAWG``, an iterable of
+    ``(key, payload)`` pairs for ``BytesDAWG``, ``(key, tuple)``
+    pairs for ``RecordDAWG`` and ``(key, int)`` pairs
+    (or a mapping) for ``IntDAWG`` and ``IntCompletionDAWG``.
+
+    If ``input_is_sorted`` is True, ``data`` must be sorted by utf8-encoded
+    keys (payloads of the same key may go in any order); it is consumed
+    as a stream then. Otherwise it is sorted with ``external_sort``.
+    """
+    items = dawg._build_items(data)
+    if not input_is_sorted:
+        items = external_sort(items, chunk_size, tmp_dir)
+
+    dawg_builder = DawgBuilder()
+    for key, value in items:
+        dawg_builder.insert(key, value)
+    return finish(dawg, dawg_builder)
+
+
+def finish(dawg, dawg_builder):
+    """
+    Finishes ``dawg_builder`` (a ``DawgBuilder`` with all keys of
+    ``dawg`` inserted) and makes the result the data of ``dawg``.
+    Returns ``dawg``.
+    """
+    graph = dawg_builder.finish()
+    dic = build_dictionary(graph)
+
+    dawg.close()
+    dawg.dct = dic
+    if isinstance(dawg, CompletionDAWG):
+        dawg.guide = build_guide(graph, dic)
+    return dawg
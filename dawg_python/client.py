@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio client for the lookup server (``dawg_python.serve``)::
+
+    client = Client(unix_path='/tmp/dawg.sock')
+    values = await client.get('words', ['foo', 'bar'])
+    await client.close()
+
+The client keeps a pool of connections. Requests are pipelined: they
+are sent as soon as they are made, without waiting for responses to
+earlier requests on the same connection.
+"""
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import itertools
+
+from . import protocol
+
+
+class ServerError(Exception):
+    "Error returned by the server."
+
+
+class _Connection(object):
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.reading = asyncio.ensure_future(self._read_responses())
+
+    async def _read_responses(self):
+        error = None
+        try:
+            while True:
+                header = await self.reader.readexactly(protocol.HEADER_SIZE)
+                data = await self.reader.readexactly(protocol.frame_size(header))
+                request_id, status, result = protocol.loads(data)
+                future = self.pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if status == protocol.OK:
+                    future.set_result(result)
+                else:
+                    future.set_exception(ServerError(result))
+        except (asyncio.IncompleteReadError, ConnectionError, protocol.ProtocolError) as e:
+            error = e
+        finally:
+            self.writer.close()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection closed: %s" % error))
+            self.pending.clear()
+
+    @property
+    def closed(self):
+        return self.reading.done()
+
+    async def request(self, request_id, name, method, args):
+        if self.closed:
+            raise ConnectionError("Connection closed")
+        future = asyncio.get_event_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(protocol.frame((request_id, name, method, args)))
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.reading.cancel()
+        try:
+            await self.reading
+        except asyncio.CancelledError:
+            pass
+
+
+class Client(object):
+    """
+    Pooled, pipelining client. Connects to ``unix_path`` if it is given,
+    to ``host:port`` otherwise; up to ``pool_size`` connections are
+    opened lazily and requests are spread over them.
+    """
+
+    def __init__(self, unix_path=None, host='127.0.0.1', port=8379, pool_size=4):
+        self.unix_path = unix_path
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self._connections = []
+        self._next_connection = itertools.cycle(range(pool_size))
+        self._request_ids = itertools.count()
+
+    async def _connect(self):
+        if self.unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(self.unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        return _Connection(reader, writer)
+
+    async def _connection(self):
+        pos = next(self._next_connection)
+        while len(self._connections) <= pos:
+            self._connections.append(None)
+
+        # slots hold connecting tasks, so that concurrent requests
+        # don't open several connections for the same slot
+        task = self._connections[pos]
+        if task is None or task.done() and (task.exception() or task.result().closed):
+            task = asyncio.ensure_future(self._connect())
+            self._connections[pos] = task
+        return await task
+
+    async def request(self, name, method, *args):
+        "Sends a request for a DAWG named ``name`` and returns its result."
+        connection = await self._connection()
+        return await connection.request(next(self._request_ids), name, method, args)
+
+    async def get(self, name, keys, default=None):
+        "Returns a list of values for each of ``keys``."
+        return await self.request(name, 'get', list(keys), default)
+
+    async def contains(self, name, keys):
+        "Returns a list of booleans: whether each of ``keys`` is in the DAWG."
+        return await self.request(name, 'contains', list(keys))
+
+    async def keys(self, name, prefixes):
+        "Returns a list of keys for each of ``prefixes``."
+        return await self.request(name, 'keys', list(prefixes))
+
+    async def similar_items(self, name, keys, replaces):
+        """
+        Returns a list of ``similar_items`` results for each of ``keys``;
+        ``replaces`` is a mapping for ``compile_replaces``.
+        """
+        return await self.request(name, 'similar_items', list(keys), replaces)
+
+    async def close(self):
+        "Closes all connections."
+        tasks, self._connections = self._connections, []
+        for task in tasks:
+            if task is None:
+                continue
+            try:
+                connection = await task
+            except OSError:
+                continue
+            await connection.close()
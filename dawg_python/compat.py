@@ -4,5 +4,15 @@ PY3 = sys.version_info[0] == 3
 if PY3:
     def int_from_byte(b):
         return b
+
+    def bytes_for_write(data):
+        # arrays and memoryviews are written without copying
+        return data
 else:
     int_from_byte = ord
+
+    def bytes_for_write(data):
+        # file.write doesn't accept arrays and memoryviews in Python 2
+        if isinstance(data, memoryview):
+            return data.tobytes()
+        return data.tostring()
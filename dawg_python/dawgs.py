@@ -1,65 +1,352 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 
+import io
+import os
+import re
+import bisect
+import heapq
 import struct
-from binascii import a2b_base64
+import base64
+import itertools
+from binascii import a2b_base64, b2a_base64
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 from . import wrapper
 from .compat import int_from_byte
 
+def _encode_keys(keys):
+    return [
+        key if isinstance(key, bytes) else key.encode('utf8')
+        for key in keys
+    ]
+
+
+def _utf8_char_length(lead_byte):
+    if lead_byte < 0xC0:
+        return 1
+    if lead_byte < 0xE0:
+        return 2
+    if lead_byte < 0xF0:
+        return 3
+    return 4
+
+
+def _next_distance_row(row, prev_row, query, ch, prev_ch):
+    # a row of the edit distance matrix for a key extended with ``ch``;
+    # if ``prev_row`` is given, transpositions of adjacent chars are allowed
+    res = [row[0] + 1]
+    for pos in range(1, len(query) + 1):
+        query_ch = query[pos-1]
+        dist = min(
+            res[pos-1] + 1,
+            row[pos] + 1,
+            row[pos-1] + (query_ch != ch)
+        )
+        if (prev_row is not None and pos > 1 and query_ch == prev_ch
+                and query[pos-2] == ch):
+            dist = min(dist, prev_row[pos-2] + 1)
+        res.append(dist)
+    return res
+
+
+def _replaced_key(b_key, replaced):
+    parts = []
+    pos = 0
+    for start, end, b_replacement in replaced:
+        parts.append(b_key[pos:start])
+        parts.append(b_replacement)
+        pos = end
+    parts.append(b_key[pos:])
+    return b"".join(parts)
+
+
+def _encode_cursor(b_key):
+    return base64.urlsafe_b64encode(bytes(b_key)).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    return base64.urlsafe_b64decode(cursor.encode('ascii'))
+
+
 class DAWG(object):
     """
     Base DAWG wrapper.
     """
     def __init__(self):
         self.dct = None
+        self._mmap = None
+        self._mmap_path = None
+        self._mmap_prefetch = False
 
     def __contains__(self, key):
         if not isinstance(key, bytes):
             key = key.encode('utf8')
         return self.dct.contains(key)
 
-    def load(self, path):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __reduce__(self):
+        # DAWGs loaded with mmap=True are pickled as a path and re-mapped
+        # on unpickling, so the units are not copied to other processes.
+        if self.dct is None:
+            return self.__class__, self._init_args()
+        if self._mmap is not None:
+            state = {'path': self._mmap_path, 'prefetch': self._mmap_prefetch}
+        else:
+            state = {'data': self.tobytes()}
+        state['decoded'] = isinstance(self.dct, wrapper.DecodedDictionary)
+        state['jump_depth'] = self.dct.jump_depth
+        return self.__class__, self._init_args(), state
+
+    def __setstate__(self, state):
+        if 'path' in state:
+            self.load(state['path'], mmap=True, prefetch=state.get('prefetch', False))
+        else:
+            self.frombytes(state['data'])
+        self._prepare(state.get('decoded', False), state.get('jump_depth', 0))
+
+    def _init_args(self):
+        return ()
+
+    def _build_items(self, data):
+        # (utf8-encoded key, value) pairs for dawg_python.builder
+        for key in data:
+            if not isinstance(key, bytes):
+                key = key.encode('utf8')
+            yield key, 0
+
+    def load(self, path, mmap=False, prefetch=False, decoded=False, jump_depth=0, lazy_guide=False):
         """
         Loads DAWG from a file.
+
+        If ``mmap`` is True the file is memory-mapped instead of being
+        read: loading takes constant time and memory pages are shared
+        between processes through the OS page cache. ``prefetch=True``
+        advises the OS to read the whole file in advance.
+
+        Memory-mapped file is kept open until ``close`` is called
+        (or DAWG is used as a context manager). Memory mapping requires
+        Python 3.3+ (NotImplementedError is raised otherwise).
+
+        If ``decoded`` is True the dictionary is decoded at load time
+        (see ``wrapper.DecodedDictionary``): lookups become faster
+        at the cost of about 3.5x more memory for the dictionary.
+
+        If ``jump_depth`` is non-zero a table of all key prefixes
+        of up to ``jump_depth`` bytes is built at load time
+        (see ``wrapper.Dictionary.build_jump_table``); lookups
+        then skip the first ``jump_depth`` transitions.
+
+        If ``lazy_guide`` is True the guide (completion data of
+        ``CompletionDAWG`` and its subclasses) is read or mapped on
+        first use, so processes which only do lookups not needing it
+        (``in``, ``prefixes``, ``IntCompletionDAWG.get``) never load it.
+        The file must not be changed until the guide is loaded.
         """
-        self.dct = wrapper.Dictionary.load(path)
+        self.close()
+        if mmap:
+            self._mmap = wrapper.map_file(path, prefetch)
+            # the path is pickled and may be loaded with another cwd
+            self._mmap_path = os.path.abspath(path)
+            self._mmap_prefetch = prefetch
+            try:
+                self._map(self._mmap, lazy_guide=lazy_guide)
+            except Exception:
+                self.close()
+                raise
+        else:
+            with open(path, 'rb') as f:
+                self._read(f, lazy_guide=lazy_guide)
+        self._prepare(decoded, jump_depth)
         return self
 
-    def _has_value(self, index):
-        return self.dct.has_value(index)
+    def _prepare(self, decoded=False, jump_depth=0):
+        if decoded:
+            self.dct = wrapper.DecodedDictionary(self.dct)
+        if jump_depth:
+            self.dct.build_jump_table(jump_depth)
 
-    def _similar_keys(self, current_prefix, key, index, replace_chars):
+    def read(self, fp):
+        """
+        Loads DAWG from a file-like object (e.g. a zip archive member).
+        """
+        self.close()
+        self._read(fp)
+        return self
 
-        res = []
-        start_pos = len(current_prefix)
-        end_pos = len(key)
-        word_pos = start_pos
+    def write(self, fp):
+        """
+        Writes DAWG to a file-like object.
+        """
+        self._write(fp)
+
+    def frombytes(self, data):
+        """
+        Loads DAWG from a bytes object or any other buffer (e.g. ``mmap``
+        or ``multiprocessing.shared_memory`` buffer).
+
+        The data is used without copying, so it must not be changed
+        while DAWG is in use. Requires Python 3.3+, as ``mmap=True``.
+        """
+        self.close()
+        self._map(data)
+        return self
 
-        while word_pos < end_pos:
-            b_step = key[word_pos].encode('utf8')
+    def tobytes(self):
+        """
+        Returns DAWG data as a bytes object.
+        """
+        buf = io.BytesIO()
+        self._write(buf)
+        return buf.getvalue()
 
-            if b_step in replace_chars:
-                next_index = index
-                b_replace_char, u_replace_char = replace_chars[b_step]
+    def close(self):
+        """
+        Releases the memory-mapped file or the buffer used by a DAWG
+        loaded with ``mmap=True`` or ``frombytes``; DAWG can't be used
+        after that (ValueError is raised). It does nothing for DAWGs
+        read into memory, unless they are loaded with ``decoded=True``:
+        decoded arrays are dropped.
+        """
+        if self.dct is not None:
+            self.dct.close()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._mmap_path = None
+            self._mmap_prefetch = False
+
+    def _read(self, fp, lazy_guide=False):
+        self.dct = wrapper.Dictionary()
+        self.dct.read(fp)
 
-                next_index = self.dct.follow_bytes(b_replace_char, next_index)
+    def _write(self, fp):
+        self.dct.write(fp)
 
-                if next_index is not None:
-                    prefix = current_prefix + key[start_pos:word_pos] + u_replace_char
-                    extra_keys = self._similar_keys(prefix, key, next_index, replace_chars)
-                    res += extra_keys
+    def _map(self, buf, offset=0, lazy_guide=False):
+        self.dct = wrapper.Dictionary()
+        return self.dct.map(buf, offset)
 
-            index = self.dct.follow_bytes(b_step, index)
+    def _has_value(self, index):
+        return self.dct.has_value(index)
+
+    def _follow_many(self, b_keys):
+        # keys are sorted so that transitions for common prefixes are
+        # followed only once; results are returned in the original order
+        order = sorted(range(len(b_keys)), key=b_keys.__getitem__)
+        res = [None] * len(b_keys)
+        indices = self.dct.follow_many([b_keys[i] for i in order], self.dct.ROOT)
+        for pos, index in zip(order, indices):
+            res[pos] = index
+        return res
+
+    def contains_many(self, keys):
+        """
+        Returns a list of booleans: whether each of ``keys`` is in this DAWG.
+        """
+        return [
+            index is not None and bool(self._has_value(index))
+            for index in self._follow_many(_encode_keys(keys))
+        ]
+
+    def filter_known(self, keys, chunk_size=1000):
+        """
+        Yields those of ``keys`` which are in this DAWG. ``keys`` may be
+        an arbitrary (e.g. infinite) iterable; it is processed in chunks
+        of ``chunk_size`` keys.
+        """
+        keys = iter(keys)
+        while True:
+            chunk = list(itertools.islice(keys, chunk_size))
+            if not chunk:
+                return
+            for key, found in zip(chunk, self.contains_many(chunk)):
+                if found:
+                    yield key
+
+    def _similar_indices(self, b_key, matches, anchors, pos, index, replaced):
+        # returns (replaced, terminal) pairs for all variants of b_key[pos:]
+        # reachable from ``index``; ``matches`` maps positions to rules
+        # found there and ``anchors`` are its sorted keys; ``replaced``
+        # is a tuple of (start, end, replacement) triples for the applied
+        # rules and ``terminal`` is a value returned by ``_has_value``
+        res = []
+        branches = []
+        follow_bytes = self.dct.follow_bytes
+
+        for anchor in anchors[bisect.bisect_left(anchors, pos):]:
+            # there is nothing to replace between pos and anchor
+            index = follow_bytes(b_key[pos:anchor], index)
             if index is None:
                 break
-            word_pos += 1
+            pos = anchor
+
+            for end, b_replacements in matches[anchor]:
+                for b_replacement in b_replacements:
+                    next_index = follow_bytes(b_replacement, index)
+                    if next_index is not None:
+                        branches.append((end, next_index, replaced + ((pos, end, b_replacement),)))
 
         else:
-            if self._has_value(index):
-                found_key = current_prefix + key[start_pos:]
-                res.insert(0, found_key)
+            index = follow_bytes(b_key[pos:], index)
+            if index is not None:
+                terminal = self._has_value(index)
+                if terminal:
+                    res.append((replaced, terminal))
+
+        for next_pos, next_index, next_replaced in branches:
+            res.extend(self._similar_indices(
+                b_key, matches, anchors, next_pos, next_index, next_replaced
+            ))
+
+        return res
 
+    def _similar(self, key, replaces):
+        # returns a list of (b_variant, terminal) pairs; variants which
+        # are produced by different (overlapping) rules are returned once
+        if not isinstance(key, bytes):
+            key = key.encode('utf8')
+
+        # UTF-8 is self-synchronizing, so rules (which are valid UTF-8)
+        # can only be found at character boundaries
+        starts, trie = replaces
+        matches = {}
+        match = starts.search(key) if starts is not None else None
+        if match is not None:
+            labels = bytearray(key)
+        while match is not None:
+            pos = end = match.start()
+            match = starts.search(key, pos + 1)
+            node = trie
+            while end < len(labels):
+                node = node.get(labels[end])
+                if node is None:
+                    break
+                end += 1
+                if None in node:
+                    matches.setdefault(pos, []).append((end, node[None]))
+
+        anchors = sorted(matches)
+        variants = self._similar_indices(key, matches, anchors, 0, self.dct.ROOT, ())
+        if len(variants) < 2:
+            return [(_replaced_key(key, replaced), terminal) for replaced, terminal in variants]
+
+        res = []
+        seen = set()
+        for replaced, terminal in variants:
+            b_variant = _replaced_key(key, replaced)
+            if b_variant not in seen:
+                seen.add(b_variant)
+                res.append((b_variant, terminal))
         return res
 
     def similar_keys(self, key, replaces):
@@ -69,50 +356,213 @@ class DAWG(object):
 
         ``replaces`` is an object obtained from
         ``DAWG.compile_replaces(mapping)`` where mapping is a dict
-        that maps single-char unicode sitrings to another single-char
-        unicode strings.
+        that maps unicode strings to another unicode strings
+        (or to lists of them).
 
-        This may be useful e.g. for handling single-character umlauts.
+        This may be useful e.g. for handling umlauts or ligatures.
         """
-        return self._similar_keys("", key, self.dct.ROOT, replaces)
+        return [b_variant.decode('utf8') for b_variant, terminal in self._similar(key, replaces)]
 
     @classmethod
     def compile_replaces(cls, replaces):
-
-        for k,v in replaces.items():
-            if len(k) != 1 or len(v) != 1:
-                raise ValueError("Keys and values must be single-char unicode strings.")
-
-        return dict(
-            (
-                k.encode('utf8'),
-                (v.encode('utf8'), v)
-            )
-            for k, v in replaces.items()
-        )
+        """
+        Compiles ``replaces`` mapping for ``similar_keys`` and similar
+        methods. Keys of the mapping are non-empty unicode strings; values
+        are unicode strings or lists of unicode strings to try instead.
+        Both may contain several characters, e.g.
+        ``{'ß': 'ss', 'ss': 'ß', 'ё': ['е', 'e']}``.
+
+        Rules are compiled into a trie of their UTF-8 encoded keys
+        (nested dicts by byte; ``None`` holds replacements) and a regular
+        expression which finds positions where rules start, so matching
+        a key doesn't depend on the number of rules.
+        """
+        trie = {}
+        b_keys = []
+        for k, v in replaces.items():
+            if isinstance(v, (list, tuple)):
+                replacements = v
+            else:
+                replacements = [v]
+
+            if not k or not all(isinstance(r, type(k)) for r in replacements):
+                raise ValueError("Keys and values must be non-empty unicode strings.")
+
+            b_key = k.encode('utf8')
+            node = trie
+            for label in bytearray(b_key):
+                node = node.setdefault(label, {})
+            node[None] = tuple(r.encode('utf8') for r in replacements)
+            b_keys.append(b_key)
+
+        if not b_keys:
+            return None, trie
+        # finds a position where any rule starts; all rules which start
+        # there are then matched by the trie
+        starts = re.compile(b"|".join(re.escape(b_key) for b_key in b_keys))
+        return starts, trie
+
+    def _children(self, index):
+        return self.dct.children(index)
+
+    def _fuzzy(self, key, max_distance, transpositions):
+        # yields (b_key, index) for all keys within ``max_distance``
+        # edits from ``key``, in alphabetical order
+        if isinstance(key, bytes):
+            key = key.decode('utf8')
+        initial_row = list(range(len(key) + 1))
+        if len(key) <= max_distance and self._has_value(self.dct.ROOT):
+            yield b"", self.dct.ROOT
+
+        # (index, b_key, bytes of an incomplete char, row, previous row, previous char)
+        stack = [(self.dct.ROOT, b"", b"", initial_row, None, None)]
+        while stack:
+            index, b_key, pending, row, prev_row, prev_ch = stack.pop()
+
+            if pending:
+                if len(pending) < _utf8_char_length(int_from_byte(pending[0])):
+                    ch = None
+                else:
+                    ch = pending.decode('utf8')
+                    new_row = _next_distance_row(
+                        row, prev_row if transpositions else None, key, ch, prev_ch
+                    )
+                    if min(new_row) > max_distance:
+                        continue
+                    row, prev_row, prev_ch, pending = new_row, row, ch, b""
+
+                    if row[-1] <= max_distance and self._has_value(index):
+                        yield b_key, index
+
+            children = []
+            for label, child in self._children(index):
+                byte = struct.pack(str("B"), label)
+                children.append((child, b_key + byte, pending + byte, row, prev_row, prev_ch))
+            stack.extend(reversed(children))
+
+    def fuzzy_keys(self, key, max_distance=1, transpositions=False, limit=None):
+        """
+        Returns a list of keys of this DAWG within ``max_distance``
+        edits (insertions, deletions and substitutions of characters)
+        from ``key``, in alphabetical order. If ``transpositions`` is True
+        swapping of two adjacent characters counts as a single edit.
+        At most ``limit`` keys are returned if ``limit`` is not None.
+
+        The edit distance matrix is computed while traversing the DAWG,
+        so subtrees which can't contain matches are skipped.
+        """
+        matches = self._fuzzy(key, max_distance, transpositions)
+        return [
+            b_key.decode('utf8')
+            for b_key, index in itertools.islice(matches, limit)
+        ]
 
     def prefixes(self, key):
         '''
         Returns a list with keys of this DAWG that are prefixes of the ``key``.
         '''
         res = []
-        index = self.dct.ROOT
         if not isinstance(key, bytes):
             key = key.encode('utf8')
 
-        pos = 1
-
-        for ch in key:
-            index = self.dct.follow_char(int_from_byte(ch), index)
-            if not index:
-                break
+        for end, index in self._prefix_indices(bytearray(key), 0):
+            res.append(key[:end].decode('utf8'))
 
-            if self._has_value(index):
-                res.append(key[:pos].decode('utf8'))
-            pos += 1
+        return res
 
+    def _prefix_matches(self, key):
+        # returns a list of (prefix, index) pairs for keys which are
+        # prefixes of ``key``; prefixes are slices of ``key``, so they
+        # are not decoded
+        if isinstance(key, bytes):
+            return [
+                (key[:end], index)
+                for end, index in self._prefix_indices(bytearray(key), 0)
+            ]
+
+        b_key = key.encode('utf8')
+        matches = self._prefix_indices(bytearray(b_key), 0)
+        if len(b_key) == len(key):
+            return [(key[:end], index) for end, index in matches]
+
+        # byte offsets are converted to character offsets incrementally
+        res = []
+        pos = chars = 0
+        for end, index in matches:
+            chars += len(b_key[pos:end].decode('utf8'))
+            pos = end
+            res.append((key[:chars], index))
         return res
 
+    def _scan(self, text, longest, overlapping):
+        # yields (start, end, b_key, index) tuples for keys found in text;
+        # start and end are character offsets for unicode text and byte
+        # offsets for bytes; index is returned by ``_prefix_indices``
+        if isinstance(text, bytes):
+            b_text = text
+        else:
+            b_text = text.encode('utf8')
+        length = len(b_text)
+
+        # keys are valid UTF-8, so they start and end at character boundaries
+        labels = bytearray(b_text)
+        boundaries = [pos for pos, ch in enumerate(labels) if ch & 0xC0 != 0x80]
+        if b_text is text:
+            offsets = None
+        else:
+            offsets = dict((b_pos, pos) for pos, b_pos in enumerate(boundaries))
+            offsets[length] = len(boundaries)
+
+        prefix_indices = self._prefix_indices
+        next_start = 0
+
+        for start in boundaries:
+            if start < next_start:
+                continue
+
+            matches = prefix_indices(labels, start)
+            if not matches:
+                continue
+            if longest or not overlapping:
+                matches = matches[-1:]
+            if not overlapping:
+                next_start = matches[-1][0]
+
+            for end, index in matches:
+                if offsets is None:
+                    yield start, end, b_text[start:end], index
+                else:
+                    yield offsets[start], offsets[end], b_text[start:end], index
+
+    def _prefix_indices(self, b_key, start):
+        return self.dct.prefix_indices(b_key, start)
+
+    def iter_matches(self, text, longest=False, overlapping=True):
+        """
+        Scans ``text`` (a unicode string or UTF-8 encoded bytes) and
+        yields a ``(start, end, key)`` tuple for every key of this DAWG
+        which occurs in it, ordered by ``start`` and then by ``end``.
+        Offsets are in characters for unicode text and in bytes
+        for bytes.
+
+        With ``longest=True`` only the longest key is returned for each
+        start position. With ``overlapping=False`` keys are matched
+        greedily from left to right (leftmost-longest), and matches
+        don't overlap.
+        """
+        for start, end, b_key, index in self._scan(text, longest, overlapping):
+            yield start, end, b_key.decode('utf8')
+
+    def find_all(self, text, longest=False, overlapping=True):
+        """
+        Returns a list of matches found by ``iter_matches``.
+        """
+        return list(self.iter_matches(text, longest, overlapping))
+
+
+
+def _one(index):
+    return 1
 
 
 class CompletionDAWG(DAWG):
@@ -123,8 +573,35 @@ class CompletionDAWG(DAWG):
     def __init__(self):
         super(CompletionDAWG, self).__init__()
         self.guide = None
+        self._subtree_indices = {}
+
+    @property
+    def guide(self):
+        if self._guide_offset is not None:
+            self._load_guide()
+        return self._guide
+
+    @guide.setter
+    def guide(self, guide):
+        self._guide = guide
+        # a guide which is not loaded yet is at _guide_offset
+        # of the file at _guide_path (or of the mapped file)
+        self._guide_offset = None
+        self._guide_path = None
+
+    def _load_guide(self):
+        guide = wrapper.Guide()
+        if self._guide_path is not None:
+            with open(self._guide_path, 'rb') as f:
+                f.seek(self._guide_offset)
+                guide.read(f)
+        elif self._mmap is None:
+            raise ValueError("The guide can't be loaded: DAWG is closed")
+        else:
+            guide.map(self._mmap, self._guide_offset)
+        self.guide = guide
 
-    def keys(self, prefix=""):
+    def keys(self, prefix="", limit=None):
         b_prefix = prefix.encode('utf8')
         res = []
 
@@ -135,12 +612,54 @@ class CompletionDAWG(DAWG):
         completer = wrapper.Completer(self.dct, self.guide)
         completer.start(index, b_prefix)
 
-        while completer.next():
+        while len(res) != limit and completer.next():
             key = completer.key.decode('utf8')
             res.append(key)
 
         return res
 
+    def keys_page(self, prefix="", limit=10, cursor=None):
+        """
+        Returns a ``(keys, cursor)`` tuple with at most ``limit`` keys
+        which start with ``prefix``. Pass the returned cursor to get
+        the next page; it is None if there are no more keys.
+
+        Cursor is an opaque ASCII string; the next page is started
+        right after the last returned key, without traversing
+        the previous pages again.
+        """
+        return self._page(prefix, limit, cursor, self._completion_key)
+
+    def _completion_key(self, completer):
+        return completer.key.decode('utf8')
+
+    def _page(self, prefix, limit, cursor, get_item):
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        if not isinstance(prefix, bytes):
+            prefix = prefix.encode('utf8')
+        res = []
+
+        index = self.dct.follow_bytes(prefix, self.dct.ROOT)
+        if index is None:
+            return res, None
+
+        completer = wrapper.Completer(self.dct, self.guide)
+        if cursor is None:
+            completer.start(index, prefix)
+        elif not completer.resume(index, prefix, _decode_cursor(cursor)):
+            raise ValueError("Invalid cursor: %r" % cursor)
+
+        while len(res) < limit and completer.next():
+            res.append(get_item(completer))
+
+        if len(res) < limit:
+            return res, None
+        next_cursor = _encode_cursor(completer.key)
+        if not completer.next():
+            return res, None
+        return res, next_cursor
+
     def iterkeys(self, prefix=""):
         b_prefix = prefix.encode('utf8')
         index = self.dct.follow_bytes(b_prefix, self.dct.ROOT)
@@ -153,24 +672,98 @@ class CompletionDAWG(DAWG):
         while completer.next():
             yield completer.key.decode('utf8')
 
-
-    def load(self, path):
+    def count(self, prefix=""):
         """
-        Loads DAWG from a file.
+        Returns the number of keys which start with ``prefix``
+        (for DAWGs with payloads - the number of items).
+
+        Subtree sizes are computed on the first call and cached;
+        after that ``count`` takes O(len(prefix)) time.
         """
-        self.dct = wrapper.Dictionary()
-        self.guide = wrapper.Guide()
+        index = self._follow_prefix(prefix)
+        if index is None:
+            return 0
+        return self._subtree_index('count', 'I', _one, sum)[index]
 
-        with open(path, 'rb') as f:
-            self.dct.read(f)
-            self.guide.read(f)
+    def _children(self, index):
+        if not self.guide.size():
+            return ()
+        return self.guide.children(self.dct, index)
 
-        return self
+    def _follow_prefix(self, prefix):
+        if not isinstance(prefix, bytes):
+            prefix = prefix.encode('utf8')
+        return self.dct.follow_bytes(prefix, self.dct.ROOT)
+
+    def _subtree_index(self, name, typecode, value, combine):
+        res = self._subtree_indices.get(name)
+        if res is None:
+            res = wrapper.subtree_index(self.dct, self.guide, typecode, value, combine)
+            self._subtree_indices[name] = res
+        return res
+
+    def close(self):
+        self._subtree_indices = {}
+        if self._guide is not None:
+            self._guide.close()
+        super(CompletionDAWG, self).close()
+
+    def _read(self, fp, lazy_guide=False):
+        super(CompletionDAWG, self)._read(fp)
+        if lazy_guide:
+            self.guide = None
+            self._guide_path = os.path.abspath(fp.name)
+            self._guide_offset = fp.tell()
+            return
+        self.guide = wrapper.Guide()
+        self.guide.read(fp)
+
+    def _write(self, fp):
+        super(CompletionDAWG, self)._write(fp)
+        self.guide.write(fp)
+
+    def _map(self, buf, offset=0, lazy_guide=False):
+        offset = super(CompletionDAWG, self)._map(buf, offset)
+        if lazy_guide:
+            self.guide = None
+            self._guide_offset = offset
+            return None
+        self.guide = wrapper.Guide()
+        return self.guide.map(buf, offset)
 
 
 PAYLOAD_SEPARATOR = b'\x01'
 MAX_VALUE_SIZE = 32768
 
+PAYLOAD_DECODED = 'decoded'
+PAYLOAD_RAW = 'raw'
+PAYLOAD_LAZY = 'lazy'
+PAYLOAD_MODES = (PAYLOAD_DECODED, PAYLOAD_RAW, PAYLOAD_LAZY)
+
+
+class LazyValue(object):
+    """
+    Payload which is decoded on the first access to ``value``;
+    ``raw`` is the undecoded (base64-encoded) payload.
+    """
+    __slots__ = ('raw', '_decode', '_value')
+
+    def __init__(self, raw, decode):
+        self.raw = raw
+        self._decode = decode
+        self._value = None
+
+    @property
+    def value(self):
+        if self._decode is not None:
+            self._value = self._decode(self.raw)
+            self._decode = None
+        return self._value
+
+    def __repr__(self):
+        return str("LazyValue(%r)") % (self.raw,)
+
+
 class BytesDAWG(CompletionDAWG):
     """
     DAWG that is able to transparently store extra binary payload in keys;
@@ -178,10 +771,56 @@ class BytesDAWG(CompletionDAWG):
 
     In other words, this class implements read-only DAWG-based
     {unicode -> list of bytes objects} mapping.
+
+    ``payload_mode`` controls how payloads are returned:
+
+    * ``'decoded'`` (default) - as decoded values;
+    * ``'raw'`` - as undecoded (base64-encoded) bytes objects which
+      can be decoded later with ``decode_payload``;
+    * ``'lazy'`` - as ``LazyValue`` objects which decode the payload
+      on first access to their ``value`` attribute.
     """
 
-    def __init__(self, payload_separator=PAYLOAD_SEPARATOR):
+    def __init__(self, payload_separator=PAYLOAD_SEPARATOR, payload_mode=PAYLOAD_DECODED):
+        super(BytesDAWG, self).__init__()
+        if payload_mode not in PAYLOAD_MODES:
+            raise ValueError("payload_mode must be one of %s" % ", ".join(PAYLOAD_MODES))
         self._payload_separator = payload_separator
+        self.payload_mode = payload_mode
+
+        if payload_mode == PAYLOAD_DECODED:
+            self._payload = self.decode_payload
+        elif payload_mode == PAYLOAD_RAW:
+            self._payload = bytes
+        else:
+            self._payload = self._lazy_payload
+
+    def _init_args(self):
+        return (self._payload_separator, self.payload_mode)
+
+    def _raw_key(self, key, payload):
+        b_key = key.encode('utf8')
+        if self._payload_separator in b_key:
+            raise ValueError("Payload separator (%r) is found within utf8-encoded key ('%s')" % (self._payload_separator, key))
+        return b_key + self._payload_separator + b2a_base64(payload)
+
+    def _build_items(self, data):
+        # raw keys of the same key are sorted, so that input
+        # sorted by keys is sorted by raw keys
+        for key, group in itertools.groupby(data, lambda item: item[0]):
+            for raw_key in sorted(self._raw_key(key, payload) for key, payload in group):
+                yield raw_key, 0
+
+    def decode_payload(self, raw):
+        """
+        Decodes a raw (base64-encoded) payload.
+        """
+        # a2b_base64 doesn't support bytearray in python 2.6
+        # so it is converted (and copied) to bytes
+        return a2b_base64(bytes(raw))
+
+    def _lazy_payload(self, raw):
+        return LazyValue(bytes(raw), self.decode_payload)
 
     def __contains__(self, key):
         if not isinstance(key, bytes):
@@ -207,6 +846,18 @@ class BytesDAWG(CompletionDAWG):
 
         return self.b_get_value(key) or default
 
+    def get_many(self, keys, default=None):
+        """
+        Returns a list with payloads for each of ``keys``
+        (``default`` for keys which are not found).
+        """
+        res = []
+        for index in self._follow_many(_encode_keys(keys)):
+            if index is not None:
+                index = self.dct.follow_bytes(self._payload_separator, index)
+            res.append(self._value_for_index(index) if index else default)
+        return res
+
     def _follow_key(self, b_key):
         index = self.dct.follow_bytes(b_key, self.dct.ROOT)
         if not index:
@@ -225,10 +876,7 @@ class BytesDAWG(CompletionDAWG):
 
         completer.start(index)
         while completer.next():
-            # a2b_base64 doesn't support bytearray in python 2.6
-            # so it is converted (and copied) to bytes
-            b64_data = bytes(completer.key)
-            res.append(a2b_base64(b64_data))
+            res.append(self._payload(completer.key))
 
         return res
 
@@ -238,7 +886,7 @@ class BytesDAWG(CompletionDAWG):
             return []
         return self._value_for_index(index)
 
-    def keys(self, prefix=""):
+    def keys(self, prefix="", limit=None):
         if not isinstance(prefix, bytes):
             prefix = prefix.encode('utf8')
         res = []
@@ -253,7 +901,7 @@ class BytesDAWG(CompletionDAWG):
         completer = wrapper.Completer(self.dct, self.guide)
         completer.start(index, prefix)
 
-        while completer.next():
+        while len(res) != limit and completer.next():
             payload_idx = completer.key.index(self._payload_separator)
             u_key = completer.key[:payload_idx].decode('utf8')
             res.append(u_key)
@@ -278,7 +926,7 @@ class BytesDAWG(CompletionDAWG):
             u_key = completer.key[:payload_idx].decode('utf8')
             yield u_key
 
-    def items(self, prefix=""):
+    def items(self, prefix="", limit=None):
         if not isinstance(prefix, bytes):
             prefix = prefix.encode('utf8')
         res = []
@@ -292,11 +940,9 @@ class BytesDAWG(CompletionDAWG):
         completer = wrapper.Completer(self.dct, self.guide)
         completer.start(index, prefix)
 
-        while completer.next():
+        while len(res) != limit and completer.next():
             key, value = completer.key.split(self._payload_separator)
-            res.append(
-                (key.decode('utf8'), a2b_base64(bytes(value))) # bytes() cast is a python 2.6 fix
-            )
+            res.append((key.decode('utf8'), self._payload(value)))
 
         return res
 
@@ -315,120 +961,236 @@ class BytesDAWG(CompletionDAWG):
 
         while completer.next():
             key, value = completer.key.split(self._payload_separator)
-            item = (key.decode('utf8'), a2b_base64(bytes(value))) # bytes() cast is a python 2.6 fix
-            yield item
+            yield key.decode('utf8'), self._payload(value)
 
+    def values(self, prefix="", limit=None):
+        """
+        Returns a list of payloads for keys which start with ``prefix``
+        (in the order of ``items``); keys are not decoded.
+        """
+        if not isinstance(prefix, bytes):
+            prefix = prefix.encode('utf8')
+        res = []
 
-    def _has_value(self, index):
-        return self.dct.follow_bytes(PAYLOAD_SEPARATOR, index)
-
-    def _similar_items(self, current_prefix, key, index, replace_chars):
+        index = self.dct.ROOT
+        if prefix:
+            index = self.dct.follow_bytes(prefix, index)
+            if not index:
+                return res
 
-        res = []
-        start_pos = len(current_prefix)
-        end_pos = len(key)
-        word_pos = start_pos
+        completer = wrapper.Completer(self.dct, self.guide)
+        completer.start(index, prefix)
 
-        while word_pos < end_pos:
-            b_step = key[word_pos].encode('utf8')
+        separator, start = self._payload_separator, len(prefix)
+        while len(res) != limit and completer.next():
+            key = completer.key
+            res.append(self._payload(key[key.index(separator, start)+1:]))
 
-            if b_step in replace_chars:
-                next_index = index
-                b_replace_char, u_replace_char = replace_chars[b_step]
+        return res
 
-                next_index = self.dct.follow_bytes(b_replace_char, next_index)
-                if next_index:
-                    prefix = current_prefix + key[start_pos:word_pos] + u_replace_char
-                    extra_items = self._similar_items(prefix, key, next_index, replace_chars)
-                    res += extra_items
+    def itervalues(self, prefix=""):
+        if not isinstance(prefix, bytes):
+            prefix = prefix.encode('utf8')
 
-            index = self.dct.follow_bytes(b_step, index)
+        index = self.dct.ROOT
+        if prefix:
+            index = self.dct.follow_bytes(prefix, index)
             if not index:
-                break
-            word_pos += 1
+                return
 
-        else:
-            index = self.dct.follow_bytes(self._payload_separator, index)
-            if index:
-                found_key = current_prefix + key[start_pos:]
-                value = self._value_for_index(index)
-                res.insert(0, (found_key, value))
+        completer = wrapper.Completer(self.dct, self.guide)
+        completer.start(index, prefix)
 
-        return res
+        separator, start = self._payload_separator, len(prefix)
+        while completer.next():
+            key = completer.key
+            yield self._payload(key[key.index(separator, start)+1:])
 
-    def similar_items(self, key, replaces):
+    def items_page(self, prefix="", limit=10, cursor=None):
         """
-        Returns a list of (key, value) tuples for all variants of ``key``
-        in this DAWG according to ``replaces``.
-
-        ``replaces`` is an object obtained from
-        ``DAWG.compile_replaces(mapping)`` where mapping is a dict
-        that maps single-char unicode sitrings to another single-char
-        unicode strings.
+        Returns an ``(items, cursor)`` tuple with at most ``limit``
+        items for keys which start with ``prefix``.
+        See ``keys_page`` for details.
         """
-        return self._similar_items("", key, self.dct.ROOT, replaces)
+        return self._page(prefix, limit, cursor, self._completion_item)
 
+    def _completion_key(self, completer):
+        payload_idx = completer.key.index(self._payload_separator)
+        return completer.key[:payload_idx].decode('utf8')
 
-    def _similar_item_values(self, start_pos, key, index, replace_chars):
-        res = []
-        end_pos = len(key)
-        word_pos = start_pos
+    def _completion_item(self, completer):
+        key, value = completer.key.split(self._payload_separator)
+        return key.decode('utf8'), self._payload(value)
 
-        while word_pos < end_pos:
-            b_step = key[word_pos].encode('utf8')
 
-            if b_step in replace_chars:
-                next_index = index
-                b_replace_char, u_replace_char = replace_chars[b_step]
+    def _has_value(self, index):
+        return self.dct.follow_bytes(self._payload_separator, index)
 
-                next_index = self.dct.follow_bytes(b_replace_char, next_index)
-                if next_index:
-                    extra_items = self._similar_item_values(word_pos+1, key, next_index, replace_chars)
-                    res += extra_items
+    def _prefix_indices(self, b_key, start):
+        return self.dct.prefix_indices(b_key, start, int_from_byte(self._payload_separator[0]))
 
-            index = self.dct.follow_bytes(b_step, index)
-            if not index:
-                break
-            word_pos += 1
+    def _children(self, index):
+        separator = int_from_byte(self._payload_separator[0])
+        return (
+            (label, child)
+            for label, child in super(BytesDAWG, self)._children(index)
+            if label != separator
+        )
 
-        else:
-            index = self.dct.follow_bytes(self._payload_separator, index)
-            if index:
-                value = self._value_for_index(index)
-                res.insert(0, value)
+    def iter_matches(self, text, longest=False, overlapping=True):
+        """
+        Yields a ``(start, end, key, value)`` tuple for every key
+        which occurs in ``text``. See ``DAWG.iter_matches``.
+        """
+        for start, end, b_key, index in self._scan(text, longest, overlapping):
+            yield start, end, b_key.decode('utf8'), self._value_for_index(index)
+
+    def prefix_items(self, key):
+        """
+        Returns a list of (prefix, value) tuples for keys of this DAWG
+        that are prefixes of the ``key``. Values are collected while
+        ``key`` is traversed once.
+        """
+        return [
+            (prefix, self._value_for_index(index))
+            for prefix, index in self._prefix_matches(key)
+        ]
+
+    def prefix_values(self, key):
+        """
+        Returns a list of values for keys of this DAWG
+        that are prefixes of the ``key``.
+        """
+        return [
+            self._value_for_index(index)
+            for prefix, index in self._prefix_matches(key)
+        ]
+
+    def longest_prefix(self, key, default=None):
+        """
+        Returns a (prefix, value) tuple for the longest key of this DAWG
+        that is a prefix of the ``key`` or ``default`` if there is none.
+        """
+        matches = self._prefix_matches(key)
+        if not matches:
+            return default
+        prefix, index = matches[-1]
+        return prefix, self._value_for_index(index)
 
+    def fuzzy_items(self, key, max_distance=1, transpositions=False, limit=None):
+        """
+        Returns a list of (key, value) tuples for keys within
+        ``max_distance`` edits from ``key``. See ``DAWG.fuzzy_keys``.
+        """
+        res = []
+        matches = self._fuzzy(key, max_distance, transpositions)
+        for b_key, index in itertools.islice(matches, limit):
+            index = self.dct.follow_bytes(self._payload_separator, index)
+            res.append((b_key.decode('utf8'), self._value_for_index(index)))
         return res
 
+    def similar_items(self, key, replaces):
+        """
+        Returns a list of (key, value) tuples for all variants of ``key``
+        in this DAWG according to ``replaces``.
+
+        ``replaces`` is an object obtained from
+        ``DAWG.compile_replaces(mapping)``.
+        """
+        return [
+            (b_variant.decode('utf8'), self._value_for_index(index))
+            for b_variant, index in self._similar(key, replaces)
+        ]
+
     def similar_item_values(self, key, replaces):
         """
         Returns a list of values for all variants of the ``key``
         in this DAWG according to ``replaces``.
 
         ``replaces`` is an object obtained from
-        ``DAWG.compile_replaces(mapping)`` where mapping is a dict
-        that maps single-char unicode sitrings to another single-char
-        unicode strings.
+        ``DAWG.compile_replaces(mapping)``.
         """
-        return self._similar_item_values(0, key, self.dct.ROOT, replaces)
+        return [self._value_for_index(index) for b_variant, index in self._similar(key, replaces)]
 
 
 class RecordDAWG(BytesDAWG):
-    def __init__(self, fmt, payload_separator=PAYLOAD_SEPARATOR):
-        super(RecordDAWG, self).__init__(payload_separator)
+    def __init__(self, fmt, payload_separator=PAYLOAD_SEPARATOR, payload_mode=PAYLOAD_DECODED):
         self._struct = struct.Struct(str(fmt))
         self.fmt = fmt
+        super(RecordDAWG, self).__init__(payload_separator, payload_mode)
 
-    def _value_for_index(self, index):
-        value = super(RecordDAWG, self)._value_for_index(index)
-        return [self._struct.unpack(val) for val in value]
+    def _init_args(self):
+        return (self.fmt, self._payload_separator, self.payload_mode)
 
-    def items(self, prefix=""):
-        res = super(RecordDAWG, self).items(prefix)
-        return [(key, self._struct.unpack(val)) for (key, val) in res]
+    def _build_items(self, data):
+        pack = self._struct.pack
+        return super(RecordDAWG, self)._build_items(
+            (key, pack(*values)) for key, values in data
+        )
 
-    def iteritems(self, prefix=""):
-        res = super(RecordDAWG, self).iteritems(prefix)
-        return ((key, self._struct.unpack(val)) for (key, val) in res)
+    def decode_payload(self, raw):
+        """
+        Decodes a raw (base64-encoded) payload into a tuple.
+        """
+        return self._struct.unpack(a2b_base64(bytes(raw)))
+
+    def items_array(self, prefix=""):
+        """
+        Returns a ``(keys, records)`` tuple for all items with keys
+        starting with ``prefix``: ``keys`` is a list of keys and
+        ``records`` is a NumPy structured array with fields 'f0', 'f1', ...
+        for values in each record. Payloads are decoded in a single
+        vectorized step; NumPy is required.
+        """
+        from . import vectorized
+        if not isinstance(prefix, bytes):
+            prefix = prefix.encode('utf8')
+        keys, payloads = [], []
+
+        index = self.dct.follow_bytes(prefix, self.dct.ROOT)
+        if index is not None:
+            completer = wrapper.Completer(self.dct, self.guide)
+            completer.start(index, prefix)
+            while completer.next():
+                key, value = completer.key.split(self._payload_separator)
+                keys.append(key.decode('utf8'))
+                payloads.append(value)
+
+        return keys, vectorized.decode_records(payloads, self.dtype())
+
+    def get_many_array(self, keys):
+        """
+        Returns a ``(positions, records)`` tuple with records for all
+        of ``keys``: ``records`` is a NumPy structured array (see
+        ``items_array``) and ``positions`` is an ``np.int64`` array with
+        a position in ``keys`` for each record. Keys which are not found
+        have no records. NumPy is required.
+        """
+        import numpy as np
+        from . import vectorized
+        positions, payloads = [], []
+
+        completer = wrapper.Completer(self.dct, self.guide)
+        for pos, index in enumerate(self._follow_many(_encode_keys(keys))):
+            if index is not None:
+                index = self.dct.follow_bytes(self._payload_separator, index)
+            if not index:
+                continue
+
+            completer.start(index)
+            while completer.next():
+                positions.append(pos)
+                payloads.append(bytes(completer.key))
+
+        records = vectorized.decode_records(payloads, self.dtype())
+        return np.array(positions, dtype=np.int64), records
+
+    def dtype(self):
+        """
+        Returns a NumPy structured dtype for records of this DAWG.
+        """
+        from . import vectorized
+        return vectorized.record_dtype(self.fmt)
 
 
 LOOKUP_ERROR = -1
@@ -438,6 +1200,14 @@ class IntDAWG(DAWG):
     Dict-like class based on DAWG.
     It can store integer values for unicode keys.
     """
+    def _build_items(self, data):
+        if isinstance(data, Mapping):
+            data = data.items()
+        for key, value in data:
+            if not isinstance(key, bytes):
+                key = key.encode('utf8')
+            yield key, value
+
     def __getitem__(self, key):
         res = self.get(key, LOOKUP_ERROR)
         if res == LOOKUP_ERROR:
@@ -458,13 +1228,84 @@ class IntDAWG(DAWG):
     def b_get_value(self, key):
         return self.dct.find(key)
 
+    def get_many(self, keys, default=None):
+        """
+        Returns a list with values for each of ``keys``
+        (``default`` for keys which are not found).
+        """
+        dct = self.dct
+        res = []
+        for index in self._follow_many(_encode_keys(keys)):
+            if index is None or not dct.has_value(index):
+                res.append(default)
+            else:
+                res.append(dct.value(index))
+        return res
+
+    def iter_matches(self, text, longest=False, overlapping=True):
+        """
+        Yields a ``(start, end, key, value)`` tuple for every key
+        which occurs in ``text``. See ``DAWG.iter_matches``.
+        """
+        value = self.dct.value
+        for start, end, b_key, index in self._scan(text, longest, overlapping):
+            yield start, end, b_key.decode('utf8'), value(index)
+
+    def prefix_items(self, key):
+        """
+        Returns a list of (prefix, value) tuples for keys of this DAWG
+        that are prefixes of the ``key``. Values are collected while
+        ``key`` is traversed once.
+        """
+        value = self.dct.value
+        return [(prefix, value(index)) for prefix, index in self._prefix_matches(key)]
+
+    def prefix_values(self, key):
+        """
+        Returns a list of values for keys of this DAWG
+        that are prefixes of the ``key``.
+        """
+        value = self.dct.value
+        return [value(index) for prefix, index in self._prefix_matches(key)]
+
+    def longest_prefix(self, key, default=None):
+        """
+        Returns a (prefix, value) tuple for the longest key of this DAWG
+        that is a prefix of the ``key`` or ``default`` if there is none.
+        """
+        matches = self._prefix_matches(key)
+        if not matches:
+            return default
+        prefix, index = matches[-1]
+        return prefix, self.dct.value(index)
+
+    def fuzzy_items(self, key, max_distance=1, transpositions=False, limit=None):
+        """
+        Returns a list of (key, value) tuples for keys within
+        ``max_distance`` edits from ``key``. See ``DAWG.fuzzy_keys``.
+        """
+        matches = self._fuzzy(key, max_distance, transpositions)
+        return [
+            (b_key.decode('utf8'), self.dct.value(index))
+            for b_key, index in itertools.islice(matches, limit)
+        ]
+
+    def get_many_array(self, keys):
+        """
+        Returns an ``np.int64`` array with values for each of ``keys``
+        (-1 for keys which are not found). Keys are looked up in
+        batches using vectorized operations; NumPy is required.
+        """
+        from . import vectorized
+        return vectorized.find(self.dct, _encode_keys(keys))
+
 
 class IntCompletionDAWG(CompletionDAWG, IntDAWG):
     """
     Dict-like class based on DAWG.
     It can store integer values for unicode keys and support key completion.
     """
-    def items(self, prefix=""):
+    def items(self, prefix="", limit=None):
         if not isinstance(prefix, bytes):
             prefix = prefix.encode('utf8')
         res = []
@@ -478,7 +1319,7 @@ class IntCompletionDAWG(CompletionDAWG, IntDAWG):
         completer = wrapper.Completer(self.dct, self.guide)
         completer.start(index, prefix)
 
-        while completer.next():
+        while len(res) != limit and completer.next():
             res.append(
                 (completer.key.decode('utf8'), completer.value())
             )
@@ -500,3 +1341,128 @@ class IntCompletionDAWG(CompletionDAWG, IntDAWG):
 
         while completer.next():
             yield completer.key.decode('utf8'), completer.value()
+
+    def values(self, prefix="", limit=None):
+        """
+        Returns a list of values for keys which start with ``prefix``
+        (in the order of ``items``); keys are not decoded.
+        """
+        if not isinstance(prefix, bytes):
+            prefix = prefix.encode('utf8')
+        res = []
+        index = self.dct.ROOT
+
+        if prefix:
+            index = self.dct.follow_bytes(prefix, index)
+            if not index:
+                return res
+
+        completer = wrapper.Completer(self.dct, self.guide)
+        completer.start(index, prefix)
+
+        while len(res) != limit and completer.next():
+            res.append(completer.value())
+
+        return res
+
+    def itervalues(self, prefix=""):
+        if not isinstance(prefix, bytes):
+            prefix = prefix.encode('utf8')
+        index = self.dct.ROOT
+
+        if prefix:
+            index = self.dct.follow_bytes(prefix, index)
+            if not index:
+                return
+
+        completer = wrapper.Completer(self.dct, self.guide)
+        completer.start(index, prefix)
+
+        while completer.next():
+            yield completer.value()
+
+    def items_page(self, prefix="", limit=10, cursor=None):
+        """
+        Returns an ``(items, cursor)`` tuple with at most ``limit``
+        items for keys which start with ``prefix``.
+        See ``keys_page`` for details.
+        """
+        return self._page(prefix, limit, cursor, self._completion_item)
+
+    def _completion_item(self, completer):
+        return completer.key.decode('utf8'), completer.value()
+
+    def sum_values(self, prefix=""):
+        """
+        Returns the sum of values for all keys which start with ``prefix``.
+
+        Subtree sums are computed on the first call and cached;
+        after that ``sum_values`` takes O(len(prefix)) time.
+        """
+        index = self._follow_prefix(prefix)
+        if index is None:
+            return 0
+        return self._subtree_index('sum', 'q', self.dct.value, sum)[index]
+
+    def top_k(self, prefix="", k=10):
+        """
+        Returns a list of at most ``k`` (key, value) pairs with the largest
+        values among keys which start with ``prefix``, sorted by value
+        in descending order (keys with equal values are sorted
+        alphabetically).
+
+        Maximum values for all subtrees are computed on the first call
+        and cached; the search then visits only the most promising
+        subtrees, so its cost depends on ``k`` rather than on the
+        number of completions.
+        """
+        if not isinstance(prefix, bytes):
+            prefix = prefix.encode('utf8')
+        res = []
+
+        index = self.dct.follow_bytes(prefix, self.dct.ROOT)
+        if index is None or k < 1 or not self.guide.size():
+            return res
+
+        maxima = self._subtree_index('max', 'i', self.dct.value, max)
+
+        # (-value, key, is_terminal, index); for equal keys a node
+        # is expanded before its own terminal is taken
+        heap = [(-maxima[index], prefix, False, index)]
+        while heap:
+            value, key, is_terminal, index = heapq.heappop(heap)
+            if is_terminal:
+                res.append((key.decode('utf8'), -value))
+                if len(res) == k:
+                    break
+                continue
+
+            if self.dct.has_value(index):
+                heapq.heappush(heap, (-self.dct.value(index), key, True, index))
+            for label, child in self.guide.children(self.dct, index):
+                heapq.heappush(heap, (-maxima[child], key + struct.pack(str("B"), label), False, child))
+
+        return res
+
+
+DAWG_CLASSES = {
+    'DAWG': DAWG,
+    'CompletionDAWG': CompletionDAWG,
+    'BytesDAWG': BytesDAWG,
+    'RecordDAWG': RecordDAWG,
+    'IntDAWG': IntDAWG,
+    'IntCompletionDAWG': IntCompletionDAWG,
+}
+
+
+def new_dawg(cls_spec):
+    """
+    Returns a new DAWG object; ``cls_spec`` is a class name,
+    with a struct format for RecordDAWG (e.g. 'RecordDAWG:<H').
+    """
+    name, _, fmt = cls_spec.partition(':')
+    if name not in DAWG_CLASSES:
+        raise ValueError("Unknown DAWG class: %s" % name)
+    if name == 'RecordDAWG':
+        return DAWG_CLASSES[name](str(fmt))
+    return DAWG_CLASSES[name]()
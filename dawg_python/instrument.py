@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of DAWG lookups::
+
+    from dawg_python import instrument
+
+    instrument.enable()
+    ...                                 # use DAWGs as usual
+    print(instrument.to_prometheus())   # or instrument.stats()
+    instrument.disable()
+
+``enable`` replaces methods of ``wrapper.Dictionary``,
+``wrapper.Completer`` and DAWG classes with instrumented versions
+which count
+
+* ``transitions`` - dictionary transitions followed (``follow_char``
+  and ``children``; inlined loops of ``follow_bytes``, ``follow_many``
+  and ``prefix_indices`` are replaced with ``follow_char`` calls);
+* ``completer_steps`` - ``Completer.next`` calls;
+* ``payload_decodes`` - base64 payload decodes;
+
+and record latencies of public DAWG methods (except generators and
+loading) in histograms. Results of the methods are the same.
+Transitions followed by NumPy in ``IntDAWG.get_many_array`` are not
+counted.
+``disable`` restores the original methods, so disabled
+instrumentation costs nothing. Counters are shared by all threads
+and are not updated atomically.
+"""
+from __future__ import absolute_import, unicode_literals
+import json
+import time
+import bisect
+import inspect
+import functools
+import threading
+import binascii
+
+from . import wrapper, dawgs
+
+# upper bounds (in seconds) of latency histogram buckets
+BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0,
+)
+COUNTERS = ('transitions', 'completer_steps', 'payload_decodes')
+
+# methods which are not timed
+UNTIMED_METHODS = frozenset(['load', 'read', 'write', 'frombytes', 'tobytes', 'close'])
+
+_timer = getattr(time, 'perf_counter', time.time)
+_counters = dict.fromkeys(COUNTERS, 0)
+_latencies = {}  # method name -> [bucket counts, sum, count]
+_active = threading.local()
+_originals = []  # (owner, name, original value)
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def enable():
+    "Installs instrumented methods (does nothing if they are installed)."
+    if _originals:
+        return
+
+    for cls in (wrapper.Dictionary, wrapper.DecodedDictionary):
+        _patch(cls, 'follow_char', _counting_follow_char(cls.__dict__['follow_char']))
+        _patch(cls, 'follow_bytes', _follow_bytes)
+        _patch(cls, 'follow_many', _follow_many)
+        _patch(cls, 'prefix_indices', _prefix_indices)
+    _patch(wrapper.Dictionary, 'children', _counting_children(wrapper.Dictionary.__dict__['children']))
+    _patch(wrapper.Completer, 'next', _counting_next(wrapper.Completer.__dict__['next']))
+    # dawg_python.vectorized also decodes payloads with dawgs.a2b_base64
+    _patch(dawgs, 'a2b_base64', _counting_a2b_base64)
+
+    for cls in dawgs.DAWG_CLASSES.values():
+        for name, func in list(cls.__dict__.items()):
+            if _is_timed(name, func):
+                _patch(cls, name, _timed(name, func))
+
+
+def disable():
+    "Restores the original methods; collected stats are kept."
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+
+
+def reset():
+    "Clears collected stats."
+    for name in COUNTERS:
+        _counters[name] = 0
+    _latencies.clear()
+
+
+def stats():
+    """
+    Returns a snapshot of collected stats: a dict with counters and
+    ``'latency'`` - a dict ``{method: {'count': ..., 'sum': ...,
+    'buckets': [[upper bound, cumulative count], ...]}}``; upper bounds
+    are strings (as in Prometheus), the last one is ``'+Inf'``.
+    """
+    res = dict(_counters)
+    res['latency'] = {}
+    for method, (counts, total, count) in list(_latencies.items()):
+        buckets = []
+        cumulative = 0
+        for bound, bucket_count in zip(_bucket_names(), counts):
+            cumulative += bucket_count
+            buckets.append([bound, cumulative])
+        res['latency'][method] = {'count': count, 'sum': total, 'buckets': buckets}
+    return res
+
+
+def to_json():
+    "Returns ``stats()`` as JSON."
+    return json.dumps(stats(), sort_keys=True)
+
+
+def to_prometheus(prefix='dawg_python'):
+    "Returns ``stats()`` in Prometheus text exposition format."
+    snapshot = stats()
+    lines = []
+    for name in COUNTERS:
+        metric = '%s_%s_total' % (prefix, name)
+        lines += ['# TYPE %s counter' % metric, '%s %d' % (metric, snapshot[name])]
+
+    metric = '%s_method_seconds' % prefix
+    lines.append('# TYPE %s histogram' % metric)
+    for method, histogram in sorted(snapshot['latency'].items()):
+        for bound, count in histogram['buckets']:
+            lines.append('%s_bucket{method="%s",le="%s"} %d' % (metric, method, bound, count))
+        lines.append('%s_sum{method="%s"} %r' % (metric, method, histogram['sum']))
+        lines.append('%s_count{method="%s"} %d' % (metric, method, histogram['count']))
+    return '\n'.join(lines) + '\n'
+
+
+def _bucket_names():
+    return ['%g' % bound for bound in BUCKETS] + ['+Inf']
+
+
+def _patch(owner, name, value):
+    _originals.append((owner, name, vars(owner)[name]))
+    setattr(owner, name, value)
+
+
+def _is_timed(name, func):
+    if name not in ('__contains__', '__getitem__') and name.startswith('_'):
+        return False
+    return (
+        inspect.isfunction(func) and name not in UNTIMED_METHODS
+        and not inspect.isgeneratorfunction(func)
+    )
+
+
+def _record(method, elapsed):
+    latency = _latencies.get(method)
+    if latency is None:
+        latency = _latencies.setdefault(method, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+    latency[0][bisect.bisect_left(BUCKETS, elapsed)] += 1
+    latency[1] += elapsed
+    latency[2] += 1
+
+
+def _timed(name, func):
+    @functools.wraps(func)
+    def timed(self, *args, **kwargs):
+        method = '%s.%s' % (self.__class__.__name__, name)
+        active = getattr(_active, 'methods', None)
+        if active is None:
+            active = _active.methods = set()
+        if method in active:
+            # e.g. a method which calls the same method of a base class
+            return func(self, *args, **kwargs)
+
+        active.add(method)
+        start = _timer()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            _record(method, _timer() - start)
+            active.discard(method)
+    return timed
+
+
+def _counting_follow_char(follow_char):
+    def counting_follow_char(self, label, index):
+        _counters['transitions'] += 1
+        return follow_char(self, label, index)
+    return counting_follow_char
+
+
+def _counting_children(children):
+    def counting_children(self, index):
+        for label, next_index in children(self, index):
+            _counters['transitions'] += 1
+            yield label, next_index
+    return counting_children
+
+
+def _counting_next(next_):
+    def counting_next(self):
+        _counters['completer_steps'] += 1
+        return next_(self)
+    return counting_next
+
+
+def _counting_a2b_base64(data):
+    _counters['payload_decodes'] += 1
+    return binascii.a2b_base64(data)
+
+
+# follow_bytes, follow_many and prefix_indices of Dictionary and DecodedDictionary
+# with transitions followed by (counted) follow_char calls
+
+def _follow_bytes(self, s, index):
+    if index == self.ROOT and self._jump_table is not None:
+        index = self._jump_table.get(bytes(s[:self.jump_depth]))
+        if index is None:
+            return None
+        s = s[self.jump_depth:]
+
+    for label in bytearray(s):
+        index = self.follow_char(label, index)
+        if index is None:
+            return None
+    return index
+
+
+def _follow_many(self, keys, index):
+    path = [index]
+    prev = b""
+    for key in keys:
+        common = 0
+        max_common = min(len(prev), len(key), len(path) - 1)
+        while common < max_common and prev[common] == key[common]:
+            common += 1
+        del path[common+1:]
+
+        index = path[common]
+        for label in bytearray(key[common:]):
+            index = self.follow_char(label, index)
+            if index is None:
+                break
+            path.append(index)
+
+        yield index
+        prev = key
+
+
+def _prefix_indices(self, s, start=0, terminal_label=None):
+    res, index, start = self._jump_prefix_indices(s, start, terminal_label)
+    if index is None:
+        return res
+
+    for pos in range(start, len(s)):
+        index = self.follow_char(s[pos], index)
+        if index is None:
+            break
+        if terminal_label is None:
+            if self.has_value(index):
+                res.append((pos + 1, index))
+        else:
+            terminal = self.follow_char(terminal_label, index)
+            if terminal is not None:
+                res.append((pos + 1, terminal))
+    return res
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Mutable overlay over an immutable DAWG::
+
+    d = OverlayDAWG(dawg_python.RecordDAWG('<H').load('words.dawg'))
+    d['new word'] = [(8,)]
+    del d['old word']
+    d.compact('words.dawg')   # writes a DAWG with all changes applied
+
+Changes are kept in memory (in a dict and a sorted list of changed
+keys) and take precedence over the DAWG: ``get``, ``in``, ``keys``
+and ``items`` return merged results, in the same order as the DAWG.
+The overlay is meant for a relatively small number of changes;
+``compact`` them into a new DAWG periodically.
+"""
+from __future__ import absolute_import, unicode_literals
+import os
+import bisect
+import struct
+import itertools
+from binascii import b2a_base64
+
+from . import builder
+from .dawgs import BytesDAWG, RecordDAWG, IntCompletionDAWG, PAYLOAD_DECODED
+
+_DELETED = object()
+_MISSING = object()
+
+
+class OverlayDAWG(object):
+    """
+    Overlay of inserted, updated and deleted keys over ``dawg``
+    (a ``BytesDAWG``, ``RecordDAWG`` or ``IntCompletionDAWG``).
+
+    Values are the same as values returned by ``dawg.get``: lists of
+    payloads for ``BytesDAWG`` (tuples for ``RecordDAWG``) and integers
+    for ``IntCompletionDAWG``. Setting a key replaces all its values;
+    payloads are reordered as they would be in the DAWG.
+    """
+
+    def __init__(self, dawg):
+        if isinstance(dawg, BytesDAWG):
+            if dawg.payload_mode != PAYLOAD_DECODED:
+                raise ValueError("Only DAWGs with decoded payloads are supported")
+            self._multi_value = True
+        elif isinstance(dawg, IntCompletionDAWG):
+            self._multi_value = False
+        else:
+            raise TypeError("BytesDAWG, RecordDAWG or IntCompletionDAWG is required")
+        self.dawg = dawg
+        self._changes = {}
+        self._changed_keys = []
+
+    def num_changes(self):
+        "Returns the number of changed (inserted, updated or deleted) keys."
+        return len(self._changes)
+
+    def __setitem__(self, key, value):
+        key = _decode_key(key)
+        if not key:
+            raise ValueError("Empty keys are not supported")
+        if self._multi_value:
+            # payloads are kept in the DAWG order (by base64-encoded raw
+            # keys), so that it doesn't change after compact
+            payloads = sorted((self._payload(key, item) for item in value), key=lambda pair: pair[0])
+            if not payloads:
+                raise ValueError("Value for %r is empty; use del to delete a key" % key)
+            value = [item for raw, item in payloads]
+        elif (isinstance(value, bool) or not isinstance(value, int)
+                or not 0 <= value <= builder.MAX_VALUE):
+            raise ValueError("Values must be integers in range [0, %d]" % builder.MAX_VALUE)
+        self._change(key, value)
+
+    def _payload(self, key, item):
+        # returns (encoded payload, payload); payloads are checked when
+        # they are set, not when they are compacted
+        try:
+            if isinstance(self.dawg, RecordDAWG):
+                item = tuple(item)
+                raw = self.dawg._struct.pack(*item)
+            else:
+                raw = item = memoryview(item).tobytes()
+        except (TypeError, struct.error) as e:
+            raise ValueError("Invalid payload for %r: %s" % (key, e))
+        return b2a_base64(raw), item
+
+    def __delitem__(self, key):
+        key = _decode_key(key)
+        if key not in self:
+            raise KeyError(key)
+        self._change(key, _DELETED)
+
+    def _change(self, key, value):
+        if key not in self._changes:
+            bisect.insort(self._changed_keys, key)
+        self._changes[key] = value
+
+    def __contains__(self, key):
+        if self._changes:
+            value = self._changes.get(_decode_key(key), _MISSING)
+            if value is not _MISSING:
+                return value is not _DELETED
+        return key in self.dawg
+
+    def __getitem__(self, key):
+        res = self.get(key, _MISSING)
+        if res is _MISSING:
+            raise KeyError(key)
+        return res
+
+    def get(self, key, default=None):
+        """
+        Returns a value for the given key or ``default``
+        if the key is not found (or deleted).
+        """
+        if self._changes:
+            value = self._changes.get(_decode_key(key), _MISSING)
+            if value is _DELETED:
+                return default
+            if value is not _MISSING:
+                return value
+        return self.dawg.get(key, default)
+
+    def keys(self, prefix="", limit=None):
+        return list(itertools.islice(self.iterkeys(prefix), limit))
+
+    def iterkeys(self, prefix=""):
+        for key, value in self.iteritems(prefix):
+            yield key
+
+    def items(self, prefix="", limit=None):
+        return list(itertools.islice(self.iteritems(prefix), limit))
+
+    def iteritems(self, prefix=""):
+        """
+        Yields (key, value) pairs of the DAWG merged with changed
+        keys; there are several pairs for keys with several payloads.
+        """
+        prefix = _decode_key(prefix)
+        items = self.dawg.iteritems(prefix)
+
+        # unicode order of keys is the same as the order of their
+        # utf8 encodings in the DAWG
+        start = bisect.bisect_left(self._changed_keys, prefix)
+        changed_keys = itertools.takewhile(
+            lambda key: key.startswith(prefix),
+            itertools.islice(self._changed_keys, start, None)
+        )
+        changed_key = next(changed_keys, None)
+        if changed_key is None:
+            for item in items:
+                yield item
+            return
+
+        for key, value in items:
+            while changed_key is not None and changed_key <= key:
+                for item in self._changed_items(changed_key):
+                    yield item
+                changed_key = next(changed_keys, None)
+            if key not in self._changes:
+                yield key, value
+
+        while changed_key is not None:
+            for item in self._changed_items(changed_key):
+                yield item
+            changed_key = next(changed_keys, None)
+
+    def _changed_items(self, key):
+        value = self._changes[key]
+        if value is _DELETED:
+            return []
+        if self._multi_value:
+            return [(key, item) for item in value]
+        return [(key, value)]
+
+    def compact(self, path=None):
+        """
+        Builds a new DAWG with all changes applied (with
+        ``dawg_python.builder``), makes it the DAWG of this overlay
+        and discards the changes.
+
+        If ``path`` is given, the new DAWG is written to this file
+        (atomically: the file is replaced only when it is fully written).
+        Returns the new DAWG; the old one is not closed.
+        """
+        dawg = self.dawg.__class__(*self.dawg._init_args())
+        builder.build(dawg, self.iteritems(), input_is_sorted=True)
+
+        if path is not None:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                dawg.write(f)
+            os.replace(tmp_path, path)
+
+        self.dawg = dawg
+        self._changes = {}
+        self._changed_keys = []
+        return dawg
+
+
+def _decode_key(key):
+    if isinstance(key, bytes):
+        return key.decode('utf8')
+    return key
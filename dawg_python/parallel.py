@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel batch queries.
+
+``Executor`` splits a (possibly very large) iterable of queries into
+chunks, runs them in a pool of worker processes or threads and yields
+results in the order of queries. Each worker process gets its own copy
+of the DAWG once, when it starts: DAWGs loaded with ``mmap=True`` are
+passed as a path and mapped again, so their data is shared through
+the OS page cache; other DAWGs are passed as their binary data.
+
+This module requires ``concurrent.futures`` (Python 3.2+ or the
+``futures`` backport).
+"""
+from __future__ import absolute_import, unicode_literals
+import itertools
+import collections
+import functools
+import multiprocessing
+from concurrent import futures
+
+# batch methods used for chunks of queries instead of per-query calls
+BATCH_METHODS = {
+    'get': 'get_many',
+    'contains': 'contains_many',
+}
+
+_worker_dawg = None
+
+
+def _init_worker(dawg):
+    global _worker_dawg
+    _worker_dawg = dawg
+
+
+def _run_chunk(method, chunk, args, dawg=None):
+    if dawg is None:
+        dawg = _worker_dawg
+
+    if method in BATCH_METHODS:
+        return getattr(dawg, BATCH_METHODS[method])(chunk, *args)
+
+    func = getattr(dawg, method)
+    return [func(query, *args) for query in chunk]
+
+
+def _chunks(iterable, chunk_size):
+    iterable = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterable, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Executor(object):
+    """
+    Runs queries against ``dawg`` in parallel.
+
+    ``kind`` is 'process' (default) or 'thread'; threads only scale
+    on Python builds without the GIL. ``workers`` defaults to the number
+    of CPUs. Queries are sent to workers in chunks of ``chunk_size``
+    and at most ``max_pending`` chunks (2 per worker by default) are
+    queued or held in memory at a time.
+    """
+
+    def __init__(self, dawg, workers=None, kind='process', chunk_size=1000, max_pending=None):
+        if kind not in ('process', 'thread'):
+            raise ValueError("kind must be 'process' or 'thread'")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        self.workers = workers or multiprocessing.cpu_count()
+        self.kind = kind
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * self.workers
+
+        if kind == 'process':
+            self._pool = futures.ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(dawg,)
+            )
+            self._run = _run_chunk
+        else:
+            # threads share the DAWG
+            self._pool = futures.ThreadPoolExecutor(self.workers)
+            self._run = functools.partial(_run_chunk, dawg=dawg)
+
+    def map(self, method, queries, *args):
+        """
+        Yields results of ``dawg.<method>(query, *args)`` for each of
+        ``queries``, in order. ``method`` may also be 'contains'.
+        """
+        pending = collections.deque()
+        for chunk in _chunks(queries, self.chunk_size):
+            pending.append(self._pool.submit(self._run, method, chunk, args))
+            if len(pending) >= self.max_pending:
+                for res in pending.popleft().result():
+                    yield res
+
+        while pending:
+            for res in pending.popleft().result():
+                yield res
+
+    def get(self, keys, default=None):
+        "Yields values for each of ``keys``."
+        return self.map('get', keys, default)
+
+    def contains(self, keys):
+        "Yields booleans: whether each of ``keys`` is in the DAWG."
+        return self.map('contains', keys)
+
+    def keys(self, prefixes):
+        "Yields lists of keys for each of ``prefixes``."
+        return self.map('keys', prefixes)
+
+    def similar_items(self, keys, replaces):
+        "Yields results of ``similar_items`` for each of ``keys``."
+        return self.map('similar_items', keys, replaces)
+
+    def close(self):
+        "Shuts the workers down."
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
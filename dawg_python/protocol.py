@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Wire protocol of the lookup server (see ``dawg_python.serve``).
+
+Each message is a frame: a 4-byte big-endian length followed by
+a value encoded with ``dumps``. Requests are
+``(request_id, dawg_name, method, args)`` tuples and responses are
+``(request_id, status, result)`` tuples; ``status`` is ``OK`` or
+``ERROR`` (``result`` is an error message then).
+
+The codec supports None, bools, ints, floats, unicode strings, bytes,
+lists, tuples and dicts; unlike pickle, decoding can't run any code.
+"""
+from __future__ import absolute_import, unicode_literals
+import struct
+
+OK = 0
+ERROR = 1
+
+MAX_FRAME_SIZE = 1 << 30
+
+_LENGTH = struct.Struct(str(">I"))
+_INT = struct.Struct(str(">q"))
+_FLOAT = struct.Struct(str(">d"))
+
+HEADER_SIZE = _LENGTH.size
+
+_NONE = b'N'
+_TRUE = b'T'
+_FALSE = b'F'
+_INT_TAG = b'i'
+_BIG_INT_TAG = b'I'
+_FLOAT_TAG = b'f'
+_STR_TAG = b's'
+_BYTES_TAG = b'b'
+_LIST_TAG = b'l'
+_TUPLE_TAG = b't'
+_DICT_TAG = b'd'
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def dumps(value):
+    "Encodes a value."
+    parts = []
+    _encode(value, parts)
+    return b"".join(parts)
+
+
+def loads(data):
+    "Decodes a value encoded with ``dumps``."
+    data = memoryview(data)
+    value, pos = _decode(data, 0)
+    if pos != len(data):
+        raise ProtocolError("Trailing data")
+    return value
+
+
+def frame(value):
+    "Encodes a value as a frame."
+    data = dumps(value)
+    return _LENGTH.pack(len(data)) + data
+
+
+def frame_size(header):
+    "Returns a size of frame data for a 4-byte frame header."
+    size = _LENGTH.unpack(header)[0]
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError("Frame is too large: %d bytes" % size)
+    return size
+
+
+def _encode(value, parts):
+    if value is None:
+        parts.append(_NONE)
+    elif value is True:
+        parts.append(_TRUE)
+    elif value is False:
+        parts.append(_FALSE)
+    elif isinstance(value, int):
+        if -2**63 <= value < 2**63:
+            parts.append(_INT_TAG)
+            parts.append(_INT.pack(value))
+        else:
+            _encode_bytes(_BIG_INT_TAG, str(value).encode('ascii'), parts)
+    elif isinstance(value, float):
+        parts.append(_FLOAT_TAG)
+        parts.append(_FLOAT.pack(value))
+    elif isinstance(value, str):
+        _encode_bytes(_STR_TAG, value.encode('utf8'), parts)
+    elif isinstance(value, (bytes, bytearray)):
+        _encode_bytes(_BYTES_TAG, bytes(value), parts)
+    elif isinstance(value, (list, tuple)):
+        parts.append(_LIST_TAG if isinstance(value, list) else _TUPLE_TAG)
+        parts.append(_LENGTH.pack(len(value)))
+        for item in value:
+            _encode(item, parts)
+    elif isinstance(value, dict):
+        parts.append(_DICT_TAG)
+        parts.append(_LENGTH.pack(len(value)))
+        for key, item in value.items():
+            _encode(key, parts)
+            _encode(item, parts)
+    else:
+        raise TypeError("Can't encode %r" % (value,))
+
+
+def _encode_bytes(tag, data, parts):
+    parts.append(tag)
+    parts.append(_LENGTH.pack(len(data)))
+    parts.append(data)
+
+
+def _decode(data, pos):
+    try:
+        tag = data[pos:pos+1].tobytes()
+        pos += 1
+
+        if tag == _NONE:
+            return None, pos
+        if tag == _TRUE:
+            return True, pos
+        if tag == _FALSE:
+            return False, pos
+        if tag == _INT_TAG:
+            return _INT.unpack_from(data, pos)[0], pos + _INT.size
+        if tag == _FLOAT_TAG:
+            return _FLOAT.unpack_from(data, pos)[0], pos + _FLOAT.size
+
+        length = _LENGTH.unpack_from(data, pos)[0]
+        pos += _LENGTH.size
+
+        if tag in (_STR_TAG, _BYTES_TAG, _BIG_INT_TAG):
+            end = pos + length
+            if end > len(data):
+                raise ProtocolError("Unexpected end of data")
+            chunk = data[pos:end].tobytes()
+            if tag == _STR_TAG:
+                return chunk.decode('utf8'), end
+            if tag == _BIG_INT_TAG:
+                return int(chunk), end
+            return chunk, end
+
+        if tag in (_LIST_TAG, _TUPLE_TAG):
+            res = []
+            for x in range(length):
+                item, pos = _decode(data, pos)
+                res.append(item)
+            return (res if tag == _LIST_TAG else tuple(res)), pos
+
+        if tag == _DICT_TAG:
+            res = {}
+            for x in range(length):
+                key, pos = _decode(data, pos)
+                res[key], pos = _decode(data, pos)
+            return res, pos
+
+    except (struct.error, UnicodeDecodeError, ValueError, TypeError, RecursionError) as e:
+        raise ProtocolError("Invalid data: %s" % e)
+
+    raise ProtocolError("Invalid tag: %r" % tag)
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Structural statistics and memory usage of loaded DAWGs::
+
+    from dawg_python import report
+
+    d = dawg_python.RecordDAWG(str('<H')).load('words.dawg', mmap=True)
+    report.describe(d)        # a dict, see ``describe``
+    print(report.memory_report(d))
+
+or from the command line::
+
+    python -m dawg_python.report RecordDAWG:<H words.dawg
+
+Dictionary units are read in a single pass which links units of each
+block; keys and units are then counted by a breadth-first walk which
+visits each node once per depth it is reachable at (shared suffixes
+are not expanded).
+"""
+from __future__ import absolute_import, division, unicode_literals
+import sys
+import json
+import array
+import argparse
+
+from . import units
+from .dawgs import CompletionDAWG, BytesDAWG, new_dawg
+
+
+def describe(dawg):
+    """
+    Returns a dict with statistics of a loaded ``dawg``:
+
+    * ``units`` - the number of dictionary units, ``free_units`` -
+      units which are not used, ``leaf_units`` - units which hold
+      values, ``extension_units`` - units which use offset extension
+      (offsets >= 2 ** 21);
+    * ``guide_units`` - the number of guide units (None for DAWGs
+      without completion support);
+    * ``bytes`` - sizes of ``dictionary`` and ``guide`` data (as in a file),
+      ``payloads`` - the part of them which is used by payloads of
+      BytesDAWG and RecordDAWG, ``memory`` - the size of loaded data
+      (including decoded arrays and the jump table);
+    * ``keys`` - the number of distinct keys, ``values`` - the number of
+      (key, value) pairs;
+    * ``depths`` - ``{key length in bytes: number of keys}``,
+      ``payload_depths`` - ``{encoded payload length: number of values}``
+      (None for DAWGs without payloads);
+    * ``branching`` - ``{number of transitions: number of nodes}``;
+    * ``cost`` - estimated cost of a lookup of an existing key:
+      ``transitions`` followed by ``in`` and ``get`` (including the payload
+      separator), ``unit_reads`` (two per transition) and
+      ``payload_transitions`` followed by ``get`` to enumerate payloads.
+    """
+    dic = dawg.dct
+    separator = None
+    if isinstance(dawg, BytesDAWG):
+        separator = ord(dawg._payload_separator)
+
+    scan = _UnitScan(dic._units)
+    depths, entrances = scan.walk({dic.ROOT: 1} if dic.size() else {}, separator)
+    if not depths:
+        # no values are reachable: units under the root of an empty
+        # dictionary are stale
+        scan.clear()
+    payload_depths = None
+    num_values = sum(depths.values())
+    if separator is not None:
+        payload_units = bytearray(dic.size())
+        payload_depths, _ = scan.walk(entrances, None, payload_units)
+        num_values = sum(payload_depths.values())
+        num_payload_units = dic.size() - payload_units.count(0)
+
+    guide = dawg.guide if isinstance(dawg, CompletionDAWG) else None
+    guide_size = guide.size() if guide is not None else 0
+
+    res = {
+        'units': dic.size(),
+        'free_units': dic.size() - scan.num_used,
+        'leaf_units': scan.num_leaves,
+        'extension_units': scan.num_extensions,
+        'guide_units': guide_size // 2 if guide is not None else None,
+        'bytes': {
+            'dictionary': 4 + dic.size() * 4,
+            'guide': 4 + guide_size if guide is not None else 0,
+            'payloads': (
+                num_payload_units * (6 if guide is not None else 4)
+                if separator is not None else 0
+            ),
+            'memory': dic.nbytes() + guide_size,
+        },
+        'keys': sum(depths.values()),
+        'values': num_values,
+        'depths': depths,
+        'payload_depths': payload_depths,
+        'branching': scan.branching,
+    }
+
+    transitions = _mean(depths, res['keys'])
+    if separator is not None:
+        transitions += 1
+    res['cost'] = {
+        'transitions': transitions,
+        'unit_reads': transitions * 2,
+        'payload_transitions': (
+            _mean(payload_depths, res['keys'])
+            if separator is not None else 0
+        ),
+    }
+    return res
+
+
+def memory_report(dawg):
+    "Returns ``describe(dawg)`` formatted as text."
+    info = describe(dawg)
+    sizes = info['bytes']
+    lines = [
+        '%s: %d keys, %d values' % (dawg.__class__.__name__, info['keys'], info['values']),
+        'units: %d (%d free, %d leaf, %d with offset extension)' % (
+            info['units'], info['free_units'], info['leaf_units'], info['extension_units']
+        ),
+        'dictionary: %s' % _format_size(sizes['dictionary']),
+    ]
+    if info['guide_units'] is not None:
+        lines.append('guide: %s (%d units)' % (_format_size(sizes['guide']), info['guide_units']))
+    if info['payload_depths'] is not None:
+        lines.append('payloads: %s of dictionary and guide' % _format_size(sizes['payloads']))
+    lines.append('in memory: %s%s' % (
+        _format_size(sizes['memory']),
+        ' (memory-mapped)' if dawg._mmap is not None else ''
+    ))
+
+    lines.append('depths: %s' % _format_histogram(info['depths']))
+    if info['payload_depths'] is not None:
+        lines.append('payload depths: %s' % _format_histogram(info['payload_depths']))
+    lines.append('branching: %s' % _format_histogram(info['branching']))
+
+    cost = info['cost']
+    line = 'lookup (hit): %0.1f transitions, %0.1f unit reads' % (cost['transitions'], cost['unit_reads'])
+    if info['payload_depths'] is not None:
+        line += '; get: +%0.1f payload transitions' % cost['payload_transitions']
+    lines.append(line)
+    return '\n'.join(lines)
+
+
+class _UnitScan(object):
+    """
+    Dictionary units linked by blocks (units which are reachable from
+    nodes with the same offset) in a single pass: ``first[block]`` is an
+    index of the first unit of a block, ``next[index]`` is an index of
+    the next unit of the same block; -1 marks the end.
+
+    Units which are not used still have labels, so units are counted
+    by ``walk`` when they are reached.
+    """
+
+    def __init__(self, dic_units):
+        size = len(dic_units)
+        num_blocks = (size + 0xFF) & ~0xFF
+        first = array.array(str("i"), [-1]) * num_blocks
+        next_ = array.array(str("i"), [-1]) * size
+        num_children = array.array(str("B"), [0]) * num_blocks
+        leaf_bit = units.IS_LEAF_BIT
+
+        for index, base in enumerate(dic_units):
+            label = base & 0xFF
+            if label and not base & leaf_bit:
+                block = index ^ label
+                next_[index] = first[block]
+                first[block] = index
+                num_children[block] += 1
+
+        self._units = dic_units
+        self._first, self._next, self._num_children = first, next_, num_children
+        self.clear()
+
+    def clear(self):
+        "Forgets units counted by ``walk``."
+        self._seen = bytearray(len(self._units))
+        self._seen_blocks = bytearray(len(self._num_children))
+        self.num_used = self.num_leaves = self.num_extensions = 0
+        self.branching = {}
+
+    def walk(self, level, separator, marks=None):
+        """
+        Walks nodes breadth-first from ``level`` (a ``{index: number of
+        paths}`` dict) and returns ``(depths, entrances)``: ``depths`` is
+        ``{depth: number of keys}``, where keys end with a value or with
+        a ``separator`` transition, ``entrances`` is ``{index: number of
+        paths}`` for nodes after separator transitions. Reached units are
+        also marked in ``marks`` if it is given.
+        """
+        dic_units, first, next_ = self._units, self._first, self._next
+        seen, seen_blocks = self._seen, self._seen_blocks
+        depths, entrances = {}, {}
+        depth = 0
+
+        while level:
+            next_level = {}
+            for index, paths in level.items():
+                base = dic_units[index]
+                block = (index ^ units.offset(base)) & units.PRECISION_MASK
+                has_leaf = base & units.HAS_LEAF_BIT
+                if not seen[index]:
+                    seen[index] = 1
+                    self.num_used += 1
+                    if base & units.EXTENSION_BIT:
+                        self.num_extensions += 1
+                if not seen_blocks[block]:
+                    seen_blocks[block] = 1
+                    count = self._num_children[block]
+                    self.branching[count] = self.branching.get(count, 0) + 1
+                    if has_leaf:
+                        # the leaf unit of a node is at its block offset
+                        seen[block] = 1
+                        self.num_used += 1
+                        self.num_leaves += 1
+                if marks is not None:
+                    marks[index] = 1
+                    if has_leaf:
+                        marks[block] = 1
+
+                if has_leaf:
+                    depths[depth] = depths.get(depth, 0) + paths
+
+                child = first[block]
+                while child >= 0:
+                    if dic_units[child] & 0xFF == separator:
+                        depths[depth] = depths.get(depth, 0) + paths
+                        entrances[child] = entrances.get(child, 0) + paths
+                    else:
+                        next_level[child] = next_level.get(child, 0) + paths
+                    child = next_[child]
+
+            level = next_level
+            depth += 1
+
+        return depths, entrances
+
+
+def _mean(histogram, count):
+    if not count:
+        return 0.0
+    return sum(value * num for value, num in histogram.items()) / count
+
+
+def _format_size(size):
+    if size < 2 ** 20:
+        return '%0.1f KB' % (size / 2 ** 10)
+    return '%0.2f MB' % (size / 2 ** 20)
+
+
+def _format_histogram(histogram):
+    return ' '.join('%d:%d' % item for item in sorted(histogram.items())) or '-'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DAWG statistics and memory report")
+    parser.add_argument('cls_spec', metavar='CLASS', help="e.g. IntDAWG or RecordDAWG:<H")
+    parser.add_argument('path', metavar='PATH')
+    parser.add_argument('--decoded', action='store_true', help="load with decoded=True")
+    parser.add_argument('--jump-depth', type=int, default=0, help="load with jump_depth=N")
+    parser.add_argument('--json', action='store_true', help="print describe() as JSON")
+    args = parser.parse_args(argv)
+
+    with new_dawg(args.cls_spec).load(
+            args.path, mmap=True, decoded=args.decoded, jump_depth=args.jump_depth) as dawg:
+        if args.json:
+            sys.stdout.write(json.dumps(describe(dawg), sort_keys=True) + '\n')
+        else:
+            sys.stdout.write(memory_report(dawg) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Lookup server: loads DAWGs once and answers batched queries over
+a Unix socket or TCP (see ``dawg_python.protocol`` for the wire format
+and ``dawg_python.client`` for a client)::
+
+    python -m dawg_python.serve --unix /tmp/dawg.sock \\
+        --dawg words RecordDAWG:<H words.dawg \\
+        --dawg freq IntDAWG freq.dawg
+
+DAWGs are memory-mapped. Requests on a connection are answered in
+order; clients may send several requests without waiting (pipelining).
+"""
+from __future__ import absolute_import, unicode_literals
+import argparse
+import asyncio
+import logging
+import collections
+
+from . import protocol
+from .dawgs import new_dawg
+
+logger = logging.getLogger(__name__)
+
+def load_dawg(cls_spec, path):
+    """
+    Loads a DAWG; ``cls_spec`` is a class name, with a struct format
+    for RecordDAWG (e.g. 'RecordDAWG:<H').
+    """
+    return new_dawg(cls_spec).load(path, mmap=True)
+
+
+class Server(object):
+    """
+    Answers batched queries for ``dawgs`` (a {name: DAWG} dict).
+    Each request has a list of queries and returns a list of results.
+    Up to ``replaces_cache_size`` most recently used compiled
+    replaces (of ``similar_items`` requests) are cached.
+    """
+
+    def __init__(self, dawgs, replaces_cache_size=128):
+        self.dawgs = dawgs
+        self.replaces_cache_size = replaces_cache_size
+        self._replaces = collections.OrderedDict()
+
+    def handle(self, name, method, args):
+        "Runs a single request and returns its result."
+        dawg = self.dawgs[name]
+        if method == 'get':
+            return dawg.get_many(*args)
+        if method == 'contains':
+            return dawg.contains_many(*args)
+        if method == 'keys':
+            prefixes, = args
+            return [dawg.keys(prefix) for prefix in prefixes]
+        if method == 'similar_items':
+            keys, replaces = args
+            replaces = self._compile_replaces(dawg, replaces)
+            return [dawg.similar_items(key, replaces) for key in keys]
+        raise ValueError("Unknown method: %s" % method)
+
+    def _compile_replaces(self, dawg, replaces):
+        cache_key = tuple(sorted(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in replaces.items()
+        ))
+        res = self._replaces.get(cache_key)
+        if res is None:
+            res = dawg.compile_replaces(replaces)
+            self._replaces[cache_key] = res
+            if len(self._replaces) > self.replaces_cache_size:
+                self._replaces.popitem(last=False)
+        else:
+            self._replaces.move_to_end(cache_key)
+        return res
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(protocol.HEADER_SIZE)
+                except asyncio.IncompleteReadError:
+                    break
+                data = await reader.readexactly(protocol.frame_size(header))
+                request_id, name, method, args = protocol.loads(data)
+
+                try:
+                    response = (request_id, protocol.OK, self.handle(name, method, args))
+                except Exception as e:
+                    response = (request_id, protocol.ERROR, "%s: %s" % (e.__class__.__name__, e))
+                writer.write(protocol.frame(response))
+                await writer.drain()
+
+        except (protocol.ProtocolError, ValueError, TypeError, asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.warning("Closing connection: %s", e)
+        finally:
+            writer.close()
+
+    async def start(self, unix_path=None, host='127.0.0.1', port=8379):
+        "Starts serving; returns an ``asyncio.Server``."
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self._serve_connection, unix_path)
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+    async def serve_forever(self, unix_path=None, host='127.0.0.1', port=8379):
+        "Starts serving and runs until cancelled."
+        listener = await self.start(unix_path, host, port)
+        logger.info(
+            "Serving %s on %s", ", ".join(sorted(self.dawgs)),
+            unix_path or "%s:%d" % (host, port)
+        )
+        async with listener:
+            await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DAWG lookup server")
+    parser.add_argument(
+        '--dawg', nargs=3, action='append', required=True,
+        metavar=('NAME', 'CLASS', 'PATH'),
+        help="DAWG to serve; CLASS is e.g. IntDAWG or RecordDAWG:<H"
+    )
+    parser.add_argument('--unix', metavar='PATH', help="Unix socket path")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8379)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = Server(dict(
+        (name, load_dawg(cls_spec, path)) for name, cls_spec, path in args.dawg
+    ))
+
+    try:
+        asyncio.run(server.serve_forever(args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
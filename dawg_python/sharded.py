@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+One logical DAWG split across several DAWG files (shards)::
+
+    sharded.build('words.json', 'RecordDAWG:<H', data, boundaries=['в', 'п'])
+    d = ShardedDAWG().load('words.json', mmap=True)
+    d.get('слово')
+
+Shards are described by a JSON manifest::
+
+    {"class": "RecordDAWG:<H", "sharding": "range",
+     "shards": [{"path": "words-0.dawg", "start": ""},
+                {"path": "words-1.dawg", "start": "в"},
+                {"path": "words-2.dawg", "start": "п"}]}
+
+With ``"range"`` sharding a shard holds keys from its ``start``
+(inclusive) up to the ``start`` of the next shard (keys are compared
+as utf8 bytes); with ``"hash"`` sharding a key is in the shard
+``crc32(utf8 key) % number of shards``. Shard paths are relative
+to the manifest. A shard file is loaded by the first query
+which needs it.
+"""
+from __future__ import absolute_import, unicode_literals
+import io
+import os
+import json
+import zlib
+import heapq
+import bisect
+import itertools
+
+from . import builder
+from .dawgs import BytesDAWG, new_dawg
+
+RANGE = 'range'
+HASH = 'hash'
+
+
+class ShardedDAWG(object):
+    """
+    DAWG which routes queries to shards (DAWGs of the same class)
+    described by a manifest; see the module docstring.
+    """
+
+    def __init__(self):
+        self.cls_spec = None
+        self.sharding = None
+        self._paths = []
+        self._starts = []
+        self._shards = []
+        self._load_options = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def load(self, path, **load_options):
+        """
+        Reads a manifest from ``path``. Shards are not loaded yet;
+        ``load_options`` (e.g. ``mmap=True``) are passed to
+        ``load`` of each shard.
+        """
+        with io.open(path, encoding='utf8') as f:
+            manifest = json.load(f)
+
+        self.close()
+        base_dir = os.path.dirname(path)
+        shards = manifest['shards']
+        self._init(
+            manifest['class'],
+            manifest['sharding'],
+            [os.path.join(base_dir, shard['path']) for shard in shards],
+            [shard['start'] for shard in shards] if manifest['sharding'] == RANGE else None,
+        )
+        self._load_options = load_options
+        return self
+
+    def _init(self, cls_spec, sharding, paths, starts):
+        if not paths:
+            raise ValueError("At least one shard is required")
+        if sharding == RANGE:
+            starts = [_encode(start) for start in starts]
+            if starts[0] != b'' or any(a >= b for a, b in zip(starts, starts[1:])):
+                raise ValueError("Shard starts must be increasing, the first start must be empty")
+            self._starts = starts
+        elif sharding != HASH:
+            raise ValueError("Unknown sharding: %s" % sharding)
+
+        self.cls_spec = cls_spec
+        self.sharding = sharding
+        self._paths = paths
+        self._shards = [None] * len(paths)
+
+    def close(self):
+        "Closes loaded shards; they are loaded again when needed."
+        for dawg in self._shards:
+            if dawg is not None:
+                dawg.close()
+        self._shards = [None] * len(self._shards)
+
+    def num_shards(self):
+        return len(self._shards)
+
+    def num_loaded(self):
+        "Returns the number of loaded shards."
+        return sum(dawg is not None for dawg in self._shards)
+
+    def shard(self, index):
+        "Returns the shard ``index``, loading it if needed."
+        dawg = self._shards[index]
+        if dawg is None:
+            dawg = new_dawg(self.cls_spec).load(self._paths[index], **self._load_options)
+            self._shards[index] = dawg
+        return dawg
+
+    def shard_index(self, key):
+        "Returns the index of the shard for ``key``."
+        b_key = _encode(key)
+        if self.sharding == HASH:
+            return (zlib.crc32(b_key) & 0xffffffff) % len(self._shards)
+        return bisect.bisect_right(self._starts, b_key) - 1
+
+    def __contains__(self, key):
+        return key in self.shard(self.shard_index(key))
+
+    def __getitem__(self, key):
+        return self.shard(self.shard_index(key))[key]
+
+    def get(self, key, default=None):
+        return self.shard(self.shard_index(key)).get(key, default)
+
+    def prefixes(self, key):
+        """
+        Returns a list with keys of this DAWG that are prefixes of the ``key``.
+        Only shards of the key prefixes are queried.
+        """
+        if isinstance(key, bytes):
+            key = key.decode('utf8')
+        indices = sorted(set(self.shard_index(key[:end]) for end in range(1, len(key) + 1)))
+        res = []
+        for index in indices:
+            res.extend(self.shard(index).prefixes(key))
+        res.sort(key=len)
+        return res
+
+    def keys(self, prefix="", limit=None):
+        return list(itertools.islice(self.iterkeys(prefix), limit))
+
+    def iterkeys(self, prefix=""):
+        return self._merged('iterkeys', prefix)
+
+    def items(self, prefix="", limit=None):
+        return list(itertools.islice(self.iteritems(prefix), limit))
+
+    def iteritems(self, prefix=""):
+        return self._merged('iteritems', prefix)
+
+    def _merged(self, method, prefix):
+        # the same order as in a single DAWG: range shards are visited
+        # in order (and loaded only when reached), hash shards are merged
+        if self.sharding == HASH:
+            return heapq.merge(*[
+                getattr(self.shard(index), method)(prefix) for index in range(len(self._shards))
+            ])
+        return itertools.chain.from_iterable(
+            getattr(self.shard(index), method)(prefix) for index in self._range_indices(prefix)
+        )
+
+    def _range_indices(self, prefix):
+        # shards that may have keys starting with ``prefix``: the shard
+        # of the prefix and the following shards which start with it
+        b_prefix = _encode(prefix)
+        first = last = self.shard_index(b_prefix)
+        while last + 1 < len(self._starts) and self._starts[last + 1].startswith(b_prefix):
+            last += 1
+        return range(first, last + 1)
+
+
+def build(path, cls_spec, data, boundaries=None, num_shards=None, input_is_sorted=False,
+          chunk_size=builder.DEFAULT_CHUNK_SIZE, tmp_dir=None):
+    """
+    Builds shards from ``data`` (the same data as for ``builder.build``)
+    and writes them (as ``<name>-<N>.dawg`` next to the manifest) and
+    a manifest to ``path``. Returns a ``ShardedDAWG`` for the manifest.
+
+    Pass ``boundaries`` for range sharding (shard N + 1 starts at
+    ``boundaries[N]``; boundaries must be increasing) or ``num_shards``
+    for hash sharding. Input is sorted once (unless ``input_is_sorted``)
+    and consumed as a stream; with range sharding only one shard is
+    being built at a time.
+    """
+    if (boundaries is None) == (num_shards is None):
+        raise ValueError("Either boundaries or num_shards is required")
+    if boundaries is not None:
+        sharding, starts = RANGE, [''] + [_decode(start) for start in boundaries]
+        num_shards = len(starts)
+    else:
+        sharding, starts = HASH, None
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    shard_paths = ['%s-%d.dawg' % (name, index) for index in range(num_shards)]
+    base_dir = os.path.dirname(path)
+    sharded = ShardedDAWG()
+    sharded._init(cls_spec, sharding, [os.path.join(base_dir, p) for p in shard_paths], starts)
+
+    dawg = new_dawg(cls_spec)
+    items = dawg._build_items(data)
+    if not input_is_sorted:
+        items = builder.external_sort(items, chunk_size, tmp_dir)
+    separator = dawg._payload_separator if isinstance(dawg, BytesDAWG) else None
+
+    dawg_builders = [builder.DawgBuilder() for index in range(num_shards)]
+    current = 0
+    for b_key, value in items:
+        if separator is not None:
+            # shards are chosen by keys, not by keys with payloads
+            index = sharded.shard_index(b_key.partition(separator)[0])
+        else:
+            index = sharded.shard_index(b_key)
+
+        if sharding == RANGE and index != current:
+            if index < current:
+                raise ValueError("Keys are not sorted")
+            for done in range(current, index):
+                _write_shard(cls_spec, dawg_builders[done], sharded._paths[done])
+                dawg_builders[done] = None
+            current = index
+        dawg_builders[index].insert(b_key, value)
+
+    for index, dawg_builder in enumerate(dawg_builders):
+        if dawg_builder is not None:
+            _write_shard(cls_spec, dawg_builder, sharded._paths[index])
+
+    manifest = {
+        'class': cls_spec,
+        'sharding': sharding,
+        'shards': [{'path': shard_path} for shard_path in shard_paths],
+    }
+    if sharding == RANGE:
+        for shard, start in zip(manifest['shards'], starts):
+            shard['start'] = start
+    with io.open(path, 'w', encoding='utf8') as f:
+        f.write(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True))
+    return sharded
+
+
+def _write_shard(cls_spec, dawg_builder, path):
+    dawg = builder.finish(new_dawg(cls_spec), dawg_builder)
+    with open(path, 'wb') as f:
+        dawg.write(f)
+
+
+def _encode(key):
+    if isinstance(key, bytes):
+        return key
+    return key.encode('utf8')
+
+
+def _decode(key):
+    if isinstance(key, bytes):
+        return key.decode('utf8')
+    return key
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized (NumPy-based) dictionary traversal.
+
+A batch of keys is encoded into a zero-padded byte matrix and all keys
+are advanced one byte position at a time. This module requires NumPy.
+"""
+from __future__ import absolute_import
+
+import struct
+
+import numpy as np
+
+from . import units, dawgs
+
+LOOKUP_ERROR = -1
+BATCH_SIZE = 65536
+
+
+def units_array(dic):
+    """
+    Returns dictionary units as a ``np.uint32`` array (without copying).
+    """
+    return np.frombuffer(dic._units, dtype=np.uint32)
+
+
+def encode_keys(b_keys):
+    """
+    Packs byte strings into a zero-padded ``np.uint8`` matrix.
+    Returns a (matrix, lengths) tuple.
+    """
+    lengths = np.fromiter((len(key) for key in b_keys), dtype=np.int64, count=len(b_keys))
+    width = int(lengths.max()) if len(b_keys) else 0
+    matrix = np.zeros((len(b_keys), width), dtype=np.uint8)
+
+    data = np.frombuffer(b"".join(b_keys), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(b_keys)), lengths)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    matrix[rows, np.arange(len(data)) - starts] = data
+    return matrix, lengths
+
+
+def find(dic, b_keys, batch_size=BATCH_SIZE):
+    """
+    Vectorized version of ``Dictionary.find``: returns an ``np.int64``
+    array with values for each of ``b_keys`` (-1 for missing keys).
+    """
+    unit_array = units_array(dic)
+    res = np.empty(len(b_keys), dtype=np.int64)
+    for start in range(0, len(b_keys), batch_size):
+        batch = b_keys[start:start+batch_size]
+        res[start:start+len(batch)] = _find_batch(unit_array, batch)
+    return res
+
+
+_BYTE_ORDERS = {'@': '=', '=': '=', '<': '<', '>': '>', '!': '>'}
+_KINDS = {
+    'b': 'i', 'h': 'i', 'i': 'i', 'l': 'i', 'q': 'i', 'n': 'i',
+    'B': 'u', 'H': 'u', 'I': 'u', 'L': 'u', 'Q': 'u', 'N': 'u', 'P': 'u',
+    'e': 'f', 'f': 'f', 'd': 'f',
+    '?': 'b', 'c': 'S',
+}
+
+
+def record_dtype(fmt):
+    """
+    Returns a structured ``np.dtype`` with the same memory layout as
+    ``struct.Struct(fmt)``. There is a field for each of the values
+    returned by ``struct.unpack`` ('f0', 'f1', ...).
+    """
+    fmt = str(fmt)
+    byte_order = ''
+    if fmt and fmt[0] in _BYTE_ORDERS:
+        byte_order, fmt = fmt[0], fmt[1:]
+    np_byte_order = _BYTE_ORDERS.get(byte_order, '=')
+
+    names, formats, offsets = [], [], []
+    prefix = byte_order
+    count = ''
+    for code in fmt:
+        if code.isspace():
+            continue
+        if code.isdigit():
+            count += code
+            continue
+
+        count, repeat = '', int(count or 1)
+        if code == 's':
+            codes = ['%d%s' % (repeat, code)]
+        else:
+            codes = [code] * repeat
+
+        for item_code in codes:
+            size = struct.calcsize(byte_order + item_code)
+            offset = struct.calcsize(prefix + item_code) - size
+            prefix += item_code
+            if item_code == 'x':
+                continue
+            if item_code[-1] == 's':
+                np_format = 'S%d' % size
+            elif item_code == 'c':
+                np_format = 'S1'
+            elif item_code in _KINDS:
+                np_format = '%s%s%d' % (np_byte_order, _KINDS[item_code], size)
+            else:
+                raise ValueError("Unsupported struct format code: %r" % item_code)
+
+            names.append(str('f%d' % len(names)))
+            formats.append(np_format)
+            offsets.append(offset)
+
+    return np.dtype({
+        'names': names,
+        'formats': formats,
+        'offsets': offsets,
+        'itemsize': struct.calcsize(str(byte_order + fmt)),
+    })
+
+
+def decode_records(raw_payloads, dtype):
+    """
+    Decodes raw (base64-encoded) payloads into a structured array
+    of ``dtype``.
+    """
+    # the decoder is looked up in dawgs, so that it can be instrumented
+    data = b"".join(map(dawgs.a2b_base64, raw_payloads))
+    if len(data) != len(raw_payloads) * dtype.itemsize:
+        raise ValueError("Payload sizes don't match the record format.")
+    return np.frombuffer(data, dtype=dtype)
+
+
+def _offset(base):
+    return ((base >> 10) << ((base & units.EXTENSION_BIT) >> 6)) & units.PRECISION_MASK
+
+
+def _find_batch(unit_array, b_keys):
+    matrix, lengths = encode_keys(b_keys)
+    res = np.full(len(b_keys), LOOKUP_ERROR, dtype=np.int64)
+
+    # rows of keys which are still being followed and their current indices
+    rows = np.arange(len(b_keys))
+    index = np.zeros(len(b_keys), dtype=np.int64)
+
+    for pos in range(matrix.shape[1] + 1):
+        done = lengths[rows] == pos
+        if done.any():
+            _store_values(unit_array, rows[done], index[done], res)
+            rows, index = rows[~done], index[~done]
+        if not len(rows):
+            break
+
+        labels = matrix[rows, pos].astype(np.int64)
+        base = unit_array[index].astype(np.int64)
+        next_index = (index ^ _offset(base) ^ labels) & units.PRECISION_MASK
+
+        found = next_index < len(unit_array)
+        next_index[~found] = 0
+        found &= (unit_array[next_index] & (units.IS_LEAF_BIT | 0xFF)) == labels
+        rows, index = rows[found], next_index[found]
+
+    return res
+
+
+def _store_values(unit_array, rows, index, res):
+    base = unit_array[index].astype(np.int64)
+    has_leaf = (base & units.HAS_LEAF_BIT) != 0
+    rows, index, base = rows[has_leaf], index[has_leaf], base[has_leaf]
+
+    value_index = (index ^ _offset(base)) & units.PRECISION_MASK
+    res[rows] = unit_array[value_index] & (~units.IS_LEAF_BIT & units.PRECISION_MASK)
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
+import sys
 import struct
 import array
+import mmap
 
 from . import units
-from .compat import int_from_byte
+from .compat import int_from_byte, bytes_for_write
 
 
 class Dictionary(object):
@@ -13,6 +15,9 @@ class Dictionary(object):
     """
     def __init__(self):
         self._units = array.array(str("I"))
+        self._jump_table = None
+        self._jump_matches = {}
+        self.jump_depth = 0
 
     ROOT = 0
     "Root index"
@@ -32,6 +37,27 @@ class Dictionary(object):
         base_size = struct.unpack(str("=I"), fp.read(4))[0]
         self._units.fromfile(fp, base_size)
 
+    def write(self, fp):
+        "Writes a dictionary to an output stream."
+        fp.write(struct.pack(str("=I"), len(self._units)))
+        fp.write(bytes_for_write(self._units))
+
+    def map(self, buf, offset=0):
+        """
+        Uses a dictionary stored in ``buf`` at ``offset`` without copying it.
+        Returns an offset of the data following the dictionary.
+        """
+        base_size = struct.unpack_from(str("=I"), buf, offset)[0]
+        start = offset + 4
+        end = start + base_size * 4
+        self._units = _view(buf, start, end, "I")
+        return end
+
+    def close(self):
+        "Releases the buffer used by a mapped dictionary."
+        if isinstance(self._units, memoryview):
+            self._units.release()
+
     def contains(self, key):
         "Exact matching."
         index = self.follow_bytes(key, self.ROOT)
@@ -60,13 +86,206 @@ class Dictionary(object):
 
     def follow_bytes(self, s, index):
         "Follows transitions."
-        for ch in s:
-            index = self.follow_char(int_from_byte(ch), index)
+        if index == self.ROOT and self._jump_table is not None:
+            index = self._jump_table.get(bytes(s[:self.jump_depth]))
             if index is None:
                 return None
+            s = s[self.jump_depth:]
+
+        # this is follow_char inlined: it is the innermost loop
+        # of most lookups
+        dic_units = self._units
+        extension_bit = units.EXTENSION_BIT
+        precision_mask = units.PRECISION_MASK
+        label_mask = units.IS_LEAF_BIT | 0xFF
+
+        for label in bytearray(s):
+            base = dic_units[index]
+            offset = (base >> 10) << ((base & extension_bit) >> 6)
+            index = (index ^ offset ^ label) & precision_mask
+
+            if dic_units[index] & label_mask != label:
+                return None
 
         return index
 
+    def prefix_indices(self, s, start=0, terminal_label=None):
+        """
+        Follows transitions for bytes of ``s`` (a bytearray) from
+        ``start`` and returns a list of ``(end, index)`` pairs for
+        all prefixes ``s[start:end]`` which have a value.
+
+        If ``terminal_label`` is given, prefixes which are followed
+        by a transition for this label are returned instead, and ``index``
+        is an index after that transition.
+        """
+        res, index, start = self._jump_prefix_indices(s, start, terminal_label)
+        if index is None:
+            return res
+
+        dic_units = self._units
+        extension_bit = units.EXTENSION_BIT
+        precision_mask = units.PRECISION_MASK
+        label_mask = units.IS_LEAF_BIT | 0xFF
+
+        for pos in range(start, len(s)):
+            label = s[pos]
+            base = dic_units[index]
+            offset = (base >> 10) << ((base & extension_bit) >> 6)
+            index = (index ^ offset ^ label) & precision_mask
+            if dic_units[index] & label_mask != label:
+                break
+
+            base = dic_units[index]
+            if terminal_label is None:
+                if base & units.HAS_LEAF_BIT:
+                    res.append((pos + 1, index))
+            else:
+                offset = (base >> 10) << ((base & extension_bit) >> 6)
+                terminal = (index ^ offset ^ terminal_label) & precision_mask
+                if dic_units[terminal] & label_mask == terminal_label:
+                    res.append((pos + 1, terminal))
+
+        return res
+
+    def _jump_prefix_indices(self, s, start, terminal_label):
+        """
+        Follows the first ``jump_depth`` transitions of ``prefix_indices``
+        with a single lookup. Returns ``(res, index, pos)``: prefixes
+        found, an index after ``s[start:pos]`` and a position to continue
+        from.
+        """
+        if self._jump_table is None:
+            return [], self.ROOT, start
+
+        table = self._jump_matches.get(terminal_label)
+        if table is None:
+            table = self._jump_matches[terminal_label] = self._build_jump_matches(terminal_label)
+
+        head = bytes(s[start:start + self.jump_depth])
+        entry = table.get(head)
+        if entry is None:
+            # a transition is missing in the first jump_depth bytes;
+            # prefixes before it are found by following transitions
+            return [], self.ROOT, start
+
+        index, matches = entry
+        return [(start + end, match) for end, match in matches], index, start + len(head)
+
+    def _build_jump_matches(self, terminal_label):
+        """
+        Returns a dict which maps each prefix from the jump table to
+        ``(index, matches)``, where ``matches`` are ``prefix_indices``
+        results for this prefix.
+        """
+        res = {}
+        for prefix in sorted(self._jump_table, key=len):
+            index = self._jump_table[prefix]
+            if not prefix:
+                res[prefix] = (index, ())
+                continue
+
+            matches = res[prefix[:-1]][1]
+            if terminal_label is None:
+                if self.has_value(index):
+                    matches += ((len(prefix), index),)
+            else:
+                terminal = self.follow_char(terminal_label, index)
+                if terminal is not None:
+                    matches += ((len(prefix), terminal),)
+            res[prefix] = (index, matches)
+        return res
+
+    def children(self, index):
+        "Yields (label, index) pairs for all transitions from a given index."
+        dic_units = self._units
+        base = (index ^ units.offset(dic_units[index])) & units.PRECISION_MASK
+        label_mask = units.IS_LEAF_BIT | 0xFF
+        for label in range(1, 256):
+            next_index = base ^ label
+            if dic_units[next_index] & label_mask == label:
+                yield label, next_index
+
+    def build_jump_table(self, depth):
+        """
+        Builds a table which maps every valid key prefix of up to ``depth``
+        bytes to its index, so that the first ``depth`` transitions from
+        ROOT are replaced with a single dict lookup.
+        ``depth=0`` removes the table.
+        """
+        self._jump_table = None
+        self._jump_matches = {}
+        self.jump_depth = 0
+        if not depth:
+            return
+
+        table = {b"": self.ROOT}
+        level = [(b"", self.ROOT)]
+        for _ in range(depth):
+            next_level = []
+            for prefix, index in level:
+                for label, next_index in self.children(index):
+                    next_level.append((prefix + struct.pack(str("B"), label), next_index))
+            table.update(next_level)
+            level = next_level
+
+        self._jump_table = table
+        self.jump_depth = depth
+
+    def follow_many(self, keys, index):
+        """
+        Follows transitions for each of ``keys`` and yields resulting
+        indices (or None). Transitions for a common prefix of adjacent
+        keys are followed once, so sorted keys are processed faster.
+        """
+        # follow_char is inlined, as in follow_bytes
+        dic_units = self._units
+        extension_bit = units.EXTENSION_BIT
+        precision_mask = units.PRECISION_MASK
+        label_mask = units.IS_LEAF_BIT | 0xFF
+
+        path = [index]
+        prev = b""
+        for key in keys:
+            common = 0
+            max_common = min(len(prev), len(key), len(path) - 1)
+            while common < max_common and prev[common] == key[common]:
+                common += 1
+            del path[common+1:]
+
+            index = path[common]
+            for label in bytearray(key[common:]):
+                base = dic_units[index]
+                offset = (base >> 10) << ((base & extension_bit) >> 6)
+                index = (index ^ offset ^ label) & precision_mask
+                if dic_units[index] & label_mask != label:
+                    index = None
+                    break
+                path.append(index)
+
+            yield index
+            prev = key
+
+    def size(self):
+        "Returns the number of units."
+        return len(self._units)
+
+    def nbytes(self):
+        "Returns the size of dictionary data in memory, in bytes."
+        res = len(self._units) * self._units.itemsize
+        if self._jump_table is not None:
+            res += sys.getsizeof(self._jump_table) + sum(
+                sys.getsizeof(prefix) + sys.getsizeof(index)
+                for prefix, index in self._jump_table.items()
+            )
+        for table in self._jump_matches.values():
+            # prefixes are shared with the jump table
+            res += sys.getsizeof(table) + sum(
+                sys.getsizeof(entry) + sys.getsizeof(entry[1])
+                for entry in table.values()
+            )
+        return res
+
     @classmethod
     def load(cls, path):
         dawg = cls()
@@ -75,6 +294,135 @@ class Dictionary(object):
         return dawg
 
 
+class DecodedDictionary(Dictionary):
+    """
+    Dictionary with units decoded into parallel arrays (base index,
+    label and value of each unit), so that transitions are followed
+    without bit operations. Decoded arrays take 10 bytes per unit
+    in addition to 4 bytes per unit of the original data.
+    """
+    def __init__(self, dic=None):
+        super(DecodedDictionary, self).__init__()
+        self._bases = array.array(str("I"))
+        self._labels = array.array(str("H"))
+        self._values = array.array(str("i"))
+        if dic is not None:
+            self._units = dic._units
+            self.decode()
+
+    def decode(self):
+        "Decodes units into parallel arrays."
+        size = len(self._units)
+        bases = array.array(str("I"), [0]) * size
+        labels = array.array(str("H"), [0]) * size
+        values = array.array(str("i"), [-1]) * size
+        leaf_label = 0x100  # doesn't match any byte
+
+        for index, base in enumerate(self._units):
+            next_base = (index ^ units.offset(base)) & units.PRECISION_MASK
+            bases[index] = next_base
+            if base & units.IS_LEAF_BIT:
+                labels[index] = leaf_label
+            else:
+                labels[index] = base & 0xFF
+            if units.has_leaf(base) and next_base < size:
+                values[index] = units.value(self._units[next_base])
+
+        self._bases, self._labels, self._values = bases, labels, values
+
+    def read(self, fp):
+        super(DecodedDictionary, self).read(fp)
+        self.decode()
+
+    def map(self, buf, offset=0):
+        offset = super(DecodedDictionary, self).map(buf, offset)
+        self.decode()
+        return offset
+
+    def close(self):
+        "Releases the buffer and drops decoded arrays."
+        super(DecodedDictionary, self).close()
+        self._bases = self._labels = self._values = _released_view()
+
+    def has_value(self, index):
+        return self._values[index] >= 0
+
+    def value(self, index):
+        return self._values[index]
+
+    def follow_char(self, label, index):
+        next_index = self._bases[index] ^ label
+        if self._labels[next_index] != label:
+            return None
+        return next_index
+
+    def follow_bytes(self, s, index):
+        if index == self.ROOT and self._jump_table is not None:
+            index = self._jump_table.get(bytes(s[:self.jump_depth]))
+            if index is None:
+                return None
+            s = s[self.jump_depth:]
+
+        bases, labels = self._bases, self._labels
+        for ch in s:
+            label = int_from_byte(ch)
+            index = bases[index] ^ label
+            if labels[index] != label:
+                return None
+        return index
+
+    def follow_many(self, keys, index):
+        bases, labels = self._bases, self._labels
+        path = [index]
+        prev = b""
+        for key in keys:
+            common = 0
+            max_common = min(len(prev), len(key), len(path) - 1)
+            while common < max_common and prev[common] == key[common]:
+                common += 1
+            del path[common+1:]
+
+            index = path[common]
+            for label in bytearray(key[common:]):
+                index = bases[index] ^ label
+                if labels[index] != label:
+                    index = None
+                    break
+                path.append(index)
+
+            yield index
+            prev = key
+
+    def prefix_indices(self, s, start=0, terminal_label=None):
+        res, index, start = self._jump_prefix_indices(s, start, terminal_label)
+        if index is None:
+            return res
+
+        bases, labels, values = self._bases, self._labels, self._values
+
+        for pos in range(start, len(s)):
+            label = s[pos]
+            index = bases[index] ^ label
+            if labels[index] != label:
+                break
+
+            if terminal_label is None:
+                if values[index] >= 0:
+                    res.append((pos + 1, index))
+            else:
+                terminal = bases[index] ^ terminal_label
+                if labels[terminal] == terminal_label:
+                    res.append((pos + 1, terminal))
+
+        return res
+
+    def nbytes(self):
+        return super(DecodedDictionary, self).nbytes() + sum(
+            len(arr) * arr.itemsize
+            for arr in (self._bases, self._labels, self._values)
+        )
+
+
 class Guide(object):
 
     ROOT = 0
@@ -92,9 +440,116 @@ class Guide(object):
         base_size = struct.unpack(str("=I"), fp.read(4))[0]
         self._units.fromfile(fp, base_size*2)
 
+    def write(self, fp):
+        fp.write(struct.pack(str("=I"), len(self._units) // 2))
+        fp.write(bytes_for_write(self._units))
+
+    def map(self, buf, offset=0):
+        base_size = struct.unpack_from(str("=I"), buf, offset)[0]
+        start = offset + 4
+        end = start + base_size * 2
+        self._units = _view(buf, start, end, "B")
+        return end
+
+    def close(self):
+        if isinstance(self._units, memoryview):
+            self._units.release()
+
     def size(self):
         return len(self._units)
 
+    def children(self, dic, index):
+        "Yields (label, index) pairs for all non-leaf children of a node."
+        label = self.child(index)
+        while label:
+            index_ = dic.follow_char(label, index)
+            yield label, index_
+            label = self.sibling(index_)
+
+
+def iter_postorder(dic, guide, index):
+    """
+    Yields ``(index, children)`` pairs for all nodes reachable from
+    ``index``, each node once; children go before their parents.
+    ``children`` is a list of (label, index) pairs.
+    """
+    seen = bytearray(dic.size())
+    seen[index] = 1
+    stack = [[index, list(guide.children(dic, index)), 0]]
+
+    while stack:
+        frame = stack[-1]
+        index, children, pos = frame
+        while pos < len(children) and seen[children[pos][1]]:
+            pos += 1
+
+        if pos < len(children):
+            frame[2] = pos + 1
+            child = children[pos][1]
+            seen[child] = 1
+            stack.append([child, list(guide.children(dic, child)), 0])
+        else:
+            stack.pop()
+            yield index, children
+
+
+def subtree_index(dic, guide, typecode, value, combine):
+    """
+    Returns an array which holds, for each node reachable from ROOT,
+    ``combine`` (e.g. ``sum`` or ``max``) of ``value(index)`` for all
+    nodes with values in its subtree.
+    """
+    res = array.array(str(typecode), [0]) * dic.size()
+    if not guide.size():
+        return res
+
+    for index, children in iter_postorder(dic, guide, dic.ROOT):
+        values = [res[child] for label, child in children]
+        if dic.has_value(index):
+            values.append(value(index))
+        res[index] = combine(values) if values else 0
+    return res
+
+
+# mapped data is used through memoryview.cast, which is new in Python 3.3
+CAN_MAP = hasattr(memoryview, 'cast')
+
+
+def map_file(path, prefetch=False):
+    """
+    Memory-maps a file for reading. When ``prefetch`` is True the OS
+    is advised to read the whole file in advance.
+    """
+    _check_can_map()
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if prefetch and hasattr(buf, 'madvise'):
+        buf.madvise(mmap.MADV_WILLNEED)
+    return buf
+
+
+def _released_view():
+    "Returns a released memoryview: any access to it raises ValueError."
+    view = memoryview(b"")
+    view.release()
+    return view
+
+
+def _check_can_map():
+    if not CAN_MAP:
+        raise NotImplementedError(
+            "Mapped DAWGs (load(mmap=True) and frombytes) require Python 3.3+"
+        )
+
+
+def _view(buf, start, end, fmt):
+    _check_can_map()
+    view = memoryview(buf).cast("B")[start:end]
+    if len(view) != end - start:
+        view.release()
+        raise EOFError("unexpected end of data")
+    return view.cast(fmt)
+
 
 class Completer(object):
 
@@ -114,6 +569,29 @@ class Completer(object):
         else:
             self._index_stack = []
 
+    def resume(self, index, prefix, key):
+        """
+        Starts completion right after ``key`` (a value of ``self.key``
+        seen during a previous completion of the same ``prefix``).
+        Returns False if ``key`` is not a completion of ``prefix``.
+        """
+        self.start(index, prefix)
+        if not self._index_stack or key[:len(prefix)] != prefix:
+            return False
+
+        for ch in key[len(prefix):]:
+            label = int_from_byte(ch)
+            index = self._dic.follow_char(label, index)
+            if index is None:
+                return False
+            self.key.append(label)
+            self._index_stack.append(index)
+
+        if not self._dic.has_value(index):
+            return False
+        self._last_index = index
+        return True
+
     def next(self):
         "Gets the next key"
 
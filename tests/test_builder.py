@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+import dawg_python
+from dawg_python import builder
+
+from .utils import words100k, data_path
+from . import test_prediction
+
+INT_DATA = {'foo': 1, 'bar': 5, 'foobar': 3}
+BYTES_DATA = (
+    ('foo', b'data1'),
+    ('bar', b'data2'),
+    ('foo', b'data3'),
+    ('foobar', b'data4')
+)
+RECORD_DATA = (
+    ('foo', (3, 2, 256)),
+    ('bar', (3, 1, 0)),
+    ('foo', (3, 2, 1)),
+    ('foobar', (6, 3, 0))
+)
+
+# the same data as in _prepare_dev_data.py
+SMALL_DAWGS = [
+    ('completion.dawg', dawg_python.CompletionDAWG, (), ['f', 'bar', 'foo', 'foobar']),
+    ('completion-empty.dawg', dawg_python.CompletionDAWG, (), []),
+    ('bytes.dawg', dawg_python.BytesDAWG, (), BYTES_DATA),
+    ('record.dawg', dawg_python.RecordDAWG, (str(">3H"),), RECORD_DATA),
+    ('int_dawg.dawg', dawg_python.IntDAWG, (), INT_DATA),
+    ('int_completion_dawg.dawg', dawg_python.IntCompletionDAWG, (), INT_DATA),
+    ('prediction.dawg', dawg_python.DAWG, (), test_prediction.TestPrediction.DATA),
+    ('prediction-record.dawg', dawg_python.RecordDAWG, (str("=H"),), [(k, (len(k),)) for k in test_prediction.TestPrediction.DATA]),
+]
+
+
+def read_data(*path):
+    with open(data_path(*path), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize(("name", "cls", "args", "data"), SMALL_DAWGS)
+def test_build_small(name, cls, args, data):
+    d = builder.build(cls(*args), data)
+    assert d.tobytes() == read_data('small', name)
+
+
+def test_build_large():
+    words = words100k()
+    d = builder.build(dawg_python.IntDAWG(), zip(words, [len(word) for word in words]))
+    assert d.tobytes() == read_data('large', 'int_dawg.dawg')
+
+
+def test_build_external_sort():
+    d = builder.build(dawg_python.RecordDAWG(str(">3H")), RECORD_DATA, chunk_size=1)
+    assert d.tobytes() == read_data('small', 'record.dawg')
+
+
+def test_build_sorted_stream():
+    data = iter(sorted(BYTES_DATA, key=lambda item: item[0]))
+    d = builder.build(dawg_python.BytesDAWG(), data, input_is_sorted=True)
+    assert d.tobytes() == read_data('small', 'bytes.dawg')
+
+
+def test_build_unsorted_stream():
+    with pytest.raises(ValueError):
+        builder.build(dawg_python.DAWG(), ['foo', 'bar'], input_is_sorted=True)
+
+
+def test_built_dawg():
+    d = builder.build(dawg_python.IntCompletionDAWG(), INT_DATA)
+    assert d.items() == sorted(INT_DATA.items())
+    assert d['foo'] == 1
+    assert d.keys('foo') == ['foo', 'foobar']
+
+
+def test_build_duplicates():
+    d = builder.build(dawg_python.IntDAWG(), [('foo', 2), ('foo', 1), ('bar', 3), ('bar', 3)])
+    assert d['foo'] == 2
+    assert d['bar'] == 3
+
+
+@pytest.mark.parametrize("data", [[('', 1)], [('fo\x00o', 1)], [('foo', -1)], [('foo', 2**31)]])
+def test_build_invalid(data):
+    with pytest.raises(ValueError):
+        builder.build(dawg_python.IntDAWG(), data)
+
+
+def test_build_payload_separator():
+    with pytest.raises(ValueError):
+        builder.build(dawg_python.BytesDAWG(), [('fo\x01o', b'data')])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 10])
+def test_external_sort(chunk_size):
+    items = [(b'foo', 1), (b'bar', 2), (b'', 0), (b'foo', 0), (b'\xff', 2**40), (b'ba', 3)]
+    assert list(builder.external_sort(items, chunk_size)) == sorted(items)
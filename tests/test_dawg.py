@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
+import io
+import os
 import pickle
 import tempfile
+import zipfile
 
 import pytest
 import dawg_python
 
-from .utils import data_path
+from .utils import data_path, words100k
 
 def test_c_dawg_contains():
     dawg = pytest.importorskip("dawg")  # import dawg
@@ -76,13 +79,205 @@ class TestCompletionDAWG(object):
         assert d.prefixes("x") == []
         assert d.prefixes("bar") == ["bar"]
 
+    def test_find_all(self):
+        d = self.dawg()
+        assert d.find_all('ёfoobar') == [(1, 2, 'f'), (1, 4, 'foo'), (1, 7, 'foobar'), (4, 7, 'bar')]
+        assert d.find_all('ёfoobar'.encode('utf8')) == [(2, 3, 'f'), (2, 5, 'foo'), (2, 8, 'foobar'), (5, 8, 'bar')]
+        assert d.find_all('ёfoobar', longest=True) == [(1, 7, 'foobar'), (4, 7, 'bar')]
+        assert d.find_all('ёfoobar bar', overlapping=False) == [(1, 7, 'foobar'), (8, 11, 'bar')]
+        assert d.find_all('xyz') == []
+        assert d.find_all('') == []
+
+    def test_count(self):
+        d = self.dawg()
+        assert d.count() == 4
+        assert d.count('f') == 3
+        assert d.count('foo') == 2
+        assert d.count('foob') == 1
+        assert d.count('x') == 0
+
+    def test_count_empty(self):
+        d = dawg_python.CompletionDAWG().load(data_path('small', 'completion-empty.dawg'))
+        assert d.count() == 0
+
+    def test_keys_limit(self):
+        d = self.dawg()
+        assert d.keys(limit=2) == ['bar', 'f']
+        assert d.keys('foo', limit=1) == ['foo']
+        assert d.keys('foo', limit=10) == ['foo', 'foobar']
+        assert d.keys(limit=0) == []
+
+    def test_keys_page(self):
+        d = self.dawg()
+        assert d.keys_page('x') == ([], None)
+        assert d.keys_page('f', limit=3) == (['f', 'foo', 'foobar'], None)
+
+        keys, cursor = d.keys_page(limit=3)
+        assert keys == ['bar', 'f', 'foo']
+        assert d.keys_page(limit=3, cursor=cursor) == (['foobar'], None)
+
+        keys, cursor = d.keys_page('f', limit=1)
+        assert keys == ['f']
+        keys, cursor = d.keys_page('f', limit=1, cursor=cursor)
+        assert keys == ['foo']
+        assert d.keys_page('f', limit=1, cursor=cursor) == (['foobar'], None)
+
+    def test_keys_page_invalid_cursor(self):
+        d = self.dawg()
+        keys, cursor = d.keys_page('b', limit=1)
+        assert cursor is None
+        keys, cursor = d.keys_page(limit=1)
+
+        with pytest.raises(ValueError):
+            d.keys_page('f', cursor=cursor)
+
+        with pytest.raises(ValueError):
+            d.keys_page(cursor='!!!')
+
+        with pytest.raises(ValueError):
+            d.keys_page(limit=0)
+
+    def test_jump_table(self):
+        d = dawg_python.CompletionDAWG().load(data_path('small', 'completion.dawg'), jump_depth=2)
+        assert d.keys() == sorted(self.keys)
+        assert d.keys('fo') == ['foo', 'foobar']
+        assert d.keys('x') == []
+        assert d.prefixes("foobarz") == ["f", "foo", "foobar"]
+        assert pickle.loads(pickle.dumps(d)).dct.jump_depth == 2
+
+    def test_contains_many(self):
+        d = self.dawg()
+        keys = ['foobar', 'x', 'fo', 'f', b'bar', 'foo', 'foobarz', 'foo']
+        assert d.contains_many(keys) == [key in d for key in keys]
+
+    def test_filter_known(self):
+        d = self.dawg()
+        keys = iter(['foobar', 'x', 'fo', 'f', 'bar', 'foo', 'f'])
+        assert list(d.filter_known(keys, chunk_size=3)) == ['foobar', 'f', 'bar', 'foo', 'f']
+
+    def test_mmap(self):
+        path = data_path('small', 'completion.dawg')
+        with dawg_python.CompletionDAWG().load(path, mmap=True, prefetch=True) as d:
+            assert d.keys() == sorted(self.keys)
+            assert d.keys('foo') == ['foo', 'foobar']
+            assert 'bar' in d
+            assert 'ba' not in d
+
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_lazy_guide(self, mmap):
+        path = data_path('small', 'completion.dawg')
+        with dawg_python.CompletionDAWG().load(path, mmap=mmap, lazy_guide=True) as d:
+            assert 'bar' in d
+            assert d.prefixes('foobar') == ['f', 'foo', 'foobar']
+            assert d._guide is None
+            assert d.keys('foo') == ['foo', 'foobar']
+            assert d._guide is not None
+            with open(path, 'rb') as f:
+                assert d.tobytes() == f.read()
+
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_lazy_guide_close(self, mmap):
+        d = dawg_python.CompletionDAWG().load(data_path('small', 'completion.dawg'), mmap=mmap, lazy_guide=True)
+        d.close()
+        if mmap:
+            with pytest.raises(ValueError):
+                d.keys()
+        else:
+            assert d.keys('foo') == ['foo', 'foobar']
+
+    def test_no_memoryview_cast(self, monkeypatch):
+        monkeypatch.setattr(dawg_python.wrapper, 'CAN_MAP', False)
+        path = data_path('small', 'completion.dawg')
+        with pytest.raises(NotImplementedError):
+            dawg_python.CompletionDAWG().load(path, mmap=True)
+        with open(path, 'rb') as f:
+            with pytest.raises(NotImplementedError):
+                dawg_python.CompletionDAWG().frombytes(f.read())
+        assert dawg_python.CompletionDAWG().load(path).keys('foo') == ['foo', 'foobar']
+
+    def test_mmap_close(self):
+        d = dawg_python.CompletionDAWG().load(data_path('small', 'completion.dawg'), mmap=True)
+        d.close()
+        with pytest.raises(ValueError):
+            'foo' in d
+
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_decoded_close(self, mmap):
+        path = data_path('small', 'completion.dawg')
+        d = dawg_python.CompletionDAWG().load(path, mmap=mmap, decoded=True)
+        d.close()
+        with pytest.raises(ValueError):
+            'foo' in d
+
+        d = dawg_python.RecordDAWG(str(">3H")).load(data_path('small', 'record.dawg'), mmap=mmap, decoded=True)
+        d.close()
+        with pytest.raises(ValueError):
+            'foo' in d
+        with pytest.raises(ValueError):
+            d.get('foo')
+
+    def test_tobytes(self):
+        path = data_path('small', 'completion.dawg')
+        with open(path, 'rb') as f:
+            data = f.read()
+        assert self.dawg().tobytes() == data
+        assert dawg_python.CompletionDAWG().load(path, mmap=True).tobytes() == data
+
+    def test_frombytes(self):
+        d = dawg_python.CompletionDAWG().frombytes(self.dawg().tobytes())
+        assert d.keys() == sorted(self.keys)
+
+    def test_read_write(self):
+        buf = io.BytesIO()
+        self.dawg().write(buf)
+        buf.seek(0)
+        d = dawg_python.CompletionDAWG().read(buf)
+        assert d.keys() == sorted(self.keys)
+
+    def test_read_zip_member(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as zf:
+            zf.write(data_path('small', 'completion.dawg'), 'completion.dawg')
+
+        with zipfile.ZipFile(buf) as zf:
+            d = dawg_python.CompletionDAWG().read(zf.open('completion.dawg'))
+        assert d.keys() == sorted(self.keys)
+
+    def test_pickling_mmap(self):
+        d = dawg_python.CompletionDAWG().load(data_path('small', 'completion.dawg'), mmap=True)
+        data = pickle.dumps(d)
+        assert len(data) < 1000
+
+        d2 = pickle.loads(data)
+        assert d2._mmap is not None
+        assert d2.keys() == sorted(self.keys)
+
+    def test_pickling_mmap_relative_path(self, monkeypatch):
+        monkeypatch.chdir(data_path('small'))
+        d = dawg_python.CompletionDAWG().load('completion.dawg', mmap=True, prefetch=True)
+        data = pickle.dumps(d)
+
+        monkeypatch.chdir(os.path.dirname(__file__))
+        d2 = pickle.loads(data)
+        assert d2.keys() == sorted(self.keys)
+        assert d2._mmap_prefetch
+
+    def test_mmap_invalid_file(self):
+        fd, path = tempfile.mkstemp()
+        with open(path, 'wb') as f:
+            f.write(b'\x10\x00\x00\x00foo')
+
+        with pytest.raises(EOFError):
+            dawg_python.CompletionDAWG().load(path, mmap=True)
+
 
 
 class TestIntDAWG(object):
     payload = {'foo': 1, 'bar': 5, 'foobar': 3}
+    path = data_path('small', 'int_dawg.dawg')
 
     def dawg(self):
-        return dawg_python.IntDAWG().load(data_path('small', 'int_dawg.dawg'))
+        return dawg_python.IntDAWG().load(self.path)
 
     def test_getitem(self):
         d = self.dawg()
@@ -92,6 +287,12 @@ class TestIntDAWG(object):
         with pytest.raises(KeyError):
             d['fo']
 
+    def test_get_many(self):
+        d = self.dawg()
+        keys = ['foobar', 'x', 'fo', 'foo', 'bar', 'foo', '']
+        assert d.get_many(keys) == [3, None, None, 1, 5, 1, None]
+        assert d.get_many(keys, -1) == [d.get(key, -1) for key in keys]
+
     def test_pickling(self):
         d = self.dawg()
 
@@ -102,10 +303,62 @@ class TestIntDAWG(object):
             assert key in d2
             assert d[key] == value
 
+    def test_mmap(self):
+        d = self.dawg()
+        with d.__class__().load(self.path, mmap=True) as d2:
+            for key, value in self.payload.items():
+                assert d2[key] == value
+
+    def test_decoded(self):
+        d = self.dawg().__class__().load(self.path, decoded=True)
+        for key, value in self.payload.items():
+            assert d[key] == value
+        assert d.get('fo') is None
+        assert d.prefixes('foobarz') == ['foo', 'foobar']
+
+        d2 = pickle.loads(pickle.dumps(d))
+        assert isinstance(d2.dct, dawg_python.wrapper.DecodedDictionary)
+        assert d2['foobar'] == 3
+
+
+    def test_prefix_items(self):
+        d = self.dawg()
+        assert d.prefix_items('foobarz') == [('foo', 1), ('foobar', 3)]
+        assert d.prefix_items(b'foobar') == [(b'foo', 1), (b'foobar', 3)]
+        assert d.prefix_values('foob') == [1]
+        assert d.prefix_items('x') == []
+        assert d.longest_prefix('foobarz') == ('foobar', 3)
+        assert d.longest_prefix('fo') is None
+        assert d.longest_prefix('fo', ('', 0)) == ('', 0)
+
+    def test_prefix_items_large(self):
+        d = dawg_python.IntDAWG().load(data_path('large', 'int_dawg.dawg'))
+        for word in words100k()[::1000]:
+            key = word + 'ёz'
+            assert d.prefix_items(key) == [(prefix, d[prefix]) for prefix in d.prefixes(key)]
+
+    def test_iter_matches(self):
+        d = self.dawg()
+        assert list(d.iter_matches('a foobar')) == [(2, 5, 'foo', 1), (2, 8, 'foobar', 3), (5, 8, 'bar', 5)]
+        assert list(d.iter_matches('a foobar', overlapping=False)) == [(2, 8, 'foobar', 3)]
+
+    @pytest.mark.parametrize("decoded", [False, True])
+    def test_iter_matches_large(self, decoded):
+        d = dawg_python.IntDAWG().load(data_path('large', 'int_dawg.dawg'), decoded=decoded)
+        text = ' '.join(words100k()[::1000])
+        expected = [
+            (start, start + len(key), key, d[key])
+            for start in range(len(text))
+            for key in d.prefixes(text[start:])
+        ]
+        assert list(d.iter_matches(text)) == expected
+
 
 class TestIntCompletionDawg(TestIntDAWG):
+    path = data_path('small', 'int_completion_dawg.dawg')
+
     def dawg(self):
-        return dawg_python.IntCompletionDAWG().load(data_path('small', 'int_completion_dawg.dawg'))
+        return dawg_python.IntCompletionDAWG().load(self.path)
 
     def test_completion_keys(self):
         assert self.dawg().keys() == sorted(self.payload.keys())
@@ -119,3 +372,41 @@ class TestIntCompletionDawg(TestIntDAWG):
 
     def test_completion_items(self):
         assert self.dawg().items() == sorted(self.payload.items(), key=lambda r: r[0])
+
+    def test_completion_values(self):
+        d = self.dawg()
+        assert d.values() == [value for key, value in d.items()]
+        assert d.values('fo') == [1, 3]
+        assert d.values('z') == []
+        assert d.values(limit=1) == [5]
+        assert list(d.itervalues('fo')) == d.values('fo')
+
+    def test_sum_values(self):
+        d = self.dawg()
+        assert d.sum_values() == 9
+        assert d.sum_values('fo') == 4
+        assert d.sum_values('foob') == 3
+        assert d.sum_values('z') == 0
+        assert d.count('fo') == 2
+
+    def test_top_k(self):
+        d = self.dawg()
+        assert d.top_k(k=2) == [('bar', 5), ('foobar', 3)]
+        assert d.top_k('fo', 1) == [('foobar', 3)]
+        assert d.top_k('fo') == [('foobar', 3), ('foo', 1)]
+        assert d.top_k('x') == []
+        assert d.top_k(k=0) == []
+
+    def test_lazy_guide(self):
+        d = dawg_python.IntCompletionDAWG().load(self.path, lazy_guide=True)
+        assert d['foo'] == 1
+        assert d.get_many(['bar', 'x']) == [5, None]
+        assert d._guide is None
+        assert d.top_k(k=1) == [('bar', 5)]
+
+    def test_items_page(self):
+        d = self.dawg()
+        items, cursor = d.items_page(limit=2)
+        assert items == [('bar', 5), ('foo', 1)]
+        assert d.items_page(limit=2, cursor=cursor) == ([('foobar', 3)], None)
+        assert d.items(limit=1) == [('bar', 5)]
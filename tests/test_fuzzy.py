@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 
+import pytest
 import dawg_python
 
 from .utils import words100k, data_path
@@ -17,3 +18,45 @@ class TestDictionary(object):
     def test_find(self):
         for word in words:
             assert dawg.find(word.encode('utf8')) == len(word)
+
+    def test_decoded(self):
+        decoded = dawg_python.wrapper.DecodedDictionary(dawg)
+        assert decoded.nbytes() > dawg.nbytes()
+        for word in words:
+            b_word = word.encode('utf8')
+            assert decoded.find(b_word) == len(word)
+            assert decoded.find(b_word + b'\x01') == -1
+            assert decoded.follow_bytes(b_word[:3], decoded.ROOT) == dawg.follow_bytes(b_word[:3], dawg.ROOT)
+
+    @pytest.mark.parametrize("depth", [1, 3])
+    def test_jump_table(self, depth):
+        dic = dawg_python.Dictionary.load(data_path('large', 'int_dawg.dawg'))
+        dic.build_jump_table(depth)
+        for word in words[::10]:
+            b_word = word.encode('utf8')
+            assert dic.find(b_word) == len(word)
+            assert dic.find(b_word[:-1] + b'\xff') == -1
+            labels = bytearray(b'x' + b_word + b'\xff')
+            for start in [0, 1]:
+                assert dic.prefix_indices(labels, start) == dawg.prefix_indices(labels, start)
+                assert dic.prefix_indices(labels, start, 1) == dawg.prefix_indices(labels, start, 1)
+        assert dic.follow_bytes(b'', dic.ROOT) == dic.ROOT
+
+        decoded = dawg_python.wrapper.DecodedDictionary(dic)
+        decoded.build_jump_table(depth)
+        for word in words[:100]:
+            b_word = bytearray(word.encode('utf8'))
+            assert dic.find(b_word) == decoded.find(b_word) == len(word)
+            assert dic.follow_bytes(b_word, dic.ROOT) == dawg.follow_bytes(b_word, dawg.ROOT)
+
+        dic.build_jump_table(0)
+        assert dic.jump_depth == 0
+        assert dic.find(words[0].encode('utf8')) == len(words[0])
+
+    def test_follow_many(self):
+        keys = [word.encode('utf8') for word in words[:5000]]
+        keys += [key[:-1] + b'!' for key in keys[::10]]
+        indices = list(dawg.follow_many(sorted(keys), dawg.ROOT))
+        assert indices == [dawg.follow_bytes(key, dawg.ROOT) for key in sorted(keys)]
+        decoded = dawg_python.wrapper.DecodedDictionary(dawg)
+        assert list(decoded.follow_many(sorted(keys), decoded.ROOT)) == indices
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import pytest
+import dawg_python
+from dawg_python import instrument, wrapper
+
+from .utils import data_path
+
+
+@pytest.fixture
+def instrumented():
+    instrument.reset()
+    instrument.enable()
+    try:
+        yield
+    finally:
+        instrument.disable()
+        instrument.reset()
+
+
+def record_dawg(**kwargs):
+    return dawg_python.RecordDAWG(str("=H")).load(data_path('small', 'prediction-record.dawg'), **kwargs)
+
+
+def queries(d):
+    return [
+        d.get('ЁЖИК'), 'ЁЖ' in d, d.keys('Ё'), d.items(), d.prefixes('ЁЖИКЕ'),
+        d.prefix_items('ЁЖИКЕ'), d.get_many(['ЁЖИК', 'x']), d.similar_items('ЕЖИК', d.compile_replaces({'Е': 'Ё'})),
+        d.find_all('ЁЖИК ЁЖ'), d.count('Ё'), d.keys_page('Ё', limit=1),
+    ]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {'decoded': True}, {'jump_depth': 2}])
+def test_same_results(instrumented, kwargs):
+    d = record_dawg(**kwargs)
+    res = queries(d)
+    instrument.disable()
+    assert queries(record_dawg(**kwargs)) == res
+
+
+def test_counters(instrumented):
+    d = record_dawg()
+    assert d.get('ЁЖИК') == [(4,)]
+    snapshot = instrument.stats()
+    # key, separator and base64-encoded payload (4 chars and '\n')
+    assert snapshot['transitions'] == len('ЁЖИК'.encode('utf8')) + 1 + 5
+    assert snapshot['completer_steps'] == 2
+    assert snapshot['payload_decodes'] == 1
+
+    d['ЁЖИК']
+    latency = instrument.stats()['latency']
+    assert latency['RecordDAWG.get']['count'] == 2
+    assert latency['RecordDAWG.__getitem__']['count'] == 1
+    assert latency['RecordDAWG.get']['buckets'][-1] == ['+Inf', 2]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {'decoded': True}])
+def test_get_many(instrumented, kwargs):
+    d = record_dawg(**kwargs)
+    assert d.get_many(['ЁЖИК', 'ЁЖИКЕ']) == [[(4,)], [(5,)]]
+    # the common prefix is followed once
+    assert instrument.stats()['transitions'] == len('ЁЖИКЕ'.encode('utf8')) + 2 * (1 + 5)
+
+
+def test_int_completion_dawg(instrumented):
+    d = dawg_python.IntCompletionDAWG().load(data_path('small', 'int_completion_dawg.dawg'))
+    assert d.items('fo') == [('foo', 1), ('foobar', 3)]
+    assert instrument.stats()['latency']['IntCompletionDAWG.items']['count'] == 1
+    assert instrument.stats()['payload_decodes'] == 0
+
+
+def test_children(instrumented):
+    d = dawg_python.DAWG().load(data_path('small', 'prediction.dawg'))
+    assert d.fuzzy_keys('ЁЖ', 0) == ['ЁЖ']
+    assert instrument.stats()['transitions'] > 0
+
+
+def test_records_array(instrumented):
+    pytest.importorskip('numpy')
+    d = record_dawg()
+    keys, records = d.items_array('ЁЖ')
+    assert instrument.stats()['payload_decodes'] == len(records) == 3
+
+
+def test_exporters(instrumented):
+    record_dawg().get('ЁЖИК')
+    assert json.loads(instrument.to_json()) == instrument.stats()
+
+    text = instrument.to_prometheus()
+    assert 'dawg_python_transitions_total 14\n' in text
+    assert 'dawg_python_method_seconds_bucket{method="RecordDAWG.get",le="+Inf"} 1\n' in text
+    assert 'dawg_python_method_seconds_count{method="RecordDAWG.get"} 1\n' in text
+
+
+def test_disable():
+    follow_bytes = wrapper.Dictionary.follow_bytes
+    get = dawg_python.RecordDAWG.get
+    instrument.enable()
+    instrument.enable()
+    assert instrument.is_enabled()
+    assert wrapper.Dictionary.follow_bytes is not follow_bytes
+    instrument.disable()
+
+    assert not instrument.is_enabled()
+    assert wrapper.Dictionary.follow_bytes is follow_bytes
+    assert dawg_python.RecordDAWG.get is get
+    instrument.reset()
+    record_dawg().get('ЁЖИК')
+    assert instrument.stats() == {'transitions': 0, 'completer_steps': 0, 'payload_decodes': 0, 'latency': {}}
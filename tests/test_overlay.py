@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+import dawg_python
+from dawg_python.overlay import OverlayDAWG
+
+from .utils import data_path
+
+
+class TestRecordOverlay(object):
+
+    def overlay(self):
+        d = OverlayDAWG(dawg_python.RecordDAWG(str(">3H")).load(data_path('small', 'record.dawg')))
+        d['fo'] = [(1, 1, 1)]
+        d['foo'] = [(5, 5, 5), (4, 4, 4)]
+        d['zzz'] = [(0, 0, 0)]
+        del d['bar']
+        return d
+
+    def test_get(self):
+        d = self.overlay()
+        assert d['fo'] == [(1, 1, 1)]
+        assert d['foo'] == [(4, 4, 4), (5, 5, 5)]
+        assert d['foobar'] == [(6, 3, 0)]
+        assert d.get('bar') is None
+        assert d.get('x', 'default') == 'default'
+        with pytest.raises(KeyError):
+            d['bar']
+
+    def test_contains(self):
+        d = self.overlay()
+        assert 'fo' in d
+        assert b'foo' in d
+        assert 'foobar' in d
+        assert 'bar' not in d
+        assert 'f' not in d
+
+    def test_items(self):
+        d = self.overlay()
+        assert d.items() == [
+            ('fo', (1, 1, 1)),
+            ('foo', (4, 4, 4)), ('foo', (5, 5, 5)),
+            ('foobar', (6, 3, 0)),
+            ('zzz', (0, 0, 0)),
+        ]
+        assert d.items('foo') == [('foo', (4, 4, 4)), ('foo', (5, 5, 5)), ('foobar', (6, 3, 0))]
+        assert d.items('z') == [('zzz', (0, 0, 0))]
+        assert d.items('x') == []
+        assert d.items(limit=2) == [('fo', (1, 1, 1)), ('foo', (4, 4, 4))]
+
+    def test_keys(self):
+        d = self.overlay()
+        assert d.keys() == ['fo', 'foo', 'foo', 'foobar', 'zzz']
+        assert d.keys('b') == []
+
+    def test_delete(self):
+        d = self.overlay()
+        with pytest.raises(KeyError):
+            del d['bar']
+        with pytest.raises(KeyError):
+            del d['x']
+        del d['zzz']
+        assert 'zzz' not in d
+        assert d.num_changes() == 4
+
+    def test_invalid_values(self):
+        d = self.overlay()
+        with pytest.raises(ValueError):
+            d['x'] = []
+        with pytest.raises(ValueError):
+            d[''] = [(1, 1, 1)]
+        for value in [[(1, 2)], [(1, 2, 2 ** 16)], [(1, 2, 'x')], [1]]:
+            with pytest.raises(ValueError):
+                d['x'] = value
+        assert 'x' not in d
+
+    def test_compact(self, tmpdir):
+        d = self.overlay()
+        items = d.items()
+        path = str(tmpdir.join('record.dawg'))
+
+        new = d.compact(path)
+        assert d.dawg is new
+        assert d.num_changes() == 0
+        assert new.items() == items
+        assert dawg_python.RecordDAWG(str(">3H")).load(path).items() == items
+
+
+class TestIntCompletionOverlay(object):
+
+    def overlay(self):
+        return OverlayDAWG(dawg_python.IntCompletionDAWG().load(data_path('small', 'int_completion_dawg.dawg')))
+
+    def test_unchanged(self):
+        d = self.overlay()
+        assert d.items() == d.dawg.items()
+        assert d['foo'] == 1
+
+    def test_changes(self):
+        d = self.overlay()
+        d['foo'] = 10
+        d['baz'] = 2
+        del d['foobar']
+        assert d.items() == [('bar', 5), ('baz', 2), ('foo', 10)]
+        assert d.keys('ba') == ['bar', 'baz']
+        assert d.get('foobar', -1) == -1
+
+        d['foobar'] = 7
+        assert d['foobar'] == 7
+        assert d.compact().items() == [('bar', 5), ('baz', 2), ('foo', 10), ('foobar', 7)]
+
+    def test_invalid_values(self):
+        d = self.overlay()
+        for value in [-1, 2 ** 31, 2 ** 40, True, 1.0, '1']:
+            with pytest.raises(ValueError):
+                d['foo'] = value
+        d['foo'] = 2 ** 31 - 1
+        assert d.compact()['foo'] == 2 ** 31 - 1
+
+
+class TestBytesOverlay(object):
+
+    def overlay(self):
+        return OverlayDAWG(dawg_python.BytesDAWG().load(data_path('small', 'bytes.dawg')))
+
+    def test_payloads(self):
+        d = self.overlay()
+        d['foo'] = [b'x', bytearray(b'y')]
+        assert d['foo'] == [b'x', b'y']
+        assert d.compact()['foo'] == [b'x', b'y']
+
+    def test_payload_order(self):
+        d = self.overlay()
+        # payloads are in the order of their base64 encodings ('/w==' < 'YQ==')
+        d['foo'] = [b'x', b'a', b'\xff']
+        assert d['foo'] == [b'\xff', b'a', b'x']
+        items = d.items()
+        assert d.compact().items() == items
+
+    def test_invalid_values(self):
+        d = self.overlay()
+        for value in [['str'], [1], [None]]:
+            with pytest.raises(ValueError):
+                d['foo'] = value
+
+
+def test_unsupported_dawgs():
+    with pytest.raises(TypeError):
+        OverlayDAWG(dawg_python.IntDAWG().load(data_path('small', 'int_dawg.dawg')))
+    with pytest.raises(ValueError):
+        OverlayDAWG(dawg_python.BytesDAWG(payload_mode='raw').load(data_path('small', 'bytes.dawg')))
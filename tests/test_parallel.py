@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+import dawg_python
+
+from .utils import data_path, words100k
+
+parallel = pytest.importorskip("dawg_python.parallel")
+
+words = words100k()[::50]
+
+
+@pytest.fixture(params=['process', 'thread'])
+def kind(request):
+    return request.param
+
+
+class TestExecutor(object):
+
+    def dawg(self, mmap=False):
+        return dawg_python.RecordDAWG(str("<H")).load(data_path("large", "record_dawg.dawg"), mmap=mmap)
+
+    def test_get(self, kind):
+        d = self.dawg()
+        keys = words + ['x' + word for word in words[:100]]
+        with parallel.Executor(d, workers=2, kind=kind, chunk_size=100) as executor:
+            assert list(executor.get(keys)) == d.get_many(keys)
+            assert list(executor.contains(keys)) == d.contains_many(keys)
+
+    def test_mmap(self, kind):
+        with self.dawg(mmap=True) as d:
+            with parallel.Executor(d, workers=2, kind=kind, chunk_size=7, max_pending=1) as executor:
+                assert list(executor.get(iter(words[:100]))) == d.get_many(words[:100])
+
+    def test_keys(self, kind):
+        d = self.dawg()
+        prefixes = [word[:3] for word in words[:20]] + ['zzz']
+        with parallel.Executor(d, workers=2, kind=kind, chunk_size=3) as executor:
+            assert list(executor.keys(prefixes)) == [d.keys(prefix) for prefix in prefixes]
+
+    def test_similar_items(self, kind):
+        d = self.dawg()
+        replaces = d.compile_replaces({'е': 'ё'})
+        with parallel.Executor(d, workers=2, kind=kind, chunk_size=50) as executor:
+            res = list(executor.similar_items(words[:200], replaces))
+        assert res == [d.similar_items(word, replaces) for word in words[:200]]
+
+    def test_empty(self, kind):
+        with parallel.Executor(self.dawg(), workers=1, kind=kind) as executor:
+            assert list(executor.get([])) == []
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            parallel.Executor(self.dawg(), kind='fiber')
+        with pytest.raises(ValueError):
+            parallel.Executor(self.dawg(), chunk_size=0)
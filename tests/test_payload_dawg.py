@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
+import pickle
 
 import pytest
 import dawg_python
@@ -76,12 +77,123 @@ class TestBytesDAWG(object):
         d = self.dawg()
         assert d.items('foob') == [('foobar', b'data4')]
 
+    def test_values(self):
+        d = self.dawg()
+        assert d.values() == [value for key, value in sorted(self.DATA)]
+        assert d.values('foo') == [b'data1', b'data3', b'data4']
+        assert d.values('fo', limit=1) == [b'data1']
+        assert d.values('x') == []
+        assert list(d.itervalues('foob')) == [b'data4']
+
+    def test_count(self):
+        d = self.dawg()
+        assert d.count() == 4
+        assert d.count('foo') == 3
+        assert d.count('food') == 0
+
+    def test_limit(self):
+        d = self.dawg()
+        assert d.keys(limit=2) == ['bar', 'foo']
+        assert d.items('fo', limit=2) == [('foo', b'data1'), ('foo', b'data3')]
+
+    def test_items_page(self):
+        d = self.dawg()
+        items, cursor = d.items_page('fo', limit=1)
+        assert items == [('foo', b'data1')]
+        items, cursor = d.items_page('fo', limit=1, cursor=cursor)
+        assert items == [('foo', b'data3')]
+        assert d.items_page('fo', limit=1, cursor=cursor) == ([('foobar', b'data4')], None)
+
+    def test_keys_page(self):
+        d = self.dawg()
+        keys, cursor = d.keys_page(limit=2)
+        assert keys == ['bar', 'foo']
+        assert d.keys_page(limit=2, cursor=cursor) == (['foo', 'foobar'], None)
+
+    def test_prefix_items(self):
+        d = self.dawg()
+        assert d.prefix_items('foobarz') == [('foo', [b'data1', b'data3']), ('foobar', [b'data4'])]
+        assert d.prefix_values('foob') == [[b'data1', b'data3']]
+        assert d.longest_prefix('foobarz') == ('foobar', [b'data4'])
+        assert d.longest_prefix('x') is None
+
+    def test_find_all(self):
+        d = self.dawg()
+        assert d.find_all('a foobar') == [
+            (2, 5, 'foo', [b'data1', b'data3']),
+            (2, 8, 'foobar', [b'data4']),
+            (5, 8, 'bar', [b'data2']),
+        ]
+        assert d.find_all('a foobar', longest=True, overlapping=False) == [(2, 8, 'foobar', [b'data4'])]
+
+    def test_get_many(self):
+        d = self.dawg()
+        keys = ['foobar', 'x', 'foo', 'fo', 'bar', 'food']
+        assert d.get_many(keys) == [d.get(key) for key in keys]
+        assert d.contains_many(keys) == [True, False, True, False, True, False]
+
+    def test_mmap(self):
+        path = data_path("small", "bytes.dawg")
+        with dawg_python.BytesDAWG().load(path, mmap=True) as d:
+            assert d.items() == sorted(self.DATA)
+            assert d['foo'] == [b'data1', b'data3']
+
+    @pytest.mark.parametrize("decoded", [False, True])
+    def test_jump_table(self, decoded):
+        d = dawg_python.BytesDAWG().load(data_path("small", "bytes.dawg"), jump_depth=2, decoded=decoded)
+        assert d.prefixes("foobarz") == ["foo", "foobar"]
+        assert d.prefixes("fo") == []
+        assert d.prefix_items('foobarz') == [('foo', [b'data1', b'data3']), ('foobar', [b'data4'])]
+        assert d.find_all('a foobar') == self.dawg().find_all('a foobar')
+
+    def test_lazy_guide(self):
+        d = dawg_python.BytesDAWG().load(data_path("small", "bytes.dawg"), lazy_guide=True)
+        assert 'foo' in d
+        assert d.contains_many(['bar', 'x']) == [True, False]
+        assert d._guide is None
+        # payloads are enumerated with the guide
+        assert d['foo'] == [b'data1', b'data3']
+        assert d._guide is not None
+
     def test_prefixes(self):
         d = self.dawg()
         assert d.prefixes("foobarz") == ["foo", "foobar"]
         assert d.prefixes("x") == []
         assert d.prefixes("bar") == ["bar"]
 
+    def test_pickling(self):
+        d = pickle.loads(pickle.dumps(self.dawg()))
+        assert d.items() == sorted(self.DATA)
+
+    def test_decoded(self):
+        d = dawg_python.BytesDAWG().load(data_path("small", "bytes.dawg"), decoded=True)
+        assert d.items() == sorted(self.DATA)
+        assert d['foo'] == [b'data1', b'data3']
+        assert 'fo' not in d
+        assert d.find_all('foobar', longest=True) == [(0, 6, 'foobar', [b'data4']), (3, 6, 'bar', [b'data2'])]
+
+    def test_raw_payloads(self):
+        d = dawg_python.BytesDAWG(payload_mode='raw').load(data_path("small", "bytes.dawg"))
+        assert [d.decode_payload(raw) for raw in d['foo']] == [b'data1', b'data3']
+        assert [(key, d.decode_payload(raw)) for key, raw in d.items()] == sorted(self.DATA)
+        assert [(key, d.decode_payload(raw)) for key, raw in d.iteritems()] == sorted(self.DATA)
+
+    def test_lazy_payloads(self):
+        d = dawg_python.BytesDAWG(payload_mode='lazy').load(data_path("small", "bytes.dawg"))
+        assert [value.value for value in d['foo']] == [b'data1', b'data3']
+        assert [(key, value.value) for key, value in d.items()] == sorted(self.DATA)
+        assert [value.raw for value in d['foo']] == [b'ZGF0YTE=\n', b'ZGF0YTM=\n']
+
+    def test_payload_mode_pickling(self):
+        d = dawg_python.BytesDAWG(payload_mode='raw').load(data_path("small", "bytes.dawg"))
+        d = pickle.loads(pickle.dumps(d))
+        assert d.payload_mode == 'raw'
+        assert [d.decode_payload(raw) for raw in d['foo']] == [b'data1', b'data3']
+
+    def test_invalid_payload_mode(self):
+        with pytest.raises(ValueError):
+            dawg_python.BytesDAWG(payload_mode='foo')
+
 
 class TestRecordDAWG(object):
 
@@ -117,10 +229,48 @@ class TestRecordDAWG(object):
         with pytest.raises(KeyError):
             d['f']
 
+    def test_items_page(self):
+        d = self.dawg()
+        items, cursor = d.items_page(limit=3)
+        assert items == [('bar', (3, 1, 0)), ('foo', (3, 2, 1)), ('foo', (3, 2, 256))]
+        assert d.items_page(limit=3, cursor=cursor) == ([('foobar', (6, 3, 0))], None)
+
+    def test_items_page_large(self):
+        d = dawg_python.RecordDAWG(str("<H")).load(data_path("large", "record_dawg.dawg"))
+        for prefix in ['ан', 'Пр', 'zzz']:
+            items, pages = [], 0
+            page, cursor = d.items_page(prefix, limit=7)
+            items.extend(page)
+            while cursor is not None:
+                page, cursor = d.items_page(prefix, limit=7, cursor=cursor)
+                items.extend(page)
+                pages += 1
+            assert items == d.items(prefix)
+            assert pages == max(len(items) - 1, 0) // 7
+
+    def test_count_large(self):
+        d = dawg_python.RecordDAWG(str("<H")).load(data_path("large", "record_dawg.dawg"))
+        for prefix in ['', 'ан', 'Пр', 'A', 'zzz']:
+            assert d.count(prefix) == len(d.keys(prefix))
+
+    def test_get_many(self):
+        d = self.dawg()
+        assert d.get_many(['foo', 'x', 'foobar']) == [[(3, 2, 1), (3, 2, 256)], None, [(6, 3, 0)]]
+
     def test_record_items(self):
         d = self.dawg()
         assert d.items() == sorted(self.STRUCTURED_DATA)
 
+    def test_prefix_items(self):
+        d = self.dawg()
+        assert d.prefix_items('foobarz') == [('foo', [(3, 2, 1), (3, 2, 256)]), ('foobar', [(6, 3, 0)])]
+        assert d.longest_prefix('barz') == ('bar', [(3, 1, 0)])
+
+    def test_record_values(self):
+        d = self.dawg()
+        assert d.values() == [value for key, value in sorted(self.STRUCTURED_DATA)]
+        assert list(d.itervalues('foob')) == [(6, 3, 0)]
+
     def test_record_keys(self):
         d = self.dawg()
         assert d.keys() == ['bar', 'foo', 'foo', 'foobar',]
@@ -136,3 +286,17 @@ class TestRecordDAWG(object):
         assert d.prefixes("foobarz") == ["foo", "foobar"]
         assert d.prefixes("x") == []
         assert d.prefixes("bar") == ["bar"]
+
+    def test_pickling(self):
+        d = pickle.loads(pickle.dumps(self.dawg()))
+        assert d.items() == sorted(self.STRUCTURED_DATA)
+        assert d.fmt == ">3H"
+
+    def test_lazy_payloads(self):
+        path = data_path("small", "record.dawg")
+        d = dawg_python.RecordDAWG(">3H", payload_mode='lazy').load(path)
+        assert [value.value for value in d['foo']] == [(3, 2, 1), (3, 2, 256)]
+        assert [(key, value.value) for key, value in d.items()] == sorted(self.STRUCTURED_DATA)
+
+        d = dawg_python.RecordDAWG(">3H", payload_mode='raw').load(path)
+        assert [d.decode_payload(raw) for raw in d['foo']] == [(3, 2, 1), (3, 2, 256)]
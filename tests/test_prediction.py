@@ -68,3 +68,104 @@ class TestPrediction(object):
     def test_record_dawg_items_values(self, word, prediction):
         d = self.record_dawg()
         assert d.similar_item_values(word, self.REPLACES) == prediction
+
+
+class TestMultiCharPrediction(object):
+
+    REPLACES = dawg_python.DAWG.compile_replaces({
+        'Е': 'Ё',
+        'Ё': 'Е',
+        'ЙО': 'Ё',
+        'ЖЫК': 'ЖИК',
+        'Ы': ['Е', 'Ё'],
+    })
+
+    SUITE = [
+        ('ДЕРЁВНЯ', ['ДЕРЁВНЯ', 'ДЕРЕВНЯ']),
+        ('ЙОЖ', ['ЁЖ']),
+        ('ЙОЖЫК', ['ЁЖИК']),
+        ('ЙОЖЫКЕ', ['ЁЖИКЕ']),
+        ('ОЗЫРА', ['ОЗЕРА', 'ОЗЁРА']),
+        ('ЫМ', ['ЕМ']),
+        ('ЙО', []),
+    ]
+
+    @pytest.mark.parametrize(("word", "prediction"), SUITE)
+    def test_dawg_prediction(self, word, prediction):
+        d = dawg_python.DAWG().load(data_path("small", "prediction.dawg"))
+        assert d.similar_keys(word, self.REPLACES) == prediction
+
+    @pytest.mark.parametrize(("word", "prediction"), SUITE)
+    def test_record_dawg_items(self, word, prediction):
+        d = dawg_python.RecordDAWG(str("=H")).load(data_path("small", "prediction-record.dawg"))
+        assert d.similar_items(word, self.REPLACES) == [(w, [(len(w),)]) for w in prediction]
+        assert d.similar_item_values(word, self.REPLACES) == [[(len(w),)] for w in prediction]
+
+    def test_invalid_replaces(self):
+        with pytest.raises(ValueError):
+            dawg_python.DAWG.compile_replaces({'': 'Ё'})
+
+    @pytest.mark.parametrize(("word", "replaces", "prediction"), [
+        ('ДЕРЕВНЯ', {'ЕРЕ': 'ЕРЁ', 'Е': 'Ё'}, ['ДЕРЕВНЯ', 'ДЕРЁВНЯ']),
+        ('ОЗЕРА', {'ЗЕ': 'ЗЁ', 'Е': 'Ё'}, ['ОЗЕРА', 'ОЗЁРА']),
+        ('ЁЖЫК', {'ЖЫК': 'ЖИК', 'Ы': 'И'}, ['ЁЖИК']),
+    ])
+    def test_overlapping_replaces(self, word, replaces, prediction):
+        replaces = dawg_python.DAWG.compile_replaces(replaces)
+        d = dawg_python.RecordDAWG(str("=H")).load(data_path("small", "prediction-record.dawg"))
+        assert d.similar_keys(word, replaces) == prediction
+        assert d.similar_items(word, replaces) == [(w, [(len(w),)]) for w in prediction]
+        assert d.similar_item_values(word, replaces) == [[(len(w),)] for w in prediction]
+
+    def test_empty_replaces(self):
+        d = dawg_python.DAWG().load(data_path("small", "prediction.dawg"))
+        assert d.similar_keys('ЁЖ', dawg_python.DAWG.compile_replaces({})) == ['ЁЖ']
+
+
+class TestFuzzy(object):
+
+    DATA = TestPrediction.DATA
+
+    def dawg(self):
+        return dawg_python.DAWG().load(data_path("small", "prediction.dawg"))
+
+    def record_dawg(self):
+        return TestPrediction().record_dawg()
+
+    @pytest.mark.parametrize(("word", "max_distance", "prediction"), [
+        ('ЕЖИК', 0, []),
+        ('ЁЖИК', 0, ['ЁЖИК']),
+        ('ЕЖИК', 1, ['ЁЖИК']),
+        ('ЕЖИК', 2, ['ЁЖИК', 'ЁЖИКЕ']),
+        ('ОЗЕРА', 1, ['ОЗЁРА', 'ОЗЕРА', 'ОЗЕРО']),
+        ('ОЗРЕА', 1, []),
+        ('М', 1, ['ЕМ']),
+        ('', 2, ['ЁЖ', 'ЕМ']),
+    ])
+    def test_fuzzy_keys(self, word, max_distance, prediction):
+        assert self.dawg().fuzzy_keys(word, max_distance) == prediction
+        assert self.record_dawg().fuzzy_keys(word, max_distance) == prediction
+
+    def test_transpositions(self):
+        d = self.dawg()
+        assert d.fuzzy_keys('ОЗРЕА', 1, transpositions=True) == ['ОЗЕРА']
+        assert d.fuzzy_keys('ОЗРЕА', 2) == ['ОЗЁРА', 'ОЗЕРА']
+
+    def test_limit(self):
+        d = self.dawg()
+        assert d.fuzzy_keys('ОЗЕРА', 1, limit=2) == ['ОЗЁРА', 'ОЗЕРА']
+
+    def test_fuzzy_items(self):
+        d = self.record_dawg()
+        assert d.fuzzy_items('ОЗЕРО', 1) == [
+            ('ОЗЕРА', [(5,)]),
+            ('ОЗЕРО', [(5,)]),
+        ]
+        assert d.fuzzy_items('ОЗЕРО', 1, limit=1) == [('ОЗЕРА', [(5,)])]
+
+    def test_int_dawg_fuzzy_items(self):
+        for cls, name in [(dawg_python.IntDAWG, 'int_dawg.dawg'),
+                          (dawg_python.IntCompletionDAWG, 'int_completion_dawg.dawg')]:
+            d = cls().load(data_path("small", name))
+            assert d.fuzzy_items('fo', 1) == [('foo', 1)]
+            assert d.fuzzy_items('fooba', 2) == [('foo', 1), ('foobar', 3)]
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import os
+import json
+import collections
+
+import pytest
+import dawg_python
+from dawg_python import report
+
+from .utils import data_path
+
+
+def key_depths(keys):
+    return dict(collections.Counter(len(key.encode('utf8')) for key in set(keys)))
+
+
+@pytest.mark.parametrize(["cls_spec", "path"], [
+    ('CompletionDAWG', ('small', 'completion.dawg')),
+    ('BytesDAWG', ('small', 'bytes.dawg')),
+    ('RecordDAWG:>3H', ('small', 'record.dawg')),
+    ('IntCompletionDAWG', ('large', 'int_completion_dawg.dawg')),
+    ('RecordDAWG:<H', ('large', 'record_dawg.dawg')),
+])
+def test_describe(cls_spec, path):
+    d = dawg_python.dawgs.new_dawg(cls_spec).load(data_path(*path))
+    info = report.describe(d)
+    keys = d.keys()
+
+    assert info['values'] == len(keys)
+    assert info['keys'] == len(set(keys))
+    assert info['depths'] == key_depths(keys)
+    assert info['units'] == d.dct.size()
+    assert 0 < info['free_units'] < info['units']
+    assert info['bytes']['dictionary'] + info['bytes']['guide'] == os.path.getsize(data_path(*path))
+    assert info['guide_units'] == info['units']
+    assert sum(info['branching'].values()) > 0
+    assert info['cost']['transitions'] * info['keys'] == pytest.approx(
+        sum(len(key.encode('utf8')) for key in set(keys)) + (
+            info['keys'] if isinstance(d, dawg_python.BytesDAWG) else 0
+        )
+    )
+
+
+def test_payloads():
+    d = dawg_python.BytesDAWG().load(data_path('small', 'bytes.dawg'))
+    info = report.describe(d)
+    # payloads are base64-encoded with a trailing newline
+    assert info['payload_depths'] == {len(b'ZGF0YTE=\n'): 4}
+    assert info['cost']['payload_transitions'] == 9 * 4 / 3
+    assert 0 < info['bytes']['payloads'] < info['bytes']['dictionary'] + info['bytes']['guide']
+
+
+def test_int_dawg():
+    info = report.describe(dawg_python.IntDAWG().load(data_path('large', 'int_dawg.dawg')))
+    completion_info = report.describe(
+        dawg_python.IntCompletionDAWG().load(data_path('large', 'int_completion_dawg.dawg'))
+    )
+    assert info['guide_units'] is None
+    assert info['payload_depths'] is None
+    assert info['bytes']['guide'] == info['bytes']['payloads'] == 0
+    for name in ['keys', 'values', 'depths', 'branching', 'leaf_units']:
+        assert info[name] == completion_info[name]
+
+
+def test_memory():
+    path = data_path('large', 'int_dawg.dawg')
+    info = report.describe(dawg_python.IntDAWG().load(path))
+    assert info['bytes']['memory'] == os.path.getsize(path) - 4
+    decoded_info = report.describe(dawg_python.IntDAWG().load(path, decoded=True))
+    assert decoded_info['bytes']['memory'] == info['bytes']['memory'] + info['units'] * 10
+
+
+def test_empty():
+    d = dawg_python.CompletionDAWG().load(data_path('small', 'completion-empty.dawg'))
+    info = report.describe(d)
+    assert info['keys'] == info['values'] == 0
+    assert info['depths'] == {}
+    assert info['free_units'] == info['units'] == 256
+    assert info['leaf_units'] == info['extension_units'] == 0
+    assert info['branching'] == {}
+    text = report.memory_report(d)
+    assert 'CompletionDAWG: 0 keys, 0 values' in text
+    assert 'units: 256 (256 free, 0 leaf' in text
+    assert 'branching: -' in text
+
+
+def test_cli(capsys):
+    report.main(['RecordDAWG:>3H', data_path('small', 'record.dawg')])
+    out = capsys.readouterr()[0]
+    assert out.startswith('RecordDAWG: 3 keys, 4 values\n')
+    assert 'payload depths: 9:4\n' in out
+
+    report.main(['RecordDAWG:>3H', data_path('small', 'record.dawg'), '--json'])
+    info = json.loads(capsys.readouterr()[0])
+    assert info['keys'] == 3
+    assert info['depths'] == {'3': 2, '6': 1}
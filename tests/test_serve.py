@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import os
+import tempfile
+
+import pytest
+
+from .utils import data_path
+
+asyncio = pytest.importorskip("asyncio")
+protocol = pytest.importorskip("dawg_python.protocol")
+serve = pytest.importorskip("dawg_python.serve")
+client = pytest.importorskip("dawg_python.client")
+
+
+class TestProtocol(object):
+
+    @pytest.mark.parametrize("value", [
+        None, True, False, 0, -1, 2**63 - 1, -2**63, 2**100, 1.5, '', 'ёжик', b'', b'\x00\xff',
+        [], (), [1, ('a', b'b'), [None]], {'а': ['б', 'в'], 1: (2,)},
+    ])
+    def test_roundtrip(self, value):
+        res = protocol.loads(protocol.dumps(value))
+        assert res == value
+        assert type(res) == type(value)
+
+    @pytest.mark.parametrize("data", [b'', b'x', b's\x00\x00\x00\x05abc', b'i\x00', b'NN', b'l\x00\x00\x00\x02N'])
+    def test_invalid(self, data):
+        with pytest.raises(protocol.ProtocolError):
+            protocol.loads(data)
+
+    def test_unsupported(self):
+        with pytest.raises(TypeError):
+            protocol.dumps(object())
+
+
+class TestServer(object):
+
+    def server(self):
+        return serve.Server({
+            'record': serve.load_dawg('RecordDAWG:=H', data_path('small', 'prediction-record.dawg')),
+            'int': serve.load_dawg('IntCompletionDAWG', data_path('small', 'int_completion_dawg.dawg')),
+        })
+
+    def run(self, coro_func):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'dawg.sock')
+
+            async def main():
+                listener = await self.server().start(unix_path=path)
+                c = client.Client(unix_path=path, pool_size=2)
+                try:
+                    return await coro_func(c)
+                finally:
+                    await c.close()
+                    listener.close()
+                    await listener.wait_closed()
+
+            return asyncio.run(main())
+
+    def test_requests(self):
+        async def queries(c):
+            return (
+                await c.get('int', ['foo', 'x', 'bar']),
+                await c.contains('int', ['foo', 'x']),
+                await c.keys('int', ['fo', 'z']),
+                await c.similar_items('record', ['ЕЖИК', 'УЖ'], {'Е': 'Ё'}),
+            )
+
+        assert self.run(queries) == (
+            [1, None, 5],
+            [True, False],
+            [['foo', 'foobar'], []],
+            [[('ЁЖИК', [(4,)])], []],
+        )
+
+    def test_pipelining(self):
+        async def queries(c):
+            return await asyncio.gather(*[c.get('int', ['foo', 'bar'][:n % 3]) for n in range(100)])
+
+        assert self.run(queries) == [[1, 5][:n % 3] for n in range(100)]
+
+    def test_errors(self):
+        async def queries(c):
+            res = []
+            for args in [('missing', 'get', ['foo']), ('int', 'unknown', ['foo'])]:
+                with pytest.raises(client.ServerError):
+                    await c.request(*args)
+            res.append(await c.get('int', ['foo']))
+            return res
+
+        assert self.run(queries) == [[1]]
+
+    def test_replaces_cache(self):
+        server = serve.Server(self.server().dawgs, replaces_cache_size=2)
+        for letter in ['Е', 'Ж', 'Е', 'И']:
+            assert server.handle('record', 'similar_items', [['ЕЖИК'], {letter: 'Ё'}])
+        assert list(server._replaces) == [(('Е', 'Ё'),), (('И', 'Ё'),)]
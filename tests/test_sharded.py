@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import pytest
+import dawg_python
+from dawg_python import builder, sharded
+from dawg_python.sharded import ShardedDAWG
+
+from .utils import words100k
+
+RECORD_DATA = [
+    ('f', (1,)), ('foo', (2,)), ('foo', (3,)), ('foobar', (4,)), ('bar', (5,)),
+    ('baz', (6,)), ('ёж', (7,)), ('ёжик', (8,)), ('zzz', (9,)),
+]
+SHARDINGS = [
+    {'boundaries': ['b', 'fo', 'foob', 'ё']},
+    {'boundaries': ['c']},
+    {'num_shards': 1},
+    {'num_shards': 5},
+]
+
+
+@pytest.fixture(params=SHARDINGS)
+def record_dawgs(request, tmpdir):
+    path = str(tmpdir.join('record.json'))
+    sharded.build(path, 'RecordDAWG:<H', RECORD_DATA, **request.param)
+    return ShardedDAWG().load(path), builder.build(dawg_python.RecordDAWG(str('<H')), RECORD_DATA)
+
+
+def test_lookups(record_dawgs):
+    d, single = record_dawgs
+    for key in ['f', 'fo', 'foo', 'foobar', 'ёж', 'ёжи', 'zzz', 'x', '']:
+        assert (key in d) == (key in single)
+        assert d.get(key) == single.get(key)
+    assert d['foo'] == [(2,), (3,)]
+    with pytest.raises(KeyError):
+        d['x']
+
+
+def test_prefixes(record_dawgs):
+    d, single = record_dawgs
+    for key in ['foobarz', 'foo', 'ёжики', 'x', '']:
+        assert d.prefixes(key) == single.prefixes(key)
+
+
+def test_items(record_dawgs):
+    d, single = record_dawgs
+    for prefix in ['', 'f', 'foo', 'b', 'ё', 'x']:
+        assert d.items(prefix) == single.items(prefix)
+        assert d.keys(prefix) == single.keys(prefix)
+    assert d.items(limit=3) == single.items(limit=3)
+
+
+def test_lazy_loading(tmpdir):
+    path = str(tmpdir.join('record.json'))
+    sharded.build(path, 'RecordDAWG:<H', RECORD_DATA, boundaries=['b', 'f', 'ё'])
+    with ShardedDAWG().load(path, mmap=True) as d:
+        assert d.num_shards() == 4 and d.num_loaded() == 0
+        assert d.get('foo') == [(2,), (3,)]
+        assert d.num_loaded() == 1
+        assert d.keys('f', limit=1) == ['f']
+        assert d.num_loaded() == 1
+        assert d.keys('ё') == ['ёж', 'ёжик']
+        assert d.num_loaded() == 2
+    assert d.num_loaded() == 0
+
+
+def test_manifest(tmpdir):
+    path = str(tmpdir.join('words.json'))
+    sharded.build(path, 'IntCompletionDAWG', {'foo': 1, 'bar': 2}, boundaries=['c'])
+    with open(path, 'rb') as f:
+        manifest = json.loads(f.read().decode('utf8'))
+    assert manifest == {
+        'class': 'IntCompletionDAWG',
+        'sharding': 'range',
+        'shards': [{'path': 'words-0.dawg', 'start': ''}, {'path': 'words-1.dawg', 'start': 'c'}],
+    }
+    assert dawg_python.IntCompletionDAWG().load(str(tmpdir.join('words-1.dawg'))).items() == [('foo', 1)]
+
+
+def test_large(tmpdir):
+    words = sorted(set(words100k()))
+    values = dict((word, pos) for pos, word in enumerate(words))
+    path = str(tmpdir.join('words.json'))
+    d = sharded.build(path, 'IntCompletionDAWG', zip(words, range(len(words))), num_shards=4, input_is_sorted=True)
+    assert d.keys() == words
+    assert d.items('ми', limit=5) == [(word, values[word]) for word in words if word.startswith('ми')][:5]
+    for word in words[::1000]:
+        assert d[word] == values[word]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {'boundaries': ['b'], 'num_shards': 2}, {'boundaries': ['b', 'b']}])
+def test_invalid_sharding(tmpdir, kwargs):
+    with pytest.raises(ValueError):
+        sharded.build(str(tmpdir.join('x.json')), 'DAWG', ['foo'], **kwargs)
+
+
+def test_unsorted_stream(tmpdir):
+    with pytest.raises(ValueError):
+        sharded.build(str(tmpdir.join('x.json')), 'DAWG', ['foo', 'bar'], boundaries=['c'], input_is_sorted=True)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+import dawg_python
+
+from .utils import words100k, data_path
+
+np = pytest.importorskip("numpy")
+vectorized = pytest.importorskip("dawg_python.vectorized")
+
+words = words100k()
+
+
+class TestFind(object):
+
+    def dictionary(self):
+        return dawg_python.Dictionary.load(data_path('large', 'int_dawg.dawg'))
+
+    def test_find(self):
+        dic = self.dictionary()
+        keys = [word.encode('utf8') for word in words[::7]]
+        keys += [key[:-1] for key in keys[::5]] + [key + b'x' for key in keys[::5]]
+        keys += [b'', b'\xff\xfe', b'zzz']
+
+        res = vectorized.find(dic, keys, batch_size=1000)
+        assert res.dtype == np.int64
+        assert res.tolist() == [dic.find(key) for key in keys]
+
+    def test_find_empty(self):
+        assert vectorized.find(self.dictionary(), []).tolist() == []
+
+    def test_encode_keys(self):
+        matrix, lengths = vectorized.encode_keys([b'ab', b'', b'xyz'])
+        assert lengths.tolist() == [2, 0, 3]
+        assert matrix.tolist() == [[97, 98, 0], [0, 0, 0], [120, 121, 122]]
+
+
+class TestIntDAWG(object):
+
+    def test_get_many_array(self):
+        d = dawg_python.IntDAWG().load(data_path('small', 'int_dawg.dawg'))
+        res = d.get_many_array(['foo', 'x', 'foobar', b'bar', 'fo'])
+        assert res.tolist() == [1, -1, 3, 5, -1]
+
+    def test_get_many_array_mmap(self):
+        path = data_path('large', 'int_dawg.dawg')
+        with dawg_python.IntDAWG().load(path, mmap=True) as d:
+            res = d.get_many_array(words[:1000])
+            assert res.tolist() == [len(word) for word in words[:1000]]
+
+
+class TestRecordDAWG(object):
+
+    def dawg(self):
+        return dawg_python.RecordDAWG(str(">3H")).load(data_path('small', 'record.dawg'))
+
+    @pytest.mark.parametrize("fmt", ["<H", ">3H", "=bq", "@bq", "3s2H", "!?xd", "c h", "<4sQ"])
+    def test_record_dtype(self, fmt):
+        import struct
+        values = struct.unpack(str(fmt), bytes(bytearray(range(1, struct.calcsize(str(fmt)) + 1))))
+        data = struct.pack(str(fmt), *values)
+        record = np.frombuffer(data, dtype=vectorized.record_dtype(fmt))[0]
+        assert tuple(record.tolist()) == values
+
+    def test_record_dtype_unsupported(self):
+        with pytest.raises(ValueError):
+            vectorized.record_dtype("3p")
+
+    def test_items_array(self):
+        d = self.dawg()
+        keys, records = d.items_array()
+        assert keys == d.keys()
+        assert [tuple(rec) for rec in records.tolist()] == [value for key, value in d.items()]
+        assert records['f2'].tolist() == [0, 1, 256, 0]
+
+        keys, records = d.items_array('foob')
+        assert keys == ['foobar']
+        assert records.tolist() == [(6, 3, 0)]
+
+    def test_items_array_missing(self):
+        keys, records = self.dawg().items_array('x')
+        assert keys == []
+        assert len(records) == 0
+
+    def test_get_many_array(self):
+        d = self.dawg()
+        positions, records = d.get_many_array(['x', 'foobar', 'foo', 'fo'])
+        assert positions.tolist() == [1, 2, 2]
+        assert records.tolist() == [(6, 3, 0), (3, 2, 1), (3, 2, 256)]
+
+    def test_get_many_array_large(self):
+        d = dawg_python.RecordDAWG(str("<H")).load(data_path('large', 'record_dawg.dawg'))
+        positions, records = d.get_many_array(words[:1000])
+        assert positions.tolist() == list(range(1000))
+        assert records['f0'].tolist() == [len(word) for word in words[:1000]]
+
+    def test_wrong_format(self):
+        d = dawg_python.RecordDAWG(str(">3I")).load(data_path('small', 'record.dawg'))
+        with pytest.raises(ValueError):
+            d.items_array()